@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_asgi_application()
+
+# The notification stream takes its token in the query string; keep it out of access logs
+from core.utils import accesslog  # noqa: E402
+
+accesslog.install()
@@ -6,4 +6,7 @@ class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.domains.clients'
     label = 'clients'
-    verbose_name = 'Clients'
\ No newline at end of file
+    verbose_name = 'Clients'
+    
+    def ready(self):
+        import core.domains.clients.signals
@@ -0,0 +1,147 @@
+# backend/core/domains/clients/dedupe.py
+import re
+from collections import defaultdict
+from itertools import combinations
+
+# Shared mail providers say nothing about who owns an address, so they never form a block
+FREE_EMAIL_DOMAINS = frozenset({
+    'aol.com', 'gmail.com', 'googlemail.com', 'gmx.com', 'hotmail.com', 'icloud.com', 'live.com',
+    'mail.com', 'me.com', 'msn.com', 'outlook.com', 'proton.me', 'protonmail.com', 'yahoo.com',
+    'ymail.com',
+})
+
+# Blocks larger than this are too common a key (a shared office number, "J500 S530")
+# to tell anything; comparing within them would grow quadratically
+MAX_BLOCK_SIZE = 100
+
+# Phone numbers shorter than this are extensions or typos
+MIN_PHONE_DIGITS = 7
+
+# Similarity weights; a field missing on either side is left out of the score
+WEIGHTS = {'name': 0.5, 'phone': 0.3, 'email': 0.2}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def soundex(name):
+    """American Soundex code of a name, e.g. 'R163' for both Robert and Rupert"""
+    letters = re.sub(r'[^a-z]', '', (name or '').lower())
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+        # 'h' and 'w' don't separate letters with the same code; vowels do
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def normalize_phone(phone):
+    """The last ten digits of a phone number, so country prefixes don't matter"""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if len(digits) >= MIN_PHONE_DIGITS else ''
+
+
+def normalize_email_local(local):
+    """Mailbox name without +tags and dots, which providers ignore"""
+    return local.split('+', 1)[0].replace('.', '')
+
+
+def trigrams(text):
+    """Trigrams of a lower-cased, space-padded text, as pg_trgm extracts them"""
+    words = re.findall(r'[a-z0-9]+', (text or '').lower())
+    return frozenset(
+        padded[i:i + 3]
+        for word in words
+        for padded in [f'  {word} ']
+        for i in range(len(padded) - 2)
+    )
+
+
+class ClientRecord:
+    """The compared fields of one client"""
+    __slots__ = ('id', 'first_name', 'last_name', 'email_local', 'email_domain', 'phone')
+
+    def __init__(self, id, email, first_name, last_name, phone):
+        self.id = id
+        local, _, domain = (email or '').lower().partition('@')
+        self.email_local = normalize_email_local(local)
+        self.email_domain = domain
+        self.first_name = first_name or ''
+        self.last_name = last_name or ''
+        self.phone = normalize_phone(phone)
+
+    def block_keys(self):
+        if self.phone:
+            yield ('phone', self.phone)
+        if self.first_name and self.last_name:
+            yield ('name', soundex(self.first_name), soundex(self.last_name))
+        if len(self.email_local) >= 4:
+            yield ('email', self.email_local)
+        if self.email_domain and self.email_domain not in FREE_EMAIL_DOMAINS and self.last_name:
+            yield ('domain', self.email_domain, soundex(self.last_name))
+
+
+def candidate_pairs(records):
+    """
+    Return {(record, record): set of block types} for records sharing a block key.
+
+    Only records in the same block are paired, so the work grows with the block
+    sizes rather than with the square of the number of clients.
+    """
+    blocks = defaultdict(list)
+    for record in records:
+        for key in record.block_keys():
+            blocks[key].append(record)
+
+    pairs = defaultdict(set)
+    for key, members in blocks.items():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            for a, b in combinations(members, 2):
+                pair = (a, b) if a.id < b.id else (b, a)
+                pairs[pair].add(key[0])
+    return pairs
+
+
+def score_pairs(pairs):
+    """
+    Yield (a, b, score, reasons) for candidate pairs, scored from 0 to 1.
+
+    Trigram sets are built once per record and reused across all of its pairs;
+    each pair then costs a few set intersections.
+    """
+    features = {}
+
+    def featurize(record):
+        if record.id not in features:
+            features[record.id] = (
+                trigrams(f'{record.first_name} {record.last_name}'),
+                trigrams(record.email_local),
+            )
+        return features[record.id]
+
+    for (a, b), reasons in pairs.items():
+        (name_a, email_a), (name_b, email_b) = featurize(a), featurize(b)
+        total = weight = 0.0
+        for field, (x, y) in (('name', (name_a, name_b)), ('email', (email_a, email_b))):
+            if x and y:
+                total += WEIGHTS[field] * len(x & y) / len(x | y)
+                weight += WEIGHTS[field]
+        if a.phone and b.phone:
+            total += WEIGHTS['phone'] * (a.phone == b.phone)
+            weight += WEIGHTS['phone']
+        if weight:
+            yield a, b, round(total / weight, 3), sorted(reasons)
+
+
+def find_duplicates(records, min_score):
+    """Scored candidate pairs at or above min_score, best first"""
+    scored = [match for match in score_pairs(candidate_pairs(records)) if match[2] >= min_score]
+    return sorted(scored, key=lambda match: -match[2])
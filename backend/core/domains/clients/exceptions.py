@@ -36,4 +36,28 @@ class ClientInvitationError(APIException):
 class ClientAlreadyActive(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = "Client already has an active account."
-    default_code = "client_already_active"
\ No newline at end of file
+    default_code = "client_already_active"
+
+
+class ClientImportNotFound(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Client import not found."
+    default_code = "client_import_not_found"
+
+
+class InvalidImportFile(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "The import file cannot be read."
+    default_code = "invalid_import_file"
+
+
+class DuplicateCandidateNotFound(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Duplicate client candidate not found."
+    default_code = "duplicate_candidate_not_found"
+
+
+class InvitationBatchNotFound(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Invitation batch not found."
+    default_code = "invitation_batch_not_found"
@@ -0,0 +1,130 @@
+# backend/core/domains/clients/imports.py
+import codecs
+import csv
+import os
+import re
+import zipfile
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+# Accepted spellings of each imported column, after lower-casing and joining words with '_'
+COLUMNS = {
+    'email': ('email', 'e_mail', 'email_address'),
+    'first_name': ('first_name', 'firstname', 'first', 'given_name'),
+    'last_name': ('last_name', 'lastname', 'last', 'surname', 'family_name'),
+    'name': ('name', 'full_name', 'client', 'client_name', 'contact'),
+    'phone': ('phone', 'phone_number', 'telephone', 'mobile'),
+    'company': ('company', 'company_name', 'organization', 'organisation', 'business'),
+}
+ALIASES = {alias: column for column, aliases in COLUMNS.items() for alias in aliases}
+
+# Longest value each column accepts, matching the User and UserProfile fields
+MAX_LENGTHS = {'email': 254, 'first_name': 150, 'last_name': 150, 'phone': 20, 'company': 200}
+
+EXTENSIONS = ('.csv', '.xlsx')
+
+# Rows kept on an import for review; further failures are only counted
+MAX_ERRORS = 100
+
+
+class ImportFileError(Exception):
+    """An import file that cannot be read"""
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def row_error(email, row):
+    """Why a row cannot be imported, or None"""
+    if not email:
+        return "Email is required"
+    try:
+        validate_email(email)
+    except ValidationError:
+        return "Invalid email address"
+    for column, limit in MAX_LENGTHS.items():
+        if len(row.get(column) or '') > limit:
+            return f"{column} is longer than {limit} characters"
+    return None
+
+
+def _column(header):
+    return ALIASES.get(re.sub(r'[\s\-]+', '_', str(header or '').strip().lower()))
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    # Spreadsheets store phone numbers without formatting as numbers
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _rows(header, values):
+    columns = [_column(name) for name in header]
+    if 'email' not in columns:
+        raise ImportFileError("The file has no email column")
+    for row in values:
+        fields = {}
+        for column, value in zip(columns, row):
+            if column and not fields.get(column):
+                fields[column] = _cell(value)
+        if fields.get('name') and not (fields.get('first_name') or fields.get('last_name')):
+            fields['first_name'], _, fields['last_name'] = fields['name'].partition(' ')
+        fields.pop('name', None)
+        yield fields
+
+
+def _csv_rows(file):
+    # Decode incrementally, so the file is never read into memory as a whole
+    lines = codecs.iterdecode(file, 'utf-8-sig')
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise ImportFileError("The file is empty")
+    yield from _rows(header, reader)
+
+
+def _xlsx_rows(file):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportFileError("XLSX imports need openpyxl installed")
+
+    # Read-only workbooks parse rows lazily instead of loading the whole sheet
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except zipfile.BadZipFile:
+        raise ImportFileError("Invalid XLSX file")
+    try:
+        values = workbook.active.iter_rows(values_only=True)
+        header = next(values, None)
+        if header is None:
+            raise ImportFileError("The file is empty")
+        yield from _rows(header, values)
+    finally:
+        workbook.close()
+
+
+def read_rows(file, file_name):
+    """
+    Yield the rows of an uploaded CSV or XLSX file as dicts of known columns.
+
+    Every data row is yielded, blank ones included, so a row's position is a
+    stable cursor for resuming an import.
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ImportFileError(f"Unsupported file type, expected one of: {', '.join(EXTENSIONS)}")
+    try:
+        if extension == '.csv':
+            yield from _csv_rows(file)
+        else:
+            yield from _xlsx_rows(file)
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV files must be UTF-8 encoded")
+    except csv.Error as e:
+        raise ImportFileError(f"Invalid CSV file: {str(e)}")
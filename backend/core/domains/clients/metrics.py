@@ -0,0 +1,103 @@
+# backend/core/domains/clients/metrics.py
+import logging
+
+from core.utils.totals import sum_of
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('lifetime_revenue', 'outstanding_balance', 'events_count', 'last_event_date')
+
+# Query parameter -> ClientMetrics lookup for range filters on the client list
+RANGE_FILTERS = {
+    'lifetime_revenue_min': 'lifetime_revenue__gte',
+    'lifetime_revenue_max': 'lifetime_revenue__lte',
+    'outstanding_balance_min': 'outstanding_balance__gte',
+    'outstanding_balance_max': 'outstanding_balance__lte',
+    'events_count_min': 'events_count__gte',
+    'events_count_max': 'events_count__lte',
+    'last_event_from': 'last_event_date__gte',
+    'last_event_to': 'last_event_date__lte',
+}
+
+
+def ordering(field):
+    """
+    Order-by expressions for sorting clients by a metric, e.g. '-lifetime_revenue'.
+
+    The client ID breaks ties, so each ordering walks one of the ClientMetrics indexes.
+    Clients without events sort as having the oldest last event.
+    """
+    name = field.lstrip('-')
+    if name not in FIELDS:
+        raise ValueError(f"Cannot sort clients by {name}")
+    descending = field.startswith('-')
+    if name == 'last_event_date':
+        column = F(f'metrics__{name}')
+        if descending:
+            return [column.desc(nulls_last=True), '-id']
+        return [column.asc(nulls_first=True), 'id']
+    return [f'-metrics__{name}', '-id'] if descending else [f'metrics__{name}', 'id']
+
+
+def compute(client_ids):
+    """Return {client_id: {field: value}} computed from events and payments, one query"""
+    from core.domains.events.models import Event
+    from core.domains.payments.models import Payment
+
+    events = Event.objects.filter(client=OuterRef('pk')).exclude(status='CANCELLED').order_by().values('client')
+    payments = Payment.objects.filter(event__client=OuterRef('pk'))
+    rows = (
+        get_user_model().objects.filter(pk__in=client_ids, role='CLIENT')
+        .annotate(
+            lifetime_revenue=sum_of(payments.filter(status='COMPLETED'), 'event__client', 'amount'),
+            outstanding_balance=sum_of(payments.filter(status='PENDING'), 'event__client', 'amount'),
+            events_count=Coalesce(Subquery(events.annotate(value=Count('pk')).values('value')), 0),
+            last_event_date=Subquery(events.annotate(value=Max('start_date')).values('value')),
+        )
+        .values_list('pk', *FIELDS)
+    )
+    return {row[0]: dict(zip(FIELDS, row[1:])) for row in rows}
+
+
+def refresh(client_ids):
+    """Recompute and store the metrics of some clients with one read and one upsert"""
+    from .models import ClientMetrics
+
+    values = compute(set(client_ids))
+    if not values:
+        return 0
+    now = timezone.now()
+    ClientMetrics.objects.bulk_create(
+        [ClientMetrics(client_id=client_id, refreshed_at=now, **fields) for client_id, fields in values.items()],
+        update_conflicts=True,
+        unique_fields=['client'],
+        update_fields=[*FIELDS, 'refreshed_at']
+    )
+    return len(values)
+
+
+def refresh_later(client_ids):
+    """Refresh clients' metrics once the current transaction commits"""
+    client_ids = {client_id for client_id in client_ids if client_id}
+    if client_ids:
+        transaction.on_commit(lambda: refresh(client_ids))
+
+
+def reconcile(batch_size=1000):
+    """Recompute every client's metrics, healing changes made without signals"""
+    client_ids = get_user_model().objects.filter(role='CLIENT').order_by('pk').values_list('pk', flat=True)
+    last_id = 0
+    total = 0
+    while True:
+        batch = list(client_ids.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        total += refresh(batch)
+        last_id = batch[-1]
+    logger.info(f"Reconciled metrics for {total} clients")
+    return total
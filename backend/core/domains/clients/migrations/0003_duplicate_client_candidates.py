@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_client_imports'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateClientCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(blank=True, default=list, help_text='Block keys the pair shares: phone, name, email, domain')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('MERGED', 'Merged'), ('DISMISSED', 'Dismissed')], default='PENDING', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('client_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('client_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('primary', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_client_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('client_a', 'client_b'), name='unique_duplicate_client_pair'), models.CheckConstraint(condition=models.Q(('client_a__lt', models.F('client_b'))), name='duplicate_client_pair_ordered')],
+            },
+        ),
+    ]
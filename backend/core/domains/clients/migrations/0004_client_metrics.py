@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Start every existing client with metrics computed the way clients/metrics.py does
+BACKFILL = """
+INSERT INTO clients_clientmetrics
+    (client_id, lifetime_revenue, outstanding_balance, events_count, last_event_date, refreshed_at)
+SELECT
+    client.id,
+    COALESCE((
+        SELECT SUM(payment.amount) FROM payments_payment payment
+        JOIN events_event event ON event.id = payment.event_id
+        WHERE event.client_id = client.id AND payment.status = 'COMPLETED'
+    ), 0),
+    COALESCE((
+        SELECT SUM(payment.amount) FROM payments_payment payment
+        JOIN events_event event ON event.id = payment.event_id
+        WHERE event.client_id = client.id AND payment.status = 'PENDING'
+    ), 0),
+    (SELECT COUNT(*) FROM events_event event WHERE event.client_id = client.id AND event.status <> 'CANCELLED'),
+    (SELECT MAX(event.start_date) FROM events_event event WHERE event.client_id = client.id AND event.status <> 'CANCELLED'),
+    NOW()
+FROM users_user client
+WHERE client.role = 'CLIENT'
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_duplicate_client_candidates'),
+        ('events', '0003_event_name_search'),
+        ('payments', '0004_payment_filter_indexes'),
+        ('users', '0004_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientMetrics',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metrics', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('lifetime_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Completed payments', max_digits=12)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, help_text='Pending payments', max_digits=12)),
+                ('events_count', models.PositiveIntegerField(default=0, help_text='Events that are not cancelled')),
+                ('last_event_date', models.DateTimeField(blank=True, help_text='Latest start of an event that is not cancelled', null=True)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Client metrics',
+                'indexes': [models.Index(fields=['lifetime_revenue', 'client'], name='client_metrics_revenue_idx'), models.Index(fields=['outstanding_balance', 'client'], name='client_metrics_balance_idx'), models.Index(fields=['events_count', 'client'], name='client_metrics_events_idx'), models.Index(models.OrderBy(models.F('last_event_date'), descending=True, nulls_last=True), models.OrderBy(models.F('client'), descending=True), name='client_metrics_last_event_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
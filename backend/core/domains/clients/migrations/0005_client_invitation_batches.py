@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_metrics'),
+        ('communications', '0004_email_bodies'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientinvitation',
+            name='email_record',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='client_invitations', to='communications.emailrecord'),
+        ),
+        migrations.CreateModel(
+            name='ClientInvitationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('requested_count', models.PositiveIntegerField(default=0)),
+                ('invited_count', models.PositiveIntegerField(default=0)),
+                ('skipped', models.JSONField(blank=True, default=list, help_text='Clients not invited, with the reason')),
+                ('invited_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='client_invitation_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='clientinvitation',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invitations', to='clients.clientinvitationbatch'),
+        ),
+    ]
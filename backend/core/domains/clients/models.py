@@ -7,6 +7,20 @@ from django.utils import timezone
 User = get_user_model()
 
 
+class ClientInvitationBatch(BaseModel):
+    """Invitations sent to many clients at once"""
+    invited_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='client_invitation_batches')
+    requested_count = models.PositiveIntegerField(default=0)
+    invited_count = models.PositiveIntegerField(default=0)
+    skipped = models.JSONField(default=list, blank=True, help_text="Clients not invited, with the reason")
+    
+    def __str__(self):
+        return f"Invitation batch {self.id} ({self.invited_count} of {self.requested_count})"
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
 class ClientInvitation(BaseModel):
     """Invitations for clients to create accounts"""
     id = models.UUIDField(primary_key=True, default=None, editable=False)
@@ -14,6 +28,13 @@ class ClientInvitation(BaseModel):
     invited_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='sent_client_invitations')
     is_accepted = models.BooleanField(default=False)
     expires_at = models.DateTimeField()
+    batch = models.ForeignKey(
+        ClientInvitationBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='invitations'
+    )
+    # The queued invitation email, for reporting its delivery
+    email_record = models.ForeignKey(
+        'communications.EmailRecord', on_delete=models.SET_NULL, null=True, blank=True, related_name='client_invitations'
+    )
     
     def __str__(self):
         return f"Invitation for {self.client.email}"
@@ -26,4 +47,97 @@ class ClientInvitation(BaseModel):
         # Generate UUID if not provided
         if not self.id:
             self.id = models.UUIDField().get_default()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ClientImport(BaseModel):
+    """Bulk client import from an uploaded CSV or XLSX file, resumable from its row cursor"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    file = models.FileField(upload_to='client_imports/')
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='client_imports')
+    
+    # Progress, committed together with each chunk of clients
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="The first rows that could not be imported")
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Client import {self.id} - {self.status}"
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class DuplicateClientCandidate(BaseModel):
+    """A pair of clients that look like the same person, awaiting review"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('MERGED', 'Merged'),
+        ('DISMISSED', 'Dismissed'),
+    ]
+    
+    # client_a is always the client with the lower ID, so a pair is stored once
+    client_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    client_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    reasons = models.JSONField(default=list, blank=True, help_text="Block keys the pair shares: phone, name, email, domain")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # The client kept by a merge; the other one was merged into it
+    primary = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Possible duplicate {self.client_a_id} / {self.client_b_id} ({self.score})"
+    
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['client_a', 'client_b'], name='unique_duplicate_client_pair'),
+            models.CheckConstraint(condition=models.Q(client_a__lt=models.F('client_b')), name='duplicate_client_pair_ordered'),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score'], name='duplicate_client_status_idx'),
+        ]
+
+
+class ClientMetrics(models.Model):
+    """
+    Lifetime figures of a client, stored for sorting and filtering the client list
+    
+    Refreshed when the client's events or payments change and reconciled nightly.
+    """
+    client = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='metrics')
+    lifetime_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Completed payments")
+    outstanding_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Pending payments")
+    events_count = models.PositiveIntegerField(default=0, help_text="Events that are not cancelled")
+    last_event_date = models.DateTimeField(null=True, blank=True, help_text="Latest start of an event that is not cancelled")
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Metrics for client {self.client_id}"
+    
+    class Meta:
+        verbose_name_plural = 'Client metrics'
+        indexes = [
+            models.Index(fields=['lifetime_revenue', 'client'], name='client_metrics_revenue_idx'),
+            models.Index(fields=['outstanding_balance', 'client'], name='client_metrics_balance_idx'),
+            models.Index(fields=['events_count', 'client'], name='client_metrics_events_idx'),
+            models.Index(
+                models.F('last_event_date').desc(nulls_last=True), models.F('client').desc(),
+                name='client_metrics_last_event_idx'
+            ),
+        ]
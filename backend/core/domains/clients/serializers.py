@@ -1,9 +1,14 @@
 # backend/core/domains/clients/serializers.py
+from core.domains.events.models import Event
 from core.domains.events.serializers import EventSerializer
 from core.domains.users.serializers import UserSerializer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from . import metrics
+from .models import ClientImport, ClientInvitationBatch, DuplicateClientCandidate
+
 User = get_user_model()
 
 class ClientProfileSerializer(serializers.Serializer):
@@ -16,20 +21,68 @@ class ClientListSerializer(serializers.ModelSerializer):
     """Serializer for client list view"""
     profile = ClientProfileSerializer(required=False)
     has_account = serializers.SerializerMethodField()
+    lifetime_revenue = serializers.DecimalField(
+        source='metrics.lifetime_revenue', max_digits=12, decimal_places=2, read_only=True, default=None
+    )
+    outstanding_balance = serializers.DecimalField(
+        source='metrics.outstanding_balance', max_digits=12, decimal_places=2, read_only=True, default=None
+    )
+    events_count = serializers.IntegerField(source='metrics.events_count', read_only=True, default=None)
+    last_event_date = serializers.DateTimeField(source='metrics.last_event_date', read_only=True, default=None)
     
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 
-            'profile', 'date_joined', 'is_active', 'has_account'
+            'profile', 'date_joined', 'is_active', 'has_account',
+            'lifetime_revenue', 'outstanding_balance', 'events_count', 'last_event_date'
         ]
         read_only_fields = ['id', 'date_joined', 'email', 'has_account']
+
+
+class ClientListFilterSerializer(serializers.Serializer):
+    """Validates the metric sorting and range filters of the client list"""
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in metrics.FIELDS for prefix in ('', '-')], required=False
+    )
+    lifetime_revenue_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    lifetime_revenue_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    outstanding_balance_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    outstanding_balance_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    events_count_min = serializers.IntegerField(min_value=0, required=False)
+    events_count_max = serializers.IntegerField(min_value=0, required=False)
+    last_event_from = serializers.DateTimeField(required=False)
+    last_event_to = serializers.DateTimeField(required=False)
+    
+    def metric_filters(self):
+        """ClientMetrics lookups for the given range filters"""
+        return {
+            lookup: self.validated_data[param]
+            for param, lookup in metrics.RANGE_FILTERS.items()
+            if param in self.validated_data
+        }
         
     def get_has_account(self, obj):
         # Check if the user has a valid password set
         return bool(obj.password and obj.password != '')
 
 
+class ClientEventSummarySerializer(serializers.ModelSerializer):
+    """Compact event row for the client overview, read from annotated querysets"""
+    event_type_name = serializers.CharField(source='event_type.name', read_only=True, default=None)
+    open_tasks = serializers.IntegerField(read_only=True)
+    next_task_due = serializers.DateTimeField(read_only=True)
+    
+    class Meta:
+        model = Event
+        fields = [
+            'id', 'name', 'status', 'event_type', 'event_type_name', 'start_date', 'end_date',
+            'payment_status', 'total_amount_due', 'total_amount_paid', 'last_contacted',
+            'open_tasks', 'next_task_due'
+        ]
+        read_only_fields = fields
+
+
 class ClientDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for client data"""
     profile = ClientProfileSerializer(required=False)
@@ -123,6 +176,37 @@ class ClientInvitationDetailSerializer(serializers.Serializer):
         return f"{client.first_name} {client.last_name}".strip() or client.email
 
 
+class BulkClientInvitationSerializer(serializers.Serializer):
+    """Serializer for inviting many clients at once"""
+    client_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    
+    def validate_client_ids(self, value):
+        limit = getattr(settings, 'CLIENT_INVITATION_BATCH_LIMIT', 1000)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} clients can be invited at once.")
+        return value
+
+
+class ClientInvitationBatchSerializer(serializers.ModelSerializer):
+    """A bulk invitation request with the delivery status of each client"""
+    counts = serializers.SerializerMethodField()
+    clients = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ClientInvitationBatch
+        fields = [
+            'id', 'invited_by', 'requested_count', 'invited_count',
+            'counts', 'clients', 'created_at',
+        ]
+        read_only_fields = fields
+    
+    def get_counts(self, obj):
+        return self.context.get('status', {}).get('counts', {})
+    
+    def get_clients(self, obj):
+        return self.context.get('status', {}).get('clients', [])
+
+
 class AcceptClientInvitationSerializer(serializers.Serializer):
     """Serializer for accepting a client invitation"""
     password = serializers.CharField(min_length=8, write_only=True)
@@ -132,4 +216,43 @@ class AcceptClientInvitationSerializer(serializers.Serializer):
         """Validate that passwords match"""
         if data.get('password') != data.get('confirm_password'):
             raise serializers.ValidationError({"confirm_password": "Passwords do not match."})
-        return data
\ No newline at end of file
+        return data
+
+
+class ClientImportSerializer(serializers.ModelSerializer):
+    """Progress and outcome of a bulk client import"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = ClientImport
+        fields = [
+            'id', 'file_name', 'status', 'status_display', 'created_by',
+            'processed_rows', 'created_count', 'duplicate_count', 'error_count',
+            'errors', 'started_at', 'completed_at', 'error_message',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class ClientImportUploadSerializer(serializers.Serializer):
+    """Serializer for uploading a CSV or XLSX file of clients"""
+    file = serializers.FileField()
+
+
+class DuplicateClientCandidateSerializer(serializers.ModelSerializer):
+    """A pair of possibly duplicate clients, shown side by side"""
+    client_a = ClientListSerializer(read_only=True)
+    client_b = ClientListSerializer(read_only=True)
+    
+    class Meta:
+        model = DuplicateClientCandidate
+        fields = [
+            'id', 'client_a', 'client_b', 'score', 'reasons', 'status',
+            'primary', 'reviewed_by', 'reviewed_at', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class MergeClientsSerializer(serializers.Serializer):
+    """Serializer for choosing which client of a pair is kept"""
+    primary_id = serializers.IntegerField(required=False)
@@ -1,23 +1,36 @@
 # backend/core/domains/clients/services.py
 import logging
+import os
 import secrets
 import uuid
 from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
 
 from core.domains.communications.services import EmailService
+from core.utils import search
+from core.utils.templates import compiled_templates
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, JSONObject, Lower
 from django.template import Context, Template
 from django.utils import timezone
 
+from . import dedupe, imports, metrics
 from .exceptions import (
     ClientAlreadyActive,
     ClientDeactivationError,
+    ClientImportNotFound,
     ClientInvitationError,
     ClientNotFound,
+    DuplicateCandidateNotFound,
     EmailAlreadyExists,
+    InvalidClientData,
+    InvalidImportFile,
+    InvitationBatchNotFound,
 )
 
 User = get_user_model()
@@ -314,40 +327,226 @@ class ClientInvitationService:
             
             logger.info(f"Client account activated: {client.email}")
             return client
+    
+    @staticmethod
+    def send_bulk_invitations(client_ids, invited_by_id):
+        """
+        Invite many clients at once
+        
+        Clients that don't exist, already have an active account or hold a live
+        invitation are skipped, the latter found with one query while the clients'
+        rows are locked against concurrent batches. Invitations are
+        inserted together, and their emails queued as one batch for the delivery
+        worker, which sends them over a shared SMTP connection. Every email points
+        at the template body stored once; only the subject is rendered here.
+        
+        Args:
+            client_ids (list): IDs of the clients to invite
+            invited_by_id (int): ID of the admin sending the invitations
+            
+        Returns:
+            ClientInvitationBatch: The batch, for following each client's status
+            
+        Raises:
+            ClientInvitationError: If the admin or the invitation template doesn't exist
+        """
+        from core.domains.communications import bodies
+        from core.domains.communications.models import EmailRecord
+        
+        from .models import ClientInvitation, ClientInvitationBatch
+        
+        try:
+            invited_by = User.objects.get(id=invited_by_id, role='ADMIN')
+        except User.DoesNotExist:
+            logger.error(f"Admin with ID {invited_by_id} not found")
+            raise ClientInvitationError(detail="Invalid admin ID")
+        
+        template = EmailService.get_template('Client Invitation')
+        if not template:
+            raise ClientInvitationError(detail="Email template 'Client Invitation' not found")
+        
+        subject_template = compiled_templates.get(template, 'subject')
+        context = Context({})
+        invited_by_name = invited_by.get_full_name() or invited_by.email
+        client_ids = list(dict.fromkeys(client_ids))
+        now = timezone.now()
+        
+        with transaction.atomic():
+            # Lock the clients in ID order, so a concurrent batch waits here and then sees
+            # this batch's invitations as live instead of inviting the same clients again
+            clients = {
+                client.pk: client
+                for client in User.objects.select_for_update().filter(role='CLIENT', pk__in=client_ids).only(
+                    'id', 'email', 'first_name', 'last_name', 'is_active'
+                ).order_by('pk')
+            }
+            live = set(
+                ClientInvitation.objects.filter(client_id__in=clients, is_accepted=False, expires_at__gt=now)
+                .values_list('client_id', flat=True)
+            )
+            
+            invite = []
+            skipped = []
+            for client_id in client_ids:
+                client = clients.get(client_id)
+                if client is None:
+                    reason = 'not_found'
+                elif client.is_active:
+                    reason = 'already_active'
+                elif client_id in live:
+                    reason = 'live_invitation'
+                else:
+                    invite.append(client)
+                    continue
+                skipped.append({'client_id': client_id, 'email': client.email if client else None, 'reason': reason})
+            
+            batch = ClientInvitationBatch.objects.create(
+                invited_by=invited_by, requested_count=len(client_ids), invited_count=len(invite), skipped=skipped
+            )
+            body_id = bodies.store([template.body])[template.body] if invite else None
+            
+            invitations = []
+            records = []
+            failed = []
+            for client in invite:
+                invitation = ClientInvitation(
+                    id=uuid.uuid4(), client=client, invited_by=invited_by, batch=batch,
+                    expires_at=now + timedelta(days=7)
+                )
+                merge = {
+                    'invitation_link': f"{settings.CLIENT_FRONTEND_URL}/accept-invitation/{invitation.id}",
+                    'invited_by': invited_by_name,
+                    'expiry_date': '7 days',
+                    'email': client.email,
+                    'first_name': client.first_name,
+                    'last_name': client.last_name,
+                }
+                record = EmailRecord(
+                    name='Client Invitation',
+                    client=client,
+                    recipient_email=client.email,
+                    attachments=template.attachments,
+                    sent_by=invited_by
+                )
+                with context.push(client=client, user=client, **merge):
+                    try:
+                        record.subject = subject_template.render(context).strip()[:200]
+                        record.body_ref_id = body_id
+                        record.body_context = merge
+                        records.append(record)
+                    except Exception as e:
+                        logger.error(f"Error rendering invitation for {client.email}: {str(e)}")
+                        record.status = 'FAILED'
+                        record.last_error = f"Render error: {str(e)}"
+                        failed.append(record)
+                invitation.email_record = record
+                invitations.append(invitation)
+            
+            EmailService.queue_emails(records)
+            EmailRecord.objects.bulk_create(failed)
+            ClientInvitation.objects.bulk_create(invitations, batch_size=1000)
         
+        logger.info(f"Queued {len(invitations)} client invitations, skipped {len(skipped)}")
+        return batch
+    
+    @staticmethod
+    def get_batch_status(batch_id):
+        """
+        Per-client status of an invitation batch
+        
+        Invited clients report their email's delivery status, which the worker
+        updates as it sends; skipped clients report why they were skipped.
+        
+        Raises:
+            InvitationBatchNotFound: If the batch doesn't exist
+        """
+        from .models import ClientInvitationBatch
+        
+        try:
+            batch = ClientInvitationBatch.objects.get(pk=batch_id)
+        except ClientInvitationBatch.DoesNotExist:
+            raise InvitationBatchNotFound()
+        
+        clients = []
+        for invitation in batch.invitations.select_related('client', 'email_record').order_by('client_id'):
+            # Old email records are purged, after which the outcome is no longer known
+            record = invitation.email_record
+            clients.append({
+                'client_id': invitation.client_id,
+                'email': invitation.client.email,
+                'invitation_id': invitation.id,
+                'status': record.status if record else 'UNKNOWN',
+                'attempts': record.attempts if record else None,
+                'last_error': record.last_error if record else '',
+                'is_accepted': invitation.is_accepted,
+            })
+        clients.extend(
+            {'client_id': entry['client_id'], 'email': entry['email'], 'status': 'SKIPPED', 'reason': entry['reason']}
+            for entry in batch.skipped
+        )
+        
+        counts = {}
+        for client in clients:
+            counts[client['status']] = counts.get(client['status'], 0) + 1
+        return batch, {'counts': counts, 'clients': clients}
+
+
 class ClientService:
     """Service for client operations"""
     
     @staticmethod
-    def get_all_clients(search_query=None, is_active=None):
+    def get_all_clients(search_query=None, is_active=None, ordering=None, metric_filters=None):
         """
         Get all clients with optional filtering
         
         Args:
             search_query (str, optional): Search term for filtering clients
             is_active (bool, optional): Filter by active status
+            ordering (str, optional): Metric to sort by, e.g. '-lifetime_revenue'
+            metric_filters (dict, optional): ClientMetrics lookups, e.g. {'events_count__gte': 2}
             
         Returns:
             QuerySet: Filtered queryset of clients
         """
         # Filter users with CLIENT role
-        queryset = User.objects.filter(role='CLIENT')
-        
-        # Apply additional filters if provided
-        if search_query:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(profile__company__icontains=search_query) |
-                Q(profile__phone__icontains=search_query)
-            )
+        queryset = User.objects.filter(role='CLIENT').select_related('profile', 'metrics')
         
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active)
-            
+        
+        if metric_filters:
+            queryset = queryset.filter(**{f'metrics__{lookup}': value for lookup, value in metric_filters.items()})
+        
+        # Search the trigram-indexed search document, best matches first
+        if search.normalize(search_query):
+            queryset = queryset.filter(search.document_filter('search_document', search_query))
+            if not ordering:
+                return queryset.annotate(
+                    rank=search.document_rank('search_document', search_query)
+                ).order_by('-rank', '-date_joined')
+        
+        if ordering:
+            return queryset.order_by(*metrics.ordering(ordering))
         return queryset.order_by('-date_joined')
     
+    @staticmethod
+    def search_clients(search_query, limit=None, is_active=None):
+        """
+        Get the best matching clients for a search term, e.g. for a client picker
+        
+        Args:
+            search_query (str): Search term matched against names, email, company and phone
+            limit (int, optional): Maximum number of results, CLIENT_SEARCH_LIMIT by default
+            is_active (bool, optional): Filter by active status
+            
+        Returns:
+            QuerySet: At most `limit` clients ordered by relevance
+        """
+        if not search.normalize(search_query):
+            return User.objects.none()
+        limit = limit or getattr(settings, 'CLIENT_SEARCH_LIMIT', 20)
+        return ClientService.get_all_clients(search_query=search_query, is_active=is_active)[:limit]
+    
     @staticmethod
     def get_client_by_id(client_id):
         """
@@ -508,4 +707,453 @@ class ClientService:
             ClientNotFound: If the client doesn't exist
         """
         client = ClientService.get_client_by_id(client_id)
-        return client.events.all().order_by('-start_date')
\ No newline at end of file
+        return client.events.all().order_by('-start_date')
+    
+    @staticmethod
+    def get_client_overview(client_id):
+        """
+        Get a client with the summary shown on their profile, in a single query
+        
+        Every figure is a correlated subquery over the client's events, payments and
+        tasks, so the cost doesn't grow with the number of events loaded.
+        
+        Args:
+            client_id (int): ID of the client
+            
+        Returns:
+            tuple: (User, dict of summary figures)
+            
+        Raises:
+            ClientNotFound: If the client doesn't exist
+        """
+        from core.domains.events.models import Event, EventTask
+        from core.domains.payments.models import Payment
+        
+        def aggregate(queryset, client_field, expression):
+            return Subquery(
+                queryset.filter(**{client_field: OuterRef('pk')})
+                .order_by()
+                .values(client_field)
+                .annotate(value=expression)
+                .values('value')
+            )
+        
+        events = Event.objects.all()
+        payments = Payment.objects.all()
+        statuses = [status for status, _ in Event.EVENT_STATUSES]
+        now = timezone.now()
+        
+        client = (
+            User.objects.filter(pk=client_id, role='CLIENT')
+            .select_related('profile', 'metrics')
+            .annotate(
+                **{
+                    f'events_{status.lower()}': aggregate(events, 'client', Count('pk', filter=Q(status=status)))
+                    for status in statuses
+                },
+                revenue_paid=aggregate(payments, 'event__client', Sum('amount', filter=Q(status='COMPLETED'))),
+                revenue_outstanding=aggregate(payments, 'event__client', Sum('amount', filter=Q(status='PENDING'))),
+                open_tasks=aggregate(
+                    EventTask.objects.all(), 'event__client', Count('pk', filter=Q(status__in=['PENDING', 'IN_PROGRESS']))
+                ),
+                last_contacted=aggregate(events, 'client', Max('last_contacted')),
+                next_event=Subquery(
+                    events.filter(client=OuterRef('pk'), start_date__gte=now)
+                    .exclude(status='CANCELLED')
+                    .order_by('start_date')
+                    .values(data=JSONObject(id='id', name='name', status='status', start_date='start_date'))[:1]
+                ),
+            )
+            .first()
+        )
+        if client is None:
+            raise ClientNotFound()
+        
+        event_counts = {status: getattr(client, f'events_{status.lower()}') or 0 for status in statuses}
+        return client, {
+            'events_by_status': event_counts,
+            'events_total': sum(event_counts.values()),
+            'revenue_paid': client.revenue_paid or Decimal('0'),
+            'revenue_outstanding': client.revenue_outstanding or Decimal('0'),
+            'open_tasks': client.open_tasks or 0,
+            'last_contacted': client.last_contacted,
+            'next_event': client.next_event,
+        }
+    
+    @staticmethod
+    def get_client_event_summaries(client_id):
+        """
+        Get a client's events for listing, newest first
+        
+        Open task counts and the next due date are correlated subqueries, evaluated
+        only for the page of events returned rather than a few queries per event.
+        """
+        from core.domains.events.models import Event, EventTask
+        
+        open_tasks = (
+            EventTask.objects.filter(event=OuterRef('pk'), status__in=['PENDING', 'IN_PROGRESS'])
+            .order_by()
+            .values('event')
+        )
+        return (
+            Event.objects.filter(client_id=client_id)
+            .select_related('event_type')
+            .annotate(
+                open_tasks=Coalesce(Subquery(open_tasks.annotate(value=Count('pk')).values('value')), 0),
+                next_task_due=Subquery(open_tasks.annotate(value=Min('due_date')).values('value')),
+            )
+            .order_by('-start_date')
+        )
+
+
+class ClientImportService:
+    """Service for bulk client imports"""
+    
+    @staticmethod
+    def start_import(file, user=None):
+        """
+        Store an uploaded CSV or XLSX file and queue it for importing
+        
+        Raises:
+            InvalidImportFile: If the file type is not supported
+        """
+        from .models import ClientImport
+        from .tasks import import_clients
+        
+        file_name = os.path.basename(file.name)
+        if os.path.splitext(file_name)[1].lower() not in imports.EXTENSIONS:
+            raise InvalidImportFile(detail=f"Unsupported file type, expected one of: {', '.join(imports.EXTENSIONS)}")
+        
+        client_import = ClientImport.objects.create(file=file, file_name=file_name, created_by=user)
+        transaction.on_commit(lambda: import_clients.delay(client_import.id))
+        return client_import
+    
+    @staticmethod
+    def get_import(import_id):
+        """Get a client import by ID"""
+        from .models import ClientImport
+        
+        try:
+            return ClientImport.objects.get(pk=import_id)
+        except ClientImport.DoesNotExist:
+            raise ClientImportNotFound(detail=f"Client import with ID {import_id} not found")
+    
+    @staticmethod
+    def resume_import(import_id):
+        """Queue a failed import to continue from its row cursor"""
+        from .models import ClientImport
+        from .tasks import import_clients
+        
+        client_import = ClientImportService.get_import(import_id)
+        # Conditional, so an import that is running or already requeued is never started twice
+        resumed = ClientImport.objects.filter(pk=client_import.pk, status='FAILED').update(
+            status='PENDING', error_message='', updated_at=timezone.now()
+        )
+        if not resumed:
+            raise ValueError("Only failed client imports can be resumed")
+        
+        client_import.refresh_from_db()
+        transaction.on_commit(lambda: import_clients.delay(client_import.id))
+        return client_import
+    
+    @staticmethod
+    def run_import(import_id, chunk_size=500):
+        """
+        Import a file's clients chunk by chunk, streaming its rows
+        
+        Each chunk commits its clients together with the import's row cursor and
+        counters, so an interrupted import resumes after the last committed row.
+        Only a pending import is run.
+        """
+        from .models import ClientImport
+        
+        # Claim the import; a duplicate task finds it no longer pending and leaves it alone
+        now = timezone.now()
+        claimed = ClientImport.objects.filter(pk=import_id, status='PENDING').update(
+            status='RUNNING', started_at=Coalesce('started_at', now), updated_at=now
+        )
+        client_import = ClientImportService.get_import(import_id)
+        if not claimed:
+            logger.info(f"Client import {import_id} is {client_import.status.lower()}, not running it")
+            return client_import
+        
+        # Emails already seen in the file; rows before the cursor are found in the database instead
+        seen = set()
+        try:
+            with client_import.file.open('rb') as file:
+                # Row 1 is the header
+                rows = enumerate(imports.read_rows(file, client_import.file_name), start=2)
+                rows = islice(rows, client_import.processed_rows, None)
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    ClientImportService._import_chunk(client_import, chunk, seen)
+        except Exception as e:
+            logger.error(f"Client import {import_id} failed: {str(e)}")
+            ClientImport.objects.filter(pk=import_id).update(
+                status='FAILED', error_message=str(e), updated_at=timezone.now()
+            )
+            client_import.refresh_from_db()
+            return client_import
+        
+        client_import.status = 'COMPLETED'
+        client_import.completed_at = timezone.now()
+        client_import.save(update_fields=['status', 'completed_at', 'updated_at'])
+        ClientImportService.notify_completed(client_import)
+        return client_import
+    
+    @staticmethod
+    def _import_chunk(client_import, rows, seen):
+        """Create the new clients of a chunk of (row number, row) pairs in one transaction"""
+        from core.domains.notifications.models import NotificationPreference
+        from core.domains.users.models import UserProfile
+        
+        from .models import ClientMetrics
+        
+        candidates = []
+        for row_number, row in rows:
+            if not any(row.values()):
+                continue
+            email = imports.normalize_email(row.get('email'))
+            error = imports.row_error(email, row)
+            if error:
+                client_import.error_count += 1
+                if len(client_import.errors) < imports.MAX_ERRORS:
+                    client_import.errors.append({'row': row_number, 'email': row.get('email', ''), 'error': error})
+            elif email in seen:
+                client_import.duplicate_count += 1
+            else:
+                seen.add(email)
+                candidates.append((email, row))
+        
+        # One query per chunk finds the users that already exist, matching emails
+        # case-insensitively through the lower(email) index
+        existing = set(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=[email for email, _ in candidates])
+            .values_list('email_lower', flat=True)
+        )
+        new = [(email, row) for email, row in candidates if email not in existing]
+        client_import.duplicate_count += len(candidates) - len(new)
+        
+        with transaction.atomic():
+            # Imported clients are invite-only, so they get an unusable password instead of
+            # a hashed one. bulk_create skips the post_save signals: profiles, preferences and
+            # metrics are created here, and admins get one notification for the whole import.
+            clients = User.objects.bulk_create([
+                User(
+                    email=email,
+                    first_name=row.get('first_name', ''),
+                    last_name=row.get('last_name', ''),
+                    role='CLIENT',
+                    is_active=False,
+                    password=make_password(None)
+                )
+                for email, row in new
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=client, phone=row.get('phone') or None, company=row.get('company') or None)
+                for client, (_, row) in zip(clients, new)
+            ])
+            NotificationPreference.objects.bulk_create([NotificationPreference(user=client) for client in clients])
+            ClientMetrics.objects.bulk_create([ClientMetrics(client=client) for client in clients])
+            
+            client_import.processed_rows += len(rows)
+            client_import.created_count += len(clients)
+            client_import.save(update_fields=[
+                'processed_rows', 'created_count', 'duplicate_count', 'error_count', 'errors', 'updated_at'
+            ])
+    
+    @staticmethod
+    def notify_completed(client_import):
+        """Tell admins how many clients an import created, in place of a notification per client"""
+        from core.domains.notifications.services import NotificationService
+        
+        if not client_import.created_count:
+            return
+        try:
+            NotificationService.create_notifications_bulk(
+                recipients=User.objects.filter(is_staff=True, is_active=True),
+                notification_type_code='CLIENTS_IMPORTED',
+                context={
+                    'import_id': client_import.id,
+                    'file_name': client_import.file_name,
+                    'created_count': client_import.created_count,
+                    'duplicate_count': client_import.duplicate_count,
+                    'error_count': client_import.error_count,
+                    'action_url': '/clients',
+                    'content_type': 'client_import',
+                    'object_id': client_import.id
+                },
+                email=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not notify admins of client import {client_import.id}: {str(e)}")
+
+
+class ClientDedupeService:
+    """Service for finding and merging duplicate clients"""
+    
+    @staticmethod
+    def find_candidates(min_score=None):
+        """
+        Rebuild the pending duplicate candidates from all clients
+        
+        Clients are only compared with clients sharing a block key: a normalized
+        phone, the sound of their name, their mailbox name or their company's
+        email domain. Dismissed and merged pairs are kept as reviewed.
+        
+        Returns:
+            int: Number of pending candidates
+        """
+        from .models import DuplicateClientCandidate
+        
+        if min_score is None:
+            min_score = getattr(settings, 'CLIENT_DEDUPE_MIN_SCORE', 0.5)
+        
+        # Clients merged into another one stay behind, deactivated, and are not compared again
+        merged_away = {
+            client_b if primary_id == client_a else client_a
+            for client_a, client_b, primary_id in DuplicateClientCandidate.objects.filter(status='MERGED')
+            .values_list('client_a', 'client_b', 'primary')
+        }
+        records = (
+            dedupe.ClientRecord(*values)
+            for values in User.objects.filter(role='CLIENT')
+            .values_list('id', 'email', 'first_name', 'last_name', 'profile__phone')
+            .iterator(chunk_size=2000)
+            if values[0] not in merged_away
+        )
+        matches = dedupe.find_duplicates(records, min_score)
+        
+        with transaction.atomic():
+            DuplicateClientCandidate.objects.filter(status='PENDING').delete()
+            # Pairs already reviewed conflict with their stored row and are skipped
+            DuplicateClientCandidate.objects.bulk_create(
+                [
+                    DuplicateClientCandidate(client_a_id=a.id, client_b_id=b.id, score=score, reasons=reasons)
+                    for a, b, score, reasons in matches
+                ],
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+        
+        count = DuplicateClientCandidate.objects.filter(status='PENDING').count()
+        logger.info(f"Found {count} possible duplicate clients")
+        return count
+    
+    @staticmethod
+    def get_candidates():
+        """Pending duplicate candidates, most similar first"""
+        from .models import DuplicateClientCandidate
+        
+        return DuplicateClientCandidate.objects.filter(status='PENDING').select_related(
+            'client_a__profile', 'client_a__metrics', 'client_b__profile', 'client_b__metrics'
+        ).order_by('-score', 'id')
+    
+    @staticmethod
+    def get_candidate(candidate_id):
+        """Get a duplicate candidate by ID"""
+        from .models import DuplicateClientCandidate
+        
+        try:
+            return DuplicateClientCandidate.objects.get(pk=candidate_id)
+        except DuplicateClientCandidate.DoesNotExist:
+            raise DuplicateCandidateNotFound()
+    
+    @staticmethod
+    def dismiss_candidate(candidate_id, user=None):
+        """Mark a candidate as not being a duplicate, so later scans keep it dismissed"""
+        candidate = ClientDedupeService.get_candidate(candidate_id)
+        candidate.status = 'DISMISSED'
+        candidate.reviewed_by = user
+        candidate.reviewed_at = timezone.now()
+        candidate.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'updated_at'])
+        return candidate
+    
+    @staticmethod
+    def merge_candidate(candidate_id, primary_id=None, user=None):
+        """Merge a candidate pair into primary_id, by default the older client"""
+        candidate = ClientDedupeService.get_candidate(candidate_id)
+        if candidate.status != 'PENDING':
+            raise InvalidClientData(detail=f"Candidate is already {candidate.get_status_display().lower()}")
+        
+        primary_id = int(primary_id or candidate.client_a_id)
+        if primary_id not in (candidate.client_a_id, candidate.client_b_id):
+            raise InvalidClientData(detail="The primary client must be one of the pair")
+        duplicate_id = candidate.client_b_id if primary_id == candidate.client_a_id else candidate.client_a_id
+        return ClientDedupeService.merge_clients(primary_id, duplicate_id, user=user)
+    
+    @staticmethod
+    def merge_clients(primary_id, duplicate_id, user=None):
+        """
+        Merge a duplicate client into the primary one
+        
+        Events, invoices, email records and notes are moved with one UPDATE each,
+        profile details missing on the primary are copied over, and the duplicate
+        is deactivated rather than deleted.
+        
+        Returns:
+            tuple: (primary User, dict of moved row counts)
+            
+        Raises:
+            ClientNotFound: If either client doesn't exist
+            InvalidClientData: If both IDs are the same client
+        """
+        from core.domains.communications.models import EmailRecord
+        from core.domains.events.models import Event
+        from core.domains.notes.models import Note
+        from core.domains.payments.models import Invoice
+        from django.contrib.contenttypes.models import ContentType
+        
+        from .models import DuplicateClientCandidate
+        
+        primary_id, duplicate_id = int(primary_id), int(duplicate_id)
+        if primary_id == duplicate_id:
+            raise InvalidClientData(detail="A client cannot be merged into itself")
+        
+        with transaction.atomic():
+            clients = User.objects.select_for_update(of=('self',)).select_related('profile').filter(
+                role='CLIENT'
+            ).in_bulk([primary_id, duplicate_id])
+            if len(clients) != 2:
+                raise ClientNotFound()
+            primary, duplicate = clients[primary_id], clients[duplicate_id]
+            
+            now = timezone.now()
+            moved = {
+                'events': Event.objects.filter(client=duplicate).update(client=primary, updated_at=now),
+                'invoices': Invoice.objects.filter(client=duplicate).update(client=primary, updated_at=now),
+                'email_records': EmailRecord.objects.filter(client=duplicate).update(client=primary, updated_at=now),
+                'notes': Note.objects.filter(
+                    content_type=ContentType.objects.get_for_model(User), object_id=duplicate.id
+                ).update(object_id=primary.id, updated_at=now),
+            }
+            
+            if hasattr(primary, 'profile') and hasattr(duplicate, 'profile'):
+                missing = [
+                    field for field in ('phone', 'company')
+                    if not getattr(primary.profile, field) and getattr(duplicate.profile, field)
+                ]
+                for field in missing:
+                    setattr(primary.profile, field, getattr(duplicate.profile, field))
+                if missing:
+                    primary.profile.save(update_fields=missing + ['updated_at'])
+            
+            duplicate.is_active = False
+            duplicate.save(update_fields=['is_active'])
+            
+            # Record the merge, and drop pending pairs with the duplicate, which no longer apply
+            client_a, client_b = sorted((primary_id, duplicate_id))
+            review = {'status': 'MERGED', 'primary': primary, 'reviewed_by': user, 'reviewed_at': now}
+            DuplicateClientCandidate.objects.update_or_create(
+                client_a_id=client_a, client_b_id=client_b, defaults=review, create_defaults={**review, 'score': 1.0}
+            )
+            DuplicateClientCandidate.objects.filter(
+                Q(client_a=duplicate) | Q(client_b=duplicate), status='PENDING'
+            ).delete()
+            metrics.refresh_later([primary_id, duplicate_id])
+        
+        logger.info(f"Merged client {duplicate.email} into {primary.email}: {moved}")
+        return primary, moved
@@ -0,0 +1,38 @@
+# backend/core/domains/clients/signals.py
+from core.domains.events.models import Event
+from core.domains.payments.models import Payment
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import ClientMetrics
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_client_metrics(sender, instance, created, **kwargs):
+    """Start new clients with empty metrics, so every client sorts and filters by them"""
+    if created and instance.role == 'CLIENT':
+        ClientMetrics.objects.create(client=instance)
+
+
+@receiver(post_init, sender=Event)
+def remember_event_client(sender, instance, **kwargs):
+    """Note the client an event was loaded with, so moving it refreshes both clients"""
+    # Read from __dict__ so a deferred client_id is not fetched
+    instance._previous_client_id = instance.__dict__.get('client_id')
+
+
+@receiver([post_save, post_delete], sender=Event)
+def refresh_metrics_for_event(sender, instance, **kwargs):
+    """Refresh the metrics of the event's client, and of its previous client, once the change commits"""
+    metrics.refresh_later([instance.client_id, getattr(instance, '_previous_client_id', None)])
+    instance._previous_client_id = instance.client_id
+
+
+@receiver(post_delete, sender=Payment)
+def refresh_metrics_for_payment(sender, instance, **kwargs):
+    """Refresh the client's metrics once a deleted payment is gone; saving a payment re-saves its event"""
+    metrics.refresh_later(Event.objects.filter(pk=instance.event_id).values_list('client_id', flat=True))
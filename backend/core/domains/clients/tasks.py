@@ -0,0 +1,38 @@
+# backend/core/domains/clients/tasks.py
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def import_clients(import_id, chunk_size=None):
+    """Import the clients of an uploaded file, resuming from its row cursor"""
+    from core.domains.clients.services import ClientImportService
+
+    chunk_size = chunk_size or getattr(settings, 'CLIENT_IMPORT_CHUNK_SIZE', 500)
+    client_import = ClientImportService.run_import(import_id, chunk_size)
+    logger.info(
+        f"Client import {import_id} {client_import.status.lower()}: {client_import.created_count} created, "
+        f"{client_import.duplicate_count} duplicates, {client_import.error_count} errors"
+    )
+    return client_import.created_count
+
+
+@shared_task
+def find_duplicate_clients(min_score=None):
+    """Rebuild the pending duplicate client candidates"""
+    from core.domains.clients.services import ClientDedupeService
+
+    return ClientDedupeService.find_candidates(min_score)
+
+
+@shared_task
+def reconcile_client_metrics(batch_size=None):
+    """Recompute every client's stored metrics"""
+    from core.domains.clients import metrics
+
+    batch_size = batch_size or getattr(settings, 'CLIENT_METRICS_RECONCILE_BATCH_SIZE', 1000)
+    return metrics.reconcile(batch_size)
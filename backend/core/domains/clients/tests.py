@@ -1,7 +1,23 @@
 # backend/core/domains/clients/tests.py
-from core.domains.clients.services import ClientService
+import io
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from core.domains.clients import dedupe, imports
+from core.domains.clients import metrics as client_metrics
+from core.domains.clients.models import ClientImport, ClientInvitation, ClientMetrics
+from core.domains.clients.services import ClientDedupeService, ClientImportService, ClientService
+from core.domains.communications.models import EmailTemplate
+from core.domains.communications.services import EmailService
 from core.domains.events.models import Event, EventType
+from core.domains.payments.models import Payment
+from core.utils.testing import LOCMEM_CACHE, QueryPlanAssertionsMixin
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -154,6 +170,42 @@ class ClientAPITests(APITestCase):
         response = self.client.delete(self.client_detail_url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_client_overview(self):
+        """Test that the overview summarises a client in a fixed number of queries"""
+        from decimal import Decimal
+
+        from core.domains.events.models import EventTask
+        from core.domains.payments.models import Payment
+        
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        past = Event.objects.bulk_create([
+            Event(client=self.client_user, name=f"Past {i}", status="COMPLETED", start_date=now - timezone.timedelta(days=i + 1))
+            for i in range(5)
+        ])
+        Payment.objects.bulk_create([
+            Payment(payment_number="OV-1", event=past[0], amount=Decimal('100.00'), status='COMPLETED', due_date=now.date()),
+            Payment(payment_number="OV-2", event=self.event, amount=Decimal('40.00'), status='PENDING', due_date=now.date()),
+        ])
+        EventTask.objects.bulk_create([
+            EventTask(event=self.event, title=f"Task {i}", due_date=now, priority='LOW', status=task_status)
+            for i, task_status in enumerate(['PENDING', 'IN_PROGRESS', 'COMPLETED'])
+        ])
+        
+        url = reverse('clients:client-overview', args=[self.client_user.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = response.data['summary']
+        self.assertEqual(summary['events_by_status'], {'LEAD': 1, 'CONFIRMED': 0, 'COMPLETED': 5, 'CANCELLED': 0})
+        self.assertEqual(summary['events_total'], 6)
+        self.assertEqual((summary['revenue_paid'], summary['revenue_outstanding']), (Decimal('100.00'), Decimal('40.00')))
+        self.assertEqual(summary['open_tasks'], 2)
+        self.assertEqual(summary['next_event']['id'], self.event.id)
+        self.assertEqual(response.data['events']['count'], 6)
+        self.assertEqual(response.data['events']['results'][0]['open_tasks'], 2)
+    
     def test_filter_clients_by_search(self):
         """Test filtering clients by search term"""
         self.client.force_authenticate(user=self.admin_user)
@@ -263,4 +315,298 @@ class ClientServiceTests(APITestCase):
         
         if hasattr(updated_client, 'profile'):
             self.assertEqual(updated_client.profile.phone, "999-999-9999")
-            self.assertEqual(updated_client.profile.company, "Updated Company")
\ No newline at end of file
+            self.assertEqual(updated_client.profile.company, "Updated Company")
+
+
+class ClientSearchTests(QueryPlanAssertionsMixin, TestCase):
+    """Test the trigram-indexed client search"""
+
+    CLIENT_COUNT = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create skips the profile signal; the search document comes from the trigger alone
+        User.objects.bulk_create([
+            User(email=f'client{i}@example.com', first_name=f'First{i}', last_name=f'Last{i}', role='CLIENT')
+            for i in range(cls.CLIENT_COUNT)
+        ])
+        cls.analyze(User)
+
+    def create_client(self, email, first_name, last_name, company=None, phone=None):
+        client = User.objects.create_user(email=email, first_name=first_name, last_name=last_name, role='CLIENT')
+        client.profile.company = company
+        client.profile.phone = phone
+        client.profile.save()
+        return client
+
+    def test_results_are_ranked_and_kept_current(self):
+        """Test word-start matching, ranking and that profile edits reach the search document"""
+        jo = self.create_client('jo@example.com', 'Jo', 'Smith', company='Acme Events', phone='(555) 010-2000')
+        johanna = self.create_client('johanna@example.com', 'Johanna', 'Baker')
+        self.create_client('bojo@example.com', 'Bo', 'Bojo')
+
+        # Short terms match at the start of a word only
+        self.assertEqual(list(ClientService.search_clients('jo')), [jo, johanna])
+        self.assertEqual(list(ClientService.search_clients('acme smi')), [jo])
+        self.assertEqual(list(ClientService.search_clients('5550102')), [jo])
+        self.assertEqual(len(ClientService.search_clients('last', limit=5)), 5)
+
+        jo.profile.company = 'Globex'
+        jo.profile.save()
+        self.assertEqual(list(ClientService.search_clients('acme')), [])
+        self.assertEqual(list(ClientService.search_clients('globex')), [jo])
+
+    def test_search_uses_trigram_index(self):
+        """Test that searching reads the trigram index instead of scanning users"""
+        queryset = ClientService.search_clients('last123')
+        self.assertNoSeqScan(queryset)
+        self.assertUsesIndex(queryset, 'user_search_trgm_idx')
+
+
+class ClientImportTests(TestCase):
+    """Test bulk client imports"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        User.objects.create_user(email='Existing@example.com', password='password', role='ADMIN')
+
+    def test_rows_are_streamed_with_column_aliases(self):
+        """Test that headers are matched by alias and full names split"""
+        content = 'E-mail,Full Name,Mobile\n ada@example.com ,Ada Lovelace,5550100\n,,\n'
+        rows = list(imports.read_rows(io.BytesIO(content.encode('utf-8-sig')), 'clients.csv'))
+        self.assertEqual(rows[0], {
+            'email': 'ada@example.com', 'first_name': 'Ada', 'last_name': 'Lovelace', 'phone': '5550100'
+        })
+        self.assertFalse(any(rows[1].values()))
+        with self.assertRaises(imports.ImportFileError):
+            list(imports.read_rows(io.BytesIO(b'name\nAda\n'), 'clients.csv'))
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_import_creates_new_clients_and_skips_duplicates(self):
+        """Test that clients are bulk created once per email, without per-client signals"""
+        content = (
+            'email,first_name,last_name,company\n'
+            'ada@example.com,Ada,Lovelace,Analytical\n'
+            'ADA@example.com,Ada,Again,\n'
+            'existing@example.com,Old,Client,\n'
+            'not-an-email,Bad,Row,\n'
+            'grace@example.com,Grace,Hopper,\n'
+        )
+        with self.captureOnCommitCallbacks():
+            client_import = ClientImportService.start_import(SimpleUploadedFile('clients.csv', content.encode()))
+
+        client_import = ClientImportService.run_import(client_import.id, chunk_size=3)
+
+        self.assertEqual(client_import.status, 'COMPLETED')
+        self.assertEqual(client_import.processed_rows, 5)
+        self.assertEqual(
+            (client_import.created_count, client_import.duplicate_count, client_import.error_count), (2, 2, 1)
+        )
+        self.assertEqual(client_import.errors, [{'row': 5, 'email': 'not-an-email', 'error': 'Invalid email address'}])
+
+        ada = User.objects.select_related('profile', 'notification_preferences').get(email='ada@example.com')
+        self.assertEqual((ada.role, ada.is_active, ada.has_usable_password()), ('CLIENT', False, False))
+        self.assertEqual(ada.profile.company, 'Analytical')
+        self.assertIsNotNone(ada.notification_preferences)
+
+        # A completed import is not run again
+        self.assertEqual(ClientImportService.run_import(client_import.id).created_count, 2)
+        self.assertEqual(User.objects.filter(role='CLIENT').count(), 2)
+
+    def test_imports_run_once_and_resume_only_after_failing(self):
+        """Test that a running import is neither resumed nor claimed by a second task"""
+        with self.captureOnCommitCallbacks():
+            client_import = ClientImportService.start_import(
+                SimpleUploadedFile('clients.csv', b'email\nada@example.com\n')
+            )
+        ClientImport.objects.filter(pk=client_import.pk).update(status='RUNNING')
+
+        with self.assertRaises(ValueError):
+            ClientImportService.resume_import(client_import.id)
+        self.assertEqual(ClientImportService.run_import(client_import.id).created_count, 0)
+
+        ClientImport.objects.filter(pk=client_import.pk).update(status='FAILED')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(ClientImportService.resume_import(client_import.id).status, 'PENDING')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ClientImportService.run_import(client_import.id).status, 'COMPLETED')
+        self.assertTrue(User.objects.filter(email='ada@example.com').exists())
+
+
+class ClientDedupeTests(TestCase):
+    """Test duplicate client detection and merging"""
+
+    def create_client(self, email, first_name, last_name, phone=None):
+        client = User.objects.create_user(email=email, first_name=first_name, last_name=last_name, role='CLIENT')
+        client.profile.phone = phone
+        client.profile.save()
+        return client
+
+    def test_blocking_keys(self):
+        """Test that names block by sound and phones by their last ten digits"""
+        self.assertEqual(dedupe.soundex('Robert'), dedupe.soundex('Rupert'))
+        self.assertEqual(dedupe.soundex('Ashcraft'), 'A261')
+        self.assertEqual(dedupe.normalize_phone('+1 (555) 010-2000'), dedupe.normalize_phone('555.010.2000'))
+
+        records = [
+            dedupe.ClientRecord(1, 'ada.lovelace@gmail.com', 'Ada', 'Lovelace', '555 010 2000'),
+            dedupe.ClientRecord(2, 'ada@analytical.org', 'Ada', 'Lovelase', '+1 555 010 2000'),
+            dedupe.ClientRecord(3, 'grace@example.com', 'Grace', 'Hopper', None),
+        ]
+        self.assertEqual(
+            [(a.id, b.id, reasons) for a, b, _, reasons in dedupe.find_duplicates(records, 0.5)],
+            [(1, 2, ['name', 'phone'])]
+        )
+
+    def test_candidates_are_found_and_merged(self):
+        """Test that a merge moves the duplicate's records and keeps reviewed pairs on rescans"""
+        ada = self.create_client('ada@example.com', 'Ada', 'Lovelace', phone='555 010 2000')
+        typo = self.create_client('ada.l@analytical.org', 'Ada', 'Lovelase', phone='+1 (555) 010-2000')
+        grace = self.create_client('grace@example.com', 'Grace', 'Hopper')
+        event_type = EventType.objects.create(name='Wedding')
+        event = Event.objects.create(
+            client=typo, event_type=event_type, name='Lovelace Wedding', status='LEAD',
+            start_date=timezone.now(), end_date=timezone.now()
+        )
+
+        self.assertEqual(ClientDedupeService.find_candidates(), 1)
+        candidate = ClientDedupeService.get_candidates().get()
+        self.assertEqual((candidate.client_a, candidate.client_b), (ada, typo))
+
+        client, moved = ClientDedupeService.merge_candidate(candidate.id)
+
+        self.assertEqual(client, ada)
+        self.assertEqual(moved['events'], 1)
+        event.refresh_from_db()
+        typo.refresh_from_db()
+        self.assertEqual(event.client, ada)
+        self.assertFalse(typo.is_active)
+
+        # The merged-away client is not offered again
+        self.assertEqual(ClientDedupeService.find_candidates(), 0)
+        self.assertTrue(User.objects.filter(pk=grace.pk, is_active=True).exists())
+
+
+class ClientMetricsTests(APITestCase):
+    """Test the stored client metrics behind the client list"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_user(email='admin@example.com', password='password', role='ADMIN')
+        self.event_type = EventType.objects.create(name='Wedding')
+        self.ada = User.objects.create_user(email='ada@example.com', first_name='Ada', role='CLIENT')
+        self.grace = User.objects.create_user(email='grace@example.com', first_name='Grace', role='CLIENT')
+
+    def create_event(self, client, status='CONFIRMED'):
+        return Event.objects.create(
+            client=client, event_type=self.event_type, name='Event', status=status,
+            start_date=timezone.now(), total_amount_due=Decimal('1000')
+        )
+
+    def test_metrics_follow_events_and_payments(self):
+        """Test that event and payment changes refresh the client's metrics on commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            event = self.create_event(self.ada)
+            self.create_event(self.ada, status='CANCELLED')
+            Payment.objects.create(event=event, amount=Decimal('400'), status='COMPLETED', due_date=timezone.localdate())
+            pending = Payment.objects.create(event=event, amount=Decimal('600'), due_date=timezone.localdate())
+
+        metrics = ClientMetrics.objects.get(client=self.ada)
+        self.assertEqual((metrics.lifetime_revenue, metrics.outstanding_balance), (Decimal('400'), Decimal('600')))
+        self.assertEqual((metrics.events_count, metrics.last_event_date), (1, event.start_date))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.delete()
+        self.assertEqual(ClientMetrics.objects.get(client=self.ada).outstanding_balance, 0)
+
+        # Moving an event refreshes the client it left as well as the new one
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = Event.objects.get(pk=event.pk)
+            moved.client = self.grace
+            moved.save()
+        self.assertEqual(ClientMetrics.objects.get(client=self.ada).events_count, 0)
+        self.assertEqual(ClientMetrics.objects.get(client=self.grace).events_count, 1)
+
+        # Changes made without signals are healed by the reconcile
+        ClientMetrics.objects.update(events_count=0)
+        self.assertEqual(client_metrics.reconcile(), 2)
+        self.assertEqual(ClientMetrics.objects.get(client=self.grace).events_count, 1)
+
+    def test_client_list_sorts_and_filters_by_metrics(self):
+        """Test the metric ordering and range filters of the client list"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_event(self.grace)
+            self.create_event(self.grace)
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('clients:client-list')
+
+        response = self.client.get(url, {'ordering': '-events_count'})
+        results = response.data['results']
+        self.assertEqual([row['email'] for row in results], ['grace@example.com', 'ada@example.com'])
+        self.assertEqual(results[0]['events_count'], 2)
+
+        response = self.client.get(url, {'events_count_max': 0})
+        results = response.data['results']
+        self.assertEqual([row['email'] for row in results], ['ada@example.com'])
+
+        response = self.client.get(url, {'ordering': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RATE_LIMIT=0
+)
+class ClientBulkInvitationTests(APITestCase):
+    """Test inviting many clients at once"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_user(email='admin@example.com', password='password', role='ADMIN')
+        EmailTemplate.objects.create(
+            name='Client Invitation',
+            subject='{{ first_name }}, you are invited',
+            body='<p>Hello {{ client.first_name }}, join at {{ invitation_link }}</p>'
+        )
+        self.clients = [
+            User.objects.create_user(email=f'{name}@example.com', first_name=name, role='CLIENT', is_active=False)
+            for name in ('ada', 'grace', 'alan')
+        ]
+
+    def test_bulk_invitations_skip_and_report_each_client(self):
+        """Test that live invitations and active clients are skipped and delivery is tracked per client"""
+        ada, grace, alan = self.clients
+        ClientInvitation.objects.create(
+            id=uuid.uuid4(), client=grace, invited_by=self.admin_user, expires_at=timezone.now() + timedelta(days=1)
+        )
+        active = User.objects.create_user(email='active@example.com', role='CLIENT')
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.post(
+            reverse('clients:invitation-bulk'),
+            {'client_ids': [ada.id, grace.id, alan.id, active.id, ada.id, 0]},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual((response.data['requested_count'], response.data['invited_count']), (5, 2))
+        self.assertEqual(response.data['counts'], {'SCHEDULED': 2, 'SKIPPED': 3})
+        reasons = {row['client_id']: row.get('reason') for row in response.data['clients']}
+        self.assertEqual(reasons[grace.id], 'live_invitation')
+        self.assertEqual(reasons[active.id], 'already_active')
+        self.assertEqual(reasons[0], 'not_found')
+
+        EmailService.deliver_scheduled()
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['ada@example.com', 'alan@example.com'])
+        message = next(message for message in mail.outbox if message.to == ['ada@example.com'])
+        invitation = ClientInvitation.objects.get(client=ada)
+        self.assertEqual(message.subject, 'ada, you are invited')
+        self.assertIn('Hello ada, join at http', message.alternatives[0][0])
+        self.assertIn(str(invitation.id), message.alternatives[0][0])
+
+        response = self.client.get(reverse('clients:invitation-batch', args=[response.data['id']]))
+        self.assertEqual(response.data['counts'], {'SENT': 2, 'SKIPPED': 3})
@@ -7,6 +7,9 @@ from . import views
 app_name = 'clients'
 
 router = DefaultRouter()
+# Registered before the client routes, whose detail pattern would match 'imports/'
+router.register(r'imports', views.ClientImportViewSet, basename='import')
+router.register(r'duplicates', views.DuplicateClientViewSet, basename='duplicate')
 router.register(r'', views.ClientViewSet, basename='client')
 router.register(r'invitations', views.ClientInvitationViewSet, basename='invitation')
 
@@ -1,19 +1,30 @@
 # backend/core/domains/clients/views.py
 from core.utils.permissions import IsAdmin
+from django.conf import settings
 from django.db import models, transaction
-from rest_framework import filters, status, viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
+from .models import ClientImport
 from .serializers import (
     AcceptClientInvitationSerializer,
+    BulkClientInvitationSerializer,
     ClientCreateUpdateSerializer,
     ClientDetailSerializer,
+    ClientEventSummarySerializer,
+    ClientImportSerializer,
+    ClientImportUploadSerializer,
+    ClientInvitationBatchSerializer,
     ClientInvitationDetailSerializer,
     ClientInvitationSerializer,
+    ClientListFilterSerializer,
     ClientListSerializer,
+    DuplicateClientCandidateSerializer,
+    MergeClientsSerializer,
 )
-from .services import ClientInvitationService, ClientService
+from .services import ClientDedupeService, ClientImportService, ClientInvitationService, ClientService
 
 
 class ClientViewSet(viewsets.ModelViewSet):
@@ -21,8 +32,6 @@ class ClientViewSet(viewsets.ModelViewSet):
     ViewSet for managing clients (users with CLIENT role)
     """
     permission_classes = [IsAdmin]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['first_name', 'last_name', 'email', 'profile__company', 'profile__phone']
     
     def get_queryset(self):
         is_active = self.request.query_params.get('is_active')
@@ -32,12 +41,18 @@ class ClientViewSet(viewsets.ModelViewSet):
         # Convert string to boolean if provided
         if is_active is not None:
             is_active = is_active.lower() == 'true'
+        
+        # Sorting and range filters on the stored client metrics
+        filters = ClientListFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
             
         # Get base queryset first
         queryset = ClientService.get_all_clients(
             search_query=search_query,
-            is_active=is_active
-    )
+            is_active=is_active,
+            ordering=filters.validated_data.get('ordering'),
+            metric_filters=filters.metric_filters()
+        )
             
         # has_account is a custom filter - if true, get clients with passwords set
         # if false, get clients without passwords (imported clients)
@@ -53,10 +68,7 @@ class ClientViewSet(viewsets.ModelViewSet):
                 client_ids = [client.id for client in queryset if not client.has_usable_password()]
                 return queryset.filter(id__in=client_ids)
         
-        return ClientService.get_all_clients(
-            search_query=search_query,
-            is_active=is_active
-        )
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -109,6 +121,29 @@ class ClientViewSet(viewsets.ModelViewSet):
         serializer = EventSerializer(events, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        """
+        Client profile summary with a paginated, compact list of their events
+        
+        Event counts by status, revenue paid and outstanding, open tasks, the last
+        contact and the next upcoming event come from one query; the events page
+        from two more, however many events the client has.
+        """
+        client, summary = ClientService.get_client_overview(pk)
+        events = ClientService.get_client_event_summaries(client.id)
+        page = self.paginate_queryset(events)
+        if page is not None:
+            events = self.get_paginated_response(ClientEventSummarySerializer(page, many=True).data).data
+        else:
+            events = ClientEventSummarySerializer(events, many=True).data
+        
+        return Response({
+            'client': ClientListSerializer(client).data,
+            'summary': summary,
+            'events': events,
+        })
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get only active clients"""
@@ -122,6 +157,22 @@ class ClientViewSet(viewsets.ModelViewSet):
         serializer = ClientListSerializer(active_clients, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Best matching clients for a search term, e.g. for a client picker
+        
+        ?q= is matched against names, email, company and phone; ?limit= caps the
+        results at up to CLIENT_SEARCH_LIMIT.
+        """
+        cap = getattr(settings, 'CLIENT_SEARCH_LIMIT', 20)
+        try:
+            limit = min(int(request.query_params.get('limit', cap)), cap)
+        except ValueError:
+            limit = cap
+        clients = ClientService.search_clients(request.query_params.get('q', ''), limit=max(limit, 1))
+        return Response(ClientListSerializer(clients, many=True).data)
+    
     @action(detail=True, methods=['post'])
     def send_invitation(self, request, pk=None):
         """Send an invitation to a client to create an account"""
@@ -139,6 +190,71 @@ class ClientViewSet(viewsets.ModelViewSet):
             )
 
 
+class ClientImportViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for bulk client imports from CSV or XLSX files
+    """
+    serializer_class = ClientImportSerializer
+    permission_classes = [IsAdmin]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def get_queryset(self):
+        return ClientImport.objects.all()
+    
+    def create(self, request, *args, **kwargs):
+        """Upload a file and queue its import; poll the import for progress"""
+        serializer = ClientImportUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        client_import = ClientImportService.start_import(serializer.validated_data['file'], user=request.user)
+        return Response(ClientImportSerializer(client_import).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Continue a failed import from its last committed row"""
+        try:
+            client_import = ClientImportService.resume_import(pk)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ClientImportSerializer(client_import).data, status=status.HTTP_202_ACCEPTED)
+
+
+class DuplicateClientViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for reviewing and merging possibly duplicate clients
+    """
+    serializer_class = DuplicateClientCandidateSerializer
+    permission_classes = [IsAdmin]
+    
+    def get_queryset(self):
+        return ClientDedupeService.get_candidates()
+    
+    @action(detail=False, methods=['post'])
+    def scan(self, request):
+        """Queue a new search for duplicates"""
+        from .tasks import find_duplicate_clients
+        
+        find_duplicate_clients.delay()
+        return Response({"detail": "Duplicate search queued"}, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        """Merge the pair into primary_id, by default the older client"""
+        serializer = MergeClientsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        client, moved = ClientDedupeService.merge_candidate(
+            pk, primary_id=serializer.validated_data.get('primary_id'), user=request.user
+        )
+        return Response({'client': ClientListSerializer(client).data, 'moved': moved})
+    
+    @action(detail=True, methods=['post'])
+    def dismiss(self, request, pk=None):
+        """Mark the pair as different clients"""
+        candidate = ClientDedupeService.dismiss_candidate(pk, user=request.user)
+        return Response(DuplicateClientCandidateSerializer(candidate).data)
+
+
 class ClientInvitationViewSet(viewsets.ViewSet):
     """
     ViewSet for client invitations
@@ -165,6 +281,31 @@ class ClientInvitationViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Invite many clients at once; poll the returned batch for delivery status
+        """
+        serializer = BulkClientInvitationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        batch = ClientInvitationService.send_bulk_invitations(
+            client_ids=serializer.validated_data['client_ids'],
+            invited_by_id=request.user.id
+        )
+        batch, batch_status = ClientInvitationService.get_batch_status(batch.id)
+        serializer = ClientInvitationBatchSerializer(batch, context={'status': batch_status})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'batches/(?P<batch_id>\d+)')
+    def batch(self, request, batch_id=None):
+        """
+        Delivery status of each client in a bulk invitation
+        """
+        batch, batch_status = ClientInvitationService.get_batch_status(batch_id)
+        serializer = ClientInvitationBatchSerializer(batch, context={'status': batch_status})
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
         """
@@ -180,8 +321,8 @@ class ClientInvitationViewSet(viewsets.ViewSet):
             )
             
             # Generate tokens for automatic login
-            from rest_framework_simplejwt.tokens import RefreshToken
-            refresh = RefreshToken.for_user(client)
+            from core.domains.users.authentication import UserRefreshToken
+            refresh = UserRefreshToken.for_user(client)
             
             return Response({
                 "message": "Account activated successfully",
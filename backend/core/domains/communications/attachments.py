@@ -0,0 +1,242 @@
+# backend/core/domains/communications/attachments.py
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import smtplib
+import tempfile
+import time
+import uuid
+from email.utils import encode_rfc2231
+
+from django.apps import apps
+from django.conf import settings
+
+# Multiple of 57 raw bytes, so every chunk encodes to whole 76-character base64 lines
+CHUNK_SIZE = 57 * 1024
+
+# Never allowed in a filename: they could end the Content-Disposition header early
+CONTROL_CHARACTERS = re.compile(r'[\x00-\x1f\x7f]')
+
+# Reference type -> (model, file field, attribute naming the file)
+SOURCES = {
+    'event_file': ('events.EventFile', 'file', 'name'),
+    'invoice': ('payments.Invoice', 'invoice_pdf', 'invoice_id'),
+    'quote': ('sales.EventQuote', 'pdf_file', None),
+    'receipt': ('payments.Payment', 'receipt_pdf', 'payment_number'),
+}
+
+
+class AttachmentError(Exception):
+    """An attachment reference that cannot be resolved to a stored file"""
+
+
+class ResolvedAttachment:
+    """A stored file an email refers to"""
+
+    def __init__(self, file, filename, mimetype, key):
+        self.file = file
+        self.filename = filename
+        self.mimetype = mimetype
+        self.key = key
+
+
+def validate_reference(reference):
+    """Check the shape of a {'type': ..., 'id': ...} attachment reference"""
+    if not isinstance(reference, dict) or reference.get('type') not in SOURCES:
+        raise AttachmentError(f"Attachment type must be one of: {', '.join(SOURCES)}")
+    if not isinstance(reference.get('id'), int):
+        raise AttachmentError("Attachment id must be an integer")
+    filename = reference.get('filename')
+    if filename is not None and (not isinstance(filename, str) or CONTROL_CHARACTERS.search(filename)):
+        raise AttachmentError("Attachment filename must be text without control characters")
+    return reference
+
+
+def resolve(reference):
+    """Resolve an attachment reference to its stored file"""
+    validate_reference(reference)
+    model_label, field, name_attr = SOURCES[reference['type']]
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=reference['id']).first()
+    file = getattr(instance, field, None) if instance else None
+    if not file:
+        raise AttachmentError(f"No file for attachment {reference['type']} {reference['id']}")
+
+    extension = os.path.splitext(file.name)[1]
+    filename = reference.get('filename') or (
+        f"{getattr(instance, name_attr)}{extension}" if name_attr else os.path.basename(file.name)
+    )
+    if not os.path.splitext(filename)[1]:
+        filename += extension
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    # A new upload gets a new name or timestamp, so stale encodings are never reused
+    key = f"{model_label}:{instance.pk}:{file.name}:{getattr(instance, 'updated_at', '')}"
+    return ResolvedAttachment(file, filename, mimetype, key)
+
+
+class EncodedAttachmentCache:
+    """
+    Base64 encodings of attachments kept on local disk.
+
+    A file is read and encoded in CHUNK_SIZE pieces once per worker, then reused
+    for every email that attaches it, e.g. all recipients of a campaign. Each disk
+    is pruned by the processes writing to it, at most once per
+    EMAIL_ATTACHMENT_CACHE_PRUNE_INTERVAL.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._pruned_at = None
+
+    def _directory(self):
+        directory = self.directory or getattr(settings, 'EMAIL_ATTACHMENT_CACHE_DIR', None) or os.path.join(
+            tempfile.gettempdir(), 'email-attachments'
+        )
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def path(self, attachment):
+        """Path of the encoded attachment, encoding it first on a miss"""
+        path = os.path.join(self._directory(), hashlib.sha256(attachment.key.encode()).hexdigest() + '.b64')
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        # Write to a private file first so concurrent workers never read a partial encoding
+        partial = f"{path}.{uuid.uuid4().hex}"
+        try:
+            with attachment.file.open('rb') as source, open(partial, 'wb') as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(base64.encodebytes(chunk).replace(b'\n', b'\r\n'))
+            os.replace(partial, path)
+        except FileNotFoundError as e:
+            raise AttachmentError(f"Attachment file is missing: {attachment.file.name}") from e
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self._prune_if_due()
+        return path
+
+    def _prune_if_due(self):
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < getattr(
+            settings, 'EMAIL_ATTACHMENT_CACHE_PRUNE_INTERVAL', 60 * 60
+        ):
+            return
+        self._pruned_at = now
+        self.prune(getattr(settings, 'EMAIL_ATTACHMENT_CACHE_TTL', 60 * 60 * 24))
+
+    def prune(self, max_age):
+        """Remove encodings not used for max_age seconds"""
+        directory = self._directory()
+        cutoff = time.time() - max_age
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+encoded_attachments = EncodedAttachmentCache()
+
+
+def _header_filename(filename):
+    filename = CONTROL_CHARACTERS.sub('', filename)
+    try:
+        filename.encode('ascii')
+        return 'filename="{}"'.format(filename.replace('\\', '\\\\').replace('"', '\\"'))
+    except UnicodeEncodeError:
+        return f"filename*={encode_rfc2231(filename, 'utf-8')}"
+
+
+def iter_message(message, attachments):
+    """
+    Yield a message with attachments as SMTP-ready byte chunks.
+
+    The body is rendered by Django as usual; each attachment is copied from its
+    cached encoding in CHUNK_SIZE pieces, so the whole message never sits in memory.
+    `attachments` is a list of (ResolvedAttachment, encoded path).
+    """
+    inner = message.message()
+    outer_headers = []
+    for header in ('Subject', 'From', 'To', 'Cc', 'Reply-To', 'Date', 'Message-ID'):
+        value = inner.get(header)
+        if value is not None:
+            # Folded header values keep their continuation lines, with CRLF endings
+            value = str(value).replace('\r\n', '\n').replace('\n', '\r\n')
+            outer_headers.append(f"{header}: {value}\r\n".encode())
+            del inner[header]
+    del inner['MIME-Version']
+
+    boundary = f"=={uuid.uuid4().hex}=="
+    yield b''.join(outer_headers) + (
+        f'MIME-Version: 1.0\r\nContent-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n'
+    ).encode()
+
+    # Dot-stuff the body the way smtplib.SMTP.data() would; base64 lines never start with '.'
+    body = inner.as_bytes(linesep='\r\n')
+    yield f"--{boundary}\r\n".encode() + re.sub(rb'(?m)^\.', b'..', body) + b'\r\n'
+
+    for attachment, path in attachments:
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Type: {attachment.mimetype}\r\n"
+            f"Content-Transfer-Encoding: base64\r\n"
+            f"Content-Disposition: attachment; {_header_filename(attachment.filename)}\r\n\r\n"
+        ).encode()
+        with open(path, 'rb') as encoded:
+            while True:
+                chunk = encoded.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    yield f"--{boundary}--\r\n".encode()
+
+
+def send_streaming(connection, message, attachments):
+    """
+    Send a message over an open Django SMTP backend, streaming its attachments.
+
+    Mirrors smtplib.SMTP.sendmail, but writes the DATA section chunk by chunk.
+    """
+    smtp = connection.connection
+    smtp.ehlo_or_helo_if_needed()
+    from_email = message.from_email
+    recipients = message.recipients()
+
+    code, response = smtp.mail(from_email)
+    if code != 250:
+        smtp.rset()
+        raise smtplib.SMTPSenderRefused(code, response, from_email)
+
+    refused = {}
+    for recipient in recipients:
+        code, response = smtp.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, response)
+    if len(refused) == len(recipients):
+        smtp.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, response = smtp.docmd('data')
+    if code != 354:
+        smtp.rset()
+        raise smtplib.SMTPDataError(code, response)
+    for chunk in iter_message(message, attachments):
+        smtp.send(chunk)
+    smtp.send(b'.\r\n')
+    code, response = smtp.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, response)
+    return refused
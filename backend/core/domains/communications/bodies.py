@@ -0,0 +1,165 @@
+# backend/core/domains/communications/bodies.py
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.utils import timezone
+
+COMPRESSION_LEVEL = 6
+
+# Bodies in use are touched at most this often; purging only removes bodies idle for far longer
+TOUCH_INTERVAL = timedelta(days=1)
+
+
+class BodyRenderError(Exception):
+    """A templated body that cannot be rendered for its record"""
+
+
+def digest(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def store(contents):
+    """
+    Return {content: EmailBody id}, creating shared compressed bodies as needed.
+
+    Bodies are content-addressed, so identical content (one notification email sent
+    to many users, one campaign template) is stored once however many records use it.
+    """
+    from .models import EmailBody
+
+    by_digest = {digest(content): content for content in set(contents)}
+    if not by_digest:
+        return {}
+
+    now = timezone.now()
+    # Refresh bodies a purge could otherwise consider idle; the row lock makes a concurrent purge skip them
+    EmailBody.objects.filter(digest__in=by_digest, updated_at__lt=now - TOUCH_INTERVAL).update(updated_at=now)
+    ids = dict(EmailBody.objects.filter(digest__in=by_digest).values_list('digest', 'id'))
+
+    missing = [key for key in by_digest if key not in ids]
+    if missing:
+        EmailBody.objects.bulk_create(
+            [
+                EmailBody(
+                    digest=key,
+                    content=zlib.compress(by_digest[key].encode(), COMPRESSION_LEVEL),
+                    size=len(by_digest[key].encode()),
+                    created_at=now,
+                    updated_at=now
+                )
+                for key in missing
+            ],
+            ignore_conflicts=True
+        )
+        ids.update(EmailBody.objects.filter(digest__in=missing).values_list('digest', 'id'))
+    return {content: ids[key] for key, content in by_digest.items()}
+
+
+def compact(records):
+    """Move records' inline bodies to shared storage, returning the records changed"""
+    inline = [record for record in records if record.body]
+    ids = store(record.body for record in inline)
+    for record in inline:
+        record.body_ref_id = ids[record.body]
+        record.body = ''
+    return inline
+
+
+class BodyCache:
+    """
+    Process-local LRU of decompressed bodies, and their compiled templates, by ID.
+
+    Stored bodies never change, so entries need no invalidation.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, body_id):
+        with self._lock:
+            entry = self._entries.get(body_id)
+            if entry is not None:
+                self._entries.move_to_end(body_id)
+            return entry
+
+    def put(self, body_id, text, template=None):
+        with self._lock:
+            self._entries[body_id] = (text, template)
+            self._entries.move_to_end(body_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def load(self, body_ids):
+        """Make sure bodies are cached, fetching the missing ones in one query"""
+        from .models import EmailBody
+
+        missing = [body_id for body_id in set(body_ids) if self.get(body_id) is None]
+        if missing:
+            for body_id, content in EmailBody.objects.filter(pk__in=missing).values_list('id', 'content'):
+                self.put(body_id, zlib.decompress(bytes(content)).decode())
+
+    def template(self, body_id):
+        text, template = self.get(body_id) or (None, None)
+        if text is None:
+            self.load([body_id])
+            text, template = self.get(body_id)
+        if template is None:
+            template = Template(text)
+            self.put(body_id, text, template)
+        return template
+
+    def text(self, body_id):
+        entry = self.get(body_id)
+        if entry is None:
+            self.load([body_id])
+            entry = self.get(body_id)
+        return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+body_cache = BodyCache(getattr(settings, 'EMAIL_BODY_CACHE_SIZE', 64))
+
+
+def prefetch(records):
+    """Load the shared bodies and merge recipients of many records with one query each"""
+    from .models import EmailRecord
+
+    body_cache.load(record.body_ref_id for record in records if record.body_ref_id)
+    templated = [
+        record for record in records
+        if record.body_context is not None and record.client_id and not EmailRecord.client.is_cached(record)
+    ]
+    if templated:
+        users = get_user_model().objects.in_bulk({record.client_id for record in templated})
+        for record in templated:
+            record.client = users.get(record.client_id)
+
+
+def render(record):
+    """
+    Return a record's body.
+
+    Inline bodies are returned as is; shared bodies are decompressed, and rendered
+    with the record's merge context and recipient when they are templates.
+    """
+    if record.body or not record.body_ref_id:
+        return record.body
+    if record.body_context is None:
+        return body_cache.text(record.body_ref_id)
+    try:
+        return body_cache.template(record.body_ref_id).render(
+            Context({'client': record.client, **record.body_context, 'user': record.client})
+        )
+    except Exception as e:
+        raise BodyRenderError(f"Render error: {str(e)}") from e
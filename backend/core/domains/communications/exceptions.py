@@ -18,4 +18,16 @@ class TemplateNameExists(APIException):
 class InvalidTemplateFormat(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = "The template format is invalid."
-    default_code = "invalid_template_format"
\ No newline at end of file
+    default_code = "invalid_template_format"
+
+
+class CampaignNotFound(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Email campaign not found."
+    default_code = "campaign_not_found"
+
+
+class InvalidCampaignState(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "The campaign cannot do that in its current state."
+    default_code = "invalid_campaign_state"
@@ -0,0 +1,42 @@
+# backend/core/domains/communications/management/commands/queue_test_emails.py
+import time
+
+from core.domains.communications.models import EmailRecord
+from core.domains.communications.services import EmailService
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Queue a burst of test emails, optionally draining the queue synchronously'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Number of emails to queue')
+        parser.add_argument('--domain', default='example.com', help='Recipient domain')
+        parser.add_argument('--deliver', action='store_true', help='Drain the queue synchronously afterwards')
+
+    def handle(self, *args, **options):
+        records = EmailService.queue_emails([
+            EmailRecord(
+                name='Load Test',
+                subject=f'Load test {i}',
+                body=f'<p>Load test message {i}</p>',
+                recipient_email=f"loadtest{i}@{options['domain']}"
+            )
+            for i in range(options['count'])
+        ])
+        self.stdout.write(self.style.SUCCESS(f"Queued {len(records)} emails"))
+
+        if options['deliver']:
+            started = time.monotonic()
+            while True:
+                claimed, retry_after = EmailService.deliver_scheduled()
+                if retry_after is not None:
+                    self.stdout.write(f"Rate limited, waiting {retry_after:.1f}s")
+                    time.sleep(retry_after)
+                elif not claimed:
+                    break
+            elapsed = time.monotonic() - started
+            sent = EmailRecord.objects.filter(pk__in=[record.pk for record in records], status='SENT').count()
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {sent} emails in {elapsed:.1f}s ({sent / max(elapsed, 0.001):.1f}/s)"
+            ))
@@ -0,0 +1,131 @@
+# backend/core/domains/communications/management/commands/smtp_sink.py
+import asyncio
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class SMTPSink:
+    """
+    Minimal SMTP server that accepts and discards mail.
+
+    Point the app at it with EMAIL_HOST=localhost EMAIL_PORT=<port> EMAIL_USE_SSL=false
+    to load-test the outbound email queue without touching a real provider.
+    """
+
+    def __init__(self, fail_rate=0.0, bounce_rate=0.0, latency=0.0, verbose=False, stdout=None):
+        self.fail_rate = fail_rate
+        self.bounce_rate = bounce_rate
+        self.latency = latency
+        self.verbose = verbose
+        self.stdout = stdout
+        self.connections = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        recipients = []
+
+        async def reply(line):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply('220 smtp-sink ready')
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                await reply('250-smtp-sink')
+                await reply('250-8BITMIME')
+                await reply('250 SMTPUTF8')
+            elif verb in ('HELO', 'NOOP'):
+                await reply('250 OK')
+            elif verb == 'MAIL':
+                recipients = []
+                await reply('250 OK')
+            elif verb == 'RCPT':
+                roll = random.random()
+                if roll < self.bounce_rate:
+                    self.rejected += 1
+                    await reply('550 No such user')
+                elif roll < self.bounce_rate + self.fail_rate:
+                    self.rejected += 1
+                    await reply('451 Try again later')
+                else:
+                    recipients.append(command[8:].strip())
+                    await reply('250 OK')
+            elif verb == 'DATA':
+                if not recipients:
+                    await reply('554 No valid recipients')
+                    continue
+                await reply('354 End data with <CR><LF>.<CR><LF>')
+                while (await reader.readline()) not in (b'.\r\n', b'.\n', b''):
+                    pass
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.accepted += 1
+                if self.verbose and self.stdout:
+                    self.stdout.write(f"Accepted message for {', '.join(recipients)}")
+                await reply('250 OK: queued')
+            elif verb == 'RSET':
+                recipients = []
+                await reply('250 OK')
+            elif verb == 'QUIT':
+                await reply('221 Bye')
+                break
+            else:
+                await reply('502 Command not implemented')
+
+        writer.close()
+
+    async def report(self, interval):
+        started = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{self.accepted} accepted ({self.accepted / elapsed:.1f}/s), "
+                f"{self.rejected} rejected, {self.connections} connections"
+            )
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP sink for load-testing outbound email offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+        parser.add_argument('--port', type=int, default=1025, help='Port to listen on')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of recipients rejected with 451')
+        parser.add_argument('--bounce-rate', type=float, default=0.0, help='Fraction of recipients rejected with 550')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before accepting each message')
+        parser.add_argument('--report-interval', type=float, default=10.0, help='Seconds between throughput reports')
+        parser.add_argument('--verbose', action='store_true', help='Log every accepted message')
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(
+            fail_rate=options['fail_rate'],
+            bounce_rate=options['bounce_rate'],
+            latency=options['latency'],
+            verbose=options['verbose'],
+            stdout=self.stdout
+        )
+
+        async def serve():
+            server = await asyncio.start_server(sink.handle, options['host'], options['port'])
+            self.stdout.write(self.style.SUCCESS(f"SMTP sink listening on {options['host']}:{options['port']}"))
+            asyncio.create_task(sink.report(options['report_interval']))
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS(
+                f"Stopped: {sink.accepted} accepted, {sink.rejected} rejected, {sink.connections} connections"
+            ))
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_email_delivery_queue'),
+        ('notifications', '0005_notification_delivery_channels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailrecord',
+            name='status',
+            field=models.CharField(choices=[('SENT', 'Sent'), ('FAILED', 'Failed'), ('SCHEDULED', 'Scheduled'), ('PAUSED', 'Paused'), ('CANCELLED', 'Cancelled')], default='SCHEDULED', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='EmailCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('name', models.CharField(max_length=200)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('context', models.JSONField(blank=True, default=dict, help_text='Extra variables shared by every recipient')),
+                ('recipient_filter', models.JSONField(blank=True, default=dict, help_text='Audience: role, is_active and/or ids')),
+                ('status', models.CharField(choices=[('DRAFT', 'Draft'), ('SENDING', 'Sending'), ('PAUSED', 'Paused'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], default='DRAFT', max_length=20)),
+                ('total_recipients', models.PositiveIntegerField(default=0)),
+                ('queued_count', models.PositiveIntegerField(default=0)),
+                ('last_recipient_id', models.BigIntegerField(default=0, help_text='Resume point of the recipient cursor')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('prepared_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_campaigns', to=settings.AUTH_USER_MODEL)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='campaigns', to='communications.emailtemplate')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='emailrecord',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='communications.emailcampaign'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(fields=['campaign', 'status'], name='emailrecord_campaign_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the email records table against writes
+    atomic = False
+
+    dependencies = [
+        ('communications', '0003_email_campaigns'),
+        ('notifications', '0005_notification_delivery_channels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailBody',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('digest', models.CharField(help_text='SHA-256 of the uncompressed content', max_length=64, unique=True)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='emailrecord',
+            name='body_context',
+            field=models.JSONField(blank=True, help_text='Merge variables when body_ref holds a template rather than the final body', null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailrecord',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='emailrecord',
+            name='body_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='records', to='communications.emailbody'),
+        ),
+        AddIndexConcurrently(
+            model_name='emailrecord',
+            index=models.Index(condition=models.Q(('body', ''), _negated=True), fields=['id'], name='emailrecord_inline_body_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:40
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+def prioritise_queued_campaign_emails(apps, schema_editor):
+    EmailRecord = apps.get_model('communications', 'EmailRecord')
+    EmailRecord.objects.filter(campaign__isnull=False, status__in=['SCHEDULED', 'PAUSED']).update(priority=10)
+
+
+class Migration(migrations.Migration):
+
+    # Swap the queue index without locking the email records table against writes
+    atomic = False
+
+    dependencies = [
+        ('communications', '0004_email_bodies'),
+        ('notifications', '0005_notification_delivery_channels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailrecord',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(prioritise_queued_campaign_emails, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='emailrecord',
+            index=models.Index(condition=models.Q(('status', 'SCHEDULED')), fields=['priority', 'next_attempt_at', 'id'], name='emailrecord_priority_queue_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='emailrecord',
+            name='emailrecord_queue_idx',
+        ),
+    ]
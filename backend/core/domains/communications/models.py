@@ -16,13 +16,65 @@ class EmailTemplate(BaseModel):
         return self.name
 
 
+class EmailCampaign(BaseModel):
+    """A template mailed to every user matching an audience filter"""
+    STATUS_CHOICES = (
+        ('DRAFT', 'Draft'),
+        ('SENDING', 'Sending'),
+        ('PAUSED', 'Paused'),
+        ('COMPLETED', 'Completed'),
+        ('CANCELLED', 'Cancelled'),
+    )
+    AUDIENCE_FILTERS = ('role', 'is_active', 'ids')
+    
+    name = models.CharField(max_length=200)
+    template = models.ForeignKey(EmailTemplate, on_delete=models.PROTECT, related_name='campaigns')
+    # Copied from the template when the campaign starts so edits mid-send don't mix versions
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    context = models.JSONField(default=dict, blank=True, help_text="Extra variables shared by every recipient")
+    recipient_filter = models.JSONField(
+        default=dict, blank=True, help_text="Audience: role, is_active and/or ids"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='email_campaigns')
+    
+    # Progress of queueing; per-recipient delivery state lives on the EmailRecords
+    total_recipients = models.PositiveIntegerField(default=0)
+    queued_count = models.PositiveIntegerField(default=0)
+    last_recipient_id = models.BigIntegerField(default=0, help_text="Resume point of the recipient cursor")
+    started_at = models.DateTimeField(null=True, blank=True)
+    prepared_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class EmailBody(BaseModel):
+    """Compressed email body shared by every record with the same content"""
+    digest = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the uncompressed content")
+    content = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
+
 class EmailRecord(BaseModel):
-    """Record of emails sent through the system"""
+    """Record of emails sent through the system, doubling as the outbound mail queue"""
     name = models.CharField(max_length=100)
     subject = models.CharField(max_length=200)
-    body = models.TextField()
+    # Inline body, moved to body_ref when the record is queued or compacted
+    body = models.TextField(blank=True)
+    body_ref = models.ForeignKey(
+        EmailBody, on_delete=models.PROTECT, null=True, blank=True, related_name='records'
+    )
+    body_context = models.JSONField(
+        null=True, blank=True, help_text="Merge variables when body_ref holds a template rather than the final body"
+    )
     attachments = models.JSONField(default=list, blank=True)
-    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_records')
+    client = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='email_records')
     event = models.CharField(max_length=100, null=True, blank=True)  # Can be null
     sent_at = models.DateTimeField(null=True, blank=True)
     sent_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='sent_emails')
@@ -30,8 +82,39 @@ class EmailRecord(BaseModel):
         ('SENT', 'Sent'),
         ('FAILED', 'Failed'),
         ('SCHEDULED', 'Scheduled'),
+        ('PAUSED', 'Paused'),
+        ('CANCELLED', 'Cancelled'),
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='SCHEDULED')
+    
+    # Delivery
+    recipient_email = models.EmailField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    is_html = models.BooleanField(default=True)
+    notification = models.ForeignKey(
+        'notifications.Notification', on_delete=models.SET_NULL, null=True, blank=True, related_name='email_records'
+    )
+    campaign = models.ForeignKey(
+        EmailCampaign, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails'
+    )
+    # Due emails are sent lowest priority first, so campaigns never hold up transactional mail
+    PRIORITY_TRANSACTIONAL = 0
+    PRIORITY_CAMPAIGN = 10
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_TRANSACTIONAL)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['priority', 'next_attempt_at', 'id'],
+                condition=models.Q(status='SCHEDULED'),
+                name='emailrecord_priority_queue_idx'
+            ),
+            models.Index(fields=['campaign', 'status'], name='emailrecord_campaign_idx'),
+            models.Index(fields=['id'], condition=~models.Q(body=''), name='emailrecord_inline_body_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.name} to {self.client.email} - {self.status}"
\ No newline at end of file
+        return f"{self.name} to {self.recipient_email or (self.client and self.client.email)} - {self.status}"
@@ -1,7 +1,13 @@
 # backend/core/domains/communications/serializers.py
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from .models import EmailRecord, EmailTemplate
+from . import bodies
+from .attachments import AttachmentError, validate_reference
+from .bodies import BodyRenderError
+from .models import EmailCampaign, EmailRecord, EmailTemplate
+
+User = get_user_model()
 
 
 class EmailTemplateSerializer(serializers.ModelSerializer):
@@ -19,23 +25,85 @@ class EmailTemplateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("An email template with this name already exists.")
         return value
 
+    def validate_attachments(self, value):
+        """Check every attachment is a {'type', 'id'} reference to a stored file type"""
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Attachments must be a list.")
+        for reference in value:
+            try:
+                validate_reference(reference)
+            except AttachmentError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
 
 class EmailRecordSerializer(serializers.ModelSerializer):
-    """Serializer for email records"""
+    """Serializer for email history listings, without the body"""
     client_email = serializers.EmailField(source='client.email', read_only=True)
     sent_by_name = serializers.CharField(source='sent_by.get_full_name', read_only=True)
     
     class Meta:
         model = EmailRecord
         fields = [
-            'id', 'name', 'subject', 'body', 'attachments', 
+            'id', 'name', 'subject', 'attachments', 
             'client', 'client_email', 'event', 'sent_at', 
             'sent_by', 'sent_by_name', 'status', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
 
+class EmailRecordDetailSerializer(EmailRecordSerializer):
+    """Serializer for a single email record, including its body"""
+    body = serializers.SerializerMethodField()
+    
+    class Meta(EmailRecordSerializer.Meta):
+        fields = EmailRecordSerializer.Meta.fields + ['body', 'recipient_email', 'attempts', 'last_error']
+    
+    def get_body(self, obj):
+        try:
+            return bodies.render(obj)
+        except BodyRenderError:
+            return ''
+
+
 class PreviewEmailTemplateSerializer(serializers.Serializer):
     """Serializer for previewing email templates with sample data"""
     template_id = serializers.IntegerField()
-    context_data = serializers.JSONField(required=False, default=dict)
\ No newline at end of file
+    context_data = serializers.JSONField(required=False, default=dict)
+
+
+class CampaignAudienceSerializer(serializers.Serializer):
+    """Serializer for a campaign's recipient filter"""
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    is_active = serializers.BooleanField(required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+
+class EmailCampaignSerializer(serializers.ModelSerializer):
+    """Serializer for email campaigns"""
+    template_name = serializers.CharField(source='template.name', read_only=True)
+    
+    class Meta:
+        model = EmailCampaign
+        fields = [
+            'id', 'name', 'template', 'template_name', 'context', 'recipient_filter', 'status',
+            'total_recipients', 'queued_count', 'started_at', 'prepared_at', 'completed_at',
+            'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'status', 'total_recipients', 'queued_count', 'started_at', 'prepared_at',
+            'completed_at', 'created_by', 'created_at', 'updated_at'
+        ]
+    
+    def validate_recipient_filter(self, value):
+        if not value:
+            return {}
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Expected an object of filters.")
+        unknown = set(value) - set(EmailCampaign.AUDIENCE_FILTERS)
+        if unknown:
+            raise serializers.ValidationError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+        audience = CampaignAudienceSerializer(data=value)
+        if not audience.is_valid():
+            raise serializers.ValidationError(audience.errors)
+        return dict(audience.validated_data)
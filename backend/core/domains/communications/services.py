@@ -1,17 +1,40 @@
 # backend/core/domains/communications/services.py
+import json
 import logging
+import smtplib
+from datetime import timedelta
 
+from core.utils.ratelimit import RateLimiter
+from core.utils.templates import compiled_templates, render_field
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.template import Context, Template
 from django.template.exceptions import TemplateSyntaxError
 from django.utils import timezone
+from django.utils.html import strip_tags
 
-from .exceptions import InvalidTemplateFormat, TemplateNameExists, TemplateNotFound
-from .models import EmailRecord, EmailTemplate
+from . import attachments as attachments_module
+from . import bodies
+from .attachments import AttachmentError
+from .bodies import BodyRenderError
+from .exceptions import (
+    CampaignNotFound,
+    InvalidCampaignState,
+    InvalidTemplateFormat,
+    TemplateNameExists,
+    TemplateNotFound,
+)
+from .models import EmailBody, EmailCampaign, EmailRecord, EmailTemplate
 
 logger = logging.getLogger(__name__)
 
+User = get_user_model()
+
 class EmailTemplateService:
     """Service for managing email templates"""
     
@@ -97,11 +120,8 @@ class EmailTemplateService:
             context_data = {}
         
         try:
-            django_template = Template(template.body)
-            rendered_body = django_template.render(Context(context_data))
-            
-            django_subject_template = Template(template.subject)
-            rendered_subject = django_subject_template.render(Context(context_data))
+            rendered_body = render_field(template, 'body', context_data)
+            rendered_subject = render_field(template, 'subject', context_data)
             
             return {
                 'subject': rendered_subject,
@@ -115,6 +135,8 @@ class EmailTemplateService:
 class EmailService:
     """Service for handling email operations"""
     
+    DELIVERY_SCHEDULED_KEY = 'communications:email-delivery-scheduled'
+    
     @staticmethod
     def get_template(template_name):
         """Get an email template by name"""
@@ -130,14 +152,11 @@ class EmailService:
         if not template:
             return None, None
             
-        # Render subject and body
-        subject_template = Template(template.subject)
-        body_template = Template(template.body)
-        
         try:
+            # Render subject and body from the compiled template cache
             ctx = Context(context_data)
-            subject = subject_template.render(ctx)
-            body = body_template.render(ctx)
+            subject = render_field(template, 'subject', ctx)
+            body = render_field(template, 'body', ctx)
             return subject, body
         except Exception as e:
             logger.error(f"Error rendering template: {str(e)}")
@@ -147,7 +166,10 @@ class EmailService:
     def send_email(template_name, recipient, context_data, sender=None, attachments=None, 
                    event=None, user=None, is_html=True):
         """
-        Send an email using a template
+        Queue an email using a template
+        
+        The email is rendered and stored as a SCHEDULED EmailRecord; a background
+        worker delivers it after the current transaction commits.
         
         Args:
             template_name: Name of the email template
@@ -160,7 +182,7 @@ class EmailService:
             is_html: Whether the email body is HTML (default True)
             
         Returns:
-            EmailRecord instance if successful, None otherwise
+            EmailRecord instance if queued, None otherwise
         """
         # Get template
         template = EmailService.get_template(template_name)
@@ -172,48 +194,536 @@ class EmailService:
         if not subject or not body:
             return None
         
-        # Prepare email
-        from_email = sender or settings.DEFAULT_FROM_EMAIL
-        
-        # Create email record
-        email_record = EmailRecord.objects.create(
-            name=template_name,
-            subject=subject,
-            body=body,
-            attachments=template.attachments if attachments is None else attachments,
-            client=context_data.get('user') if 'user' in context_data else None,
-            event=event,
-            sent_by=user,
-            status='SCHEDULED'
-        )
+        return EmailService.queue_emails([
+            EmailRecord(
+                name=template_name,
+                subject=subject,
+                body=body,
+                attachments=template.attachments if attachments is None else attachments,
+                client=context_data.get('user') if 'user' in context_data else None,
+                event=event,
+                sent_by=user,
+                recipient_email=recipient,
+                from_email=sender or '',
+                is_html=is_html
+            )
+        ])[0]
+    
+    @staticmethod
+    def queue_notification_emails(notifications, subject, body):
+        """Queue an already rendered notification email for each notification"""
+        return EmailService.queue_emails([
+            EmailRecord(
+                name=notification.notification_type.code,
+                subject=subject,
+                body=body,
+                client=notification.recipient,
+                recipient_email=notification.recipient.email,
+                notification=notification
+            )
+            for notification in notifications
+        ])
+    
+    @staticmethod
+    def queue_emails(records, workers=1):
+        """
+        Store unsaved EmailRecords as SCHEDULED and wake the delivery worker(s) on commit
+        
+        Rendered bodies go to the shared EmailBody table, so a body sent to many
+        recipients is stored once.
+        """
+        for record in records:
+            record.status = 'SCHEDULED'
+        bodies.compact(records)
+        records = EmailRecord.objects.bulk_create(records)
+        if records:
+            transaction.on_commit(lambda: EmailService.schedule_delivery(workers))
+        return records
+    
+    @staticmethod
+    def schedule_delivery(workers=1):
+        """
+        Queue delivery runs, coalescing bursts into one wake-up per batch window
+        
+        With workers > 1 several runs drain the queue in parallel, each over its own
+        SMTP connection; SKIP LOCKED claims keep them from sending the same email.
+        """
+        from .tasks import deliver_scheduled_emails
         
-        # Send email
+        delay = getattr(settings, 'EMAIL_QUEUE_BATCH_DELAY', 1)
         try:
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=body if not is_html else None,
-                from_email=from_email,
-                to=[recipient]
+            if cache.add(EmailService.DELIVERY_SCHEDULED_KEY, 1, timeout=delay):
+                for _ in range(workers):
+                    deliver_scheduled_emails.apply_async(countdown=delay)
+        except Exception as e:
+            # The record is already stored; the periodic sweep will pick it up
+            logger.error(f"Could not schedule email delivery: {str(e)}")
+    
+    @staticmethod
+    def retry_delay(attempts):
+        """Exponential backoff before the next attempt, in seconds"""
+        base = getattr(settings, 'EMAIL_RETRY_BASE_DELAY', 60)
+        cap = getattr(settings, 'EMAIL_RETRY_MAX_DELAY', 60 * 60 * 6)
+        return min(base * 2 ** max(attempts - 1, 0), cap)
+    
+    @staticmethod
+    def is_permanent_failure(error):
+        """Whether retrying a failed send cannot succeed (every recipient rejected with 5xx, missing attachment, bad template)"""
+        if isinstance(error, (AttachmentError, BodyRenderError)):
+            return True
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code >= 500 for code, _ in error.recipients.values())
+        return False
+    
+    @staticmethod
+    def build_message(record, connection):
+        """Build the outgoing message for a queued record"""
+        body = bodies.render(record)
+        email = EmailMultiAlternatives(
+            subject=record.subject,
+            body=strip_tags(body) if record.is_html else body,
+            from_email=record.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=[record.recipient_email],
+            connection=connection
+        )
+        if record.is_html:
+            email.attach_alternative(body, "text/html")
+        return email
+    
+    @staticmethod
+    def send_record(record, connection, resolved=None):
+        """
+        Send a queued record, attaching the files its attachment references point to
+        
+        Over SMTP the attachments are streamed from their cached encodings, so worker
+        memory stays flat whatever their size. `resolved` memoises references across
+        a batch, e.g. the many recipients of one campaign.
+        """
+        message = EmailService.build_message(record, connection)
+        if not record.attachments:
+            return message.send()
+        
+        resolved = {} if resolved is None else resolved
+        attachments = []
+        for reference in record.attachments:
+            key = json.dumps(reference, sort_keys=True)
+            if key not in resolved:
+                attachment = attachments_module.resolve(reference)
+                resolved[key] = (attachment, attachments_module.encoded_attachments.path(attachment))
+            attachments.append(resolved[key])
+        
+        if isinstance(connection, SMTPEmailBackend):
+            connection.open()
+            attachments_module.send_streaming(connection, message, attachments)
+            return 1
+        
+        # Other backends (console, locmem, file) need the content in memory
+        for attachment, _ in attachments:
+            with attachment.file.open('rb') as source:
+                message.attach(attachment.filename, source.read(), attachment.mimetype)
+        return message.send()
+    
+    @staticmethod
+    def claim_scheduled(batch_size):
+        """
+        Claim a batch of due emails for this worker.
+        
+        Rows are locked with SKIP LOCKED only long enough to push their next_attempt_at
+        out by EMAIL_QUEUE_LEASE seconds, so SMTP traffic never happens inside a
+        transaction and a crashed worker's emails become due again once the lease ends.
+        """
+        now = timezone.now()
+        lease = timedelta(seconds=getattr(settings, 'EMAIL_QUEUE_LEASE', 300))
+        with transaction.atomic():
+            records = list(
+                EmailRecord.objects.select_for_update(skip_locked=True)
+                .filter(status='SCHEDULED')
+                .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+                .exclude(recipient_email='')
+                .order_by('priority', 'next_attempt_at', 'id')[:batch_size]
             )
+            if records:
+                EmailRecord.objects.filter(pk__in=[record.pk for record in records]).update(
+                    next_attempt_at=now + lease
+                )
+        return records
+    
+    @staticmethod
+    def deliver_scheduled(batch_size=100):
+        """
+        Deliver one batch of queued emails over a single SMTP connection.
+        
+        Each email is retried on its own with exponential backoff up to
+        EMAIL_MAX_ATTEMPTS. Sending stops early when the shared EMAIL_RATE_LIMIT
+        quota is used up; the remaining emails are pushed to the next window.
+        Campaign emails also draw on EMAIL_CAMPAIGN_RATE_LIMIT, which leaves the
+        rest of the shared quota to transactional mail.
+        
+        Returns:
+            Tuple of (emails claimed, seconds until the rate limit resets or None)
+        """
+        from core.domains.notifications.models import Notification
+        
+        records = EmailService.claim_scheduled(batch_size)
+        if not records:
+            return 0, None
+        
+        period = getattr(settings, 'EMAIL_RATE_LIMIT_PERIOD', 60)
+        limiter = RateLimiter('email', getattr(settings, 'EMAIL_RATE_LIMIT', 0), period)
+        campaign_limiter = RateLimiter('email:campaign', getattr(settings, 'EMAIL_CAMPAIGN_RATE_LIMIT', 0), period)
+        max_attempts = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5)
+        retry_after = None
+        
+        bodies.prefetch(records)
+        resolved = {}
+        with get_connection() as connection:
+            for record in records:
+                now = timezone.now()
+                record.updated_at = now
+                if retry_after is None:
+                    for quota in ((campaign_limiter, limiter) if record.campaign_id else (limiter,)):
+                        if not quota.acquire():
+                            retry_after = quota.retry_after()
+                            break
+                if retry_after is not None:
+                    # Out of quota: try again when the window resets, without using an attempt.
+                    # Batches are claimed in priority order, so only campaign emails follow one
+                    # deferred by the campaign budget.
+                    record.next_attempt_at = now + timedelta(seconds=retry_after)
+                    continue
+                
+                record.attempts += 1
+                try:
+                    EmailService.send_record(record, connection, resolved)
+                except Exception as e:
+                    logger.error(f"Error sending email {record.id} to {record.recipient_email}: {str(e)}")
+                    record.last_error = str(e)
+                    if EmailService.is_permanent_failure(e) or record.attempts >= max_attempts:
+                        record.status = 'FAILED'
+                        record.next_attempt_at = None
+                    else:
+                        record.next_attempt_at = now + timedelta(seconds=EmailService.retry_delay(record.attempts))
+                    if isinstance(e, smtplib.SMTPServerDisconnected):
+                        # Reconnect for the rest of the batch
+                        connection.close()
+                    continue
+                
+                record.status = 'SENT'
+                record.sent_at = now
+                record.next_attempt_at = None
+                record.last_error = ''
+        
+        EmailRecord.objects.bulk_update(
+            records, ['status', 'sent_at', 'attempts', 'next_attempt_at', 'last_error', 'updated_at']
+        )
+        
+        emailed = [record.notification_id for record in records if record.status == 'SENT' and record.notification_id]
+        if emailed:
+            Notification.objects.filter(pk__in=emailed).update(is_emailed=True, emailed_at=timezone.now())
+        
+        finished = {record.campaign_id for record in records if record.campaign_id and record.status != 'SCHEDULED'}
+        if finished:
+            EmailCampaignService.complete_finished(finished)
+        
+        return len(records), retry_after
+    
+    @staticmethod
+    def compact_records(batch_size=1000):
+        """
+        Move one batch of inline record bodies, e.g. from before shared storage, to EmailBody
+        
+        Returns:
+            Number of records compacted
+        """
+        with transaction.atomic():
+            records = list(
+                EmailRecord.objects.select_for_update(skip_locked=True)
+                .exclude(body='')
+                .order_by('id')
+                .only('id', 'body', 'body_ref')[:batch_size]
+            )
+            bodies.compact(records)
+            EmailRecord.objects.bulk_update(records, ['body', 'body_ref'])
+        return len(records)
+    
+    @staticmethod
+    def purge_records(days, batch_size=1000):
+        """Delete one batch of sent, failed or cancelled records created more than `days` ago"""
+        ids = list(
+            EmailRecord.objects.filter(
+                status__in=('SENT', 'FAILED', 'CANCELLED'), created_at__lt=timezone.now() - timedelta(days=days)
+            )
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            EmailRecord.objects.filter(pk__in=ids).delete()
+        return len(ids)
+    
+    @staticmethod
+    def purge_bodies(days, batch_size=1000):
+        """
+        Delete one batch of shared bodies no record uses and nothing has stored for `days`
+        
+        Bodies a new record is being attached to are locked, or were just touched by
+        bodies.store, so they are skipped.
+        """
+        table = connection.ops.quote_name(EmailBody._meta.db_table)
+        record_table = connection.ops.quote_name(EmailRecord._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN ("
+                f"SELECT body.id FROM {table} body WHERE body.updated_at < %s "
+                f"AND NOT EXISTS (SELECT 1 FROM {record_table} record WHERE record.body_ref_id = body.id) "
+                f"LIMIT %s FOR UPDATE SKIP LOCKED)",
+                [timezone.now() - timedelta(days=days), batch_size]
+            )
+            return cursor.rowcount
+
+
+class EmailCampaignService:
+    """Service for mail-merge campaigns"""
+    
+    @staticmethod
+    def get_campaign(campaign_id, lock=False):
+        """Get a campaign by ID, optionally locking its row"""
+        queryset = EmailCampaign.objects.select_for_update() if lock else EmailCampaign.objects
+        try:
+            return queryset.select_related('template').get(pk=campaign_id)
+        except EmailCampaign.DoesNotExist:
+            raise CampaignNotFound()
+    
+    @staticmethod
+    def get_recipients(campaign):
+        """Users the campaign is sent to, in ID order (active users with an email address by default)"""
+        recipient_filter = campaign.recipient_filter or {}
+        queryset = User.objects.exclude(email='').filter(is_active=recipient_filter.get('is_active', True))
+        if recipient_filter.get('role'):
+            queryset = queryset.filter(role=recipient_filter['role'])
+        if recipient_filter.get('ids'):
+            queryset = queryset.filter(pk__in=recipient_filter['ids'])
+        return queryset.order_by('id')
+    
+    @staticmethod
+    def start(campaign_id):
+        """Freeze the template, count the audience and start queueing emails"""
+        from .tasks import prepare_email_campaign
+        
+        with transaction.atomic():
+            campaign = EmailCampaignService.get_campaign(campaign_id, lock=True)
+            if campaign.status != 'DRAFT':
+                raise InvalidCampaignState(detail="Only draft campaigns can be started.")
             
-            if is_html:
-                email.attach_alternative(body, "text/html")
-            
-            # Add attachments
-            # This would need to be implemented based on how attachments are stored
-            
-            # Send email
-            email.send()
-            
-            # Update record
-            email_record.status = 'SENT'
-            email_record.sent_at = timezone.now()
-            email_record.save()
-            
-            return email_record
+            try:
+                Template(campaign.template.subject)
+                Template(campaign.template.body)
+            except TemplateSyntaxError as e:
+                raise InvalidTemplateFormat(detail=f"Template syntax error: {str(e)}")
             
-        except Exception as e:
-            logger.error(f"Error sending email: {str(e)}")
-            email_record.status = 'FAILED'
-            email_record.save()
-            return None
\ No newline at end of file
+            campaign.subject = campaign.template.subject
+            campaign.body = campaign.template.body
+            campaign.total_recipients = EmailCampaignService.get_recipients(campaign).count()
+            campaign.status = 'SENDING'
+            campaign.started_at = timezone.now()
+            campaign.save()
+            transaction.on_commit(lambda: prepare_email_campaign.delay(campaign.id))
+            return campaign
+    
+    @staticmethod
+    def prepare(campaign_id):
+        """
+        Render and queue a sending campaign's emails from where it left off
+        
+        Recipients are streamed from a server-side cursor and processed in chunks of
+        EMAIL_CAMPAIGN_CHUNK_SIZE: each chunk's subjects are rendered against the
+        once-compiled template and inserted in one query, then the cursor position is
+        saved so a paused or interrupted campaign resumes without duplicates. Bodies
+        are not rendered per recipient: every record points at the campaign's shared
+        body template and keeps only its merge variables, and the worker renders it
+        at send time. A recipient whose subject fails to render is recorded as a
+        FAILED EmailRecord.
+        
+        Returns:
+            Number of recipients processed
+        """
+        campaign = EmailCampaignService.get_campaign(campaign_id)
+        if campaign.status != 'SENDING' or campaign.prepared_at:
+            return 0
+        
+        chunk_size = getattr(settings, 'EMAIL_CAMPAIGN_CHUNK_SIZE', 500)
+        workers = getattr(settings, 'EMAIL_CAMPAIGN_WORKERS', 4)
+        subject_template = compiled_templates.get(campaign, 'subject')
+        body_id = bodies.store([campaign.body])[campaign.body]
+        context = Context(campaign.context or {})
+        
+        recipients = (
+            EmailCampaignService.get_recipients(campaign)
+            .filter(pk__gt=campaign.last_recipient_id)
+            .only('id', 'email', 'first_name', 'last_name')
+            .iterator(chunk_size=chunk_size)
+        )
+        position = campaign.last_recipient_id
+        processed = 0
+        chunk = []
+        for recipient in recipients:
+            chunk.append(recipient)
+            if len(chunk) < chunk_size:
+                continue
+            if not EmailCampaignService._queue_chunk(campaign, chunk, position, subject_template, body_id, context, workers):
+                return processed
+            processed += len(chunk)
+            position = chunk[-1].id
+            chunk = []
+        
+        if chunk:
+            if not EmailCampaignService._queue_chunk(campaign, chunk, position, subject_template, body_id, context, workers):
+                return processed
+            processed += len(chunk)
+        
+        EmailCampaign.objects.filter(pk=campaign.pk, status='SENDING').update(
+            prepared_at=timezone.now(), updated_at=timezone.now()
+        )
+        # Every email may already have been delivered while later chunks were queued
+        EmailCampaignService.complete_finished([campaign.pk])
+        return processed
+    
+    @staticmethod
+    def _queue_chunk(campaign, recipients, position, subject_template, body_id, context, workers):
+        """
+        Render and queue one chunk of recipients
+        
+        Returns False, queueing nothing, when the campaign was paused or cancelled or
+        another run has already moved past this position.
+        """
+        records = []
+        failed = []
+        for recipient in recipients:
+            record = EmailRecord(
+                name=campaign.name[:100],
+                client=recipient,
+                recipient_email=recipient.email,
+                campaign=campaign,
+                priority=EmailRecord.PRIORITY_CAMPAIGN,
+                attachments=campaign.template.attachments,
+                sent_by=campaign.created_by
+            )
+            merge = {'email': recipient.email, 'first_name': recipient.first_name, 'last_name': recipient.last_name}
+            with context.push(user=recipient, **merge):
+                try:
+                    record.subject = subject_template.render(context).strip()[:200]
+                except Exception as e:
+                    logger.error(f"Error rendering campaign {campaign.id} for {recipient.email}: {str(e)}")
+                    record.status = 'FAILED'
+                    record.last_error = f"Render error: {str(e)}"
+                    failed.append(record)
+                    continue
+            record.body_ref_id = body_id
+            record.body_context = {**(campaign.context or {}), **merge}
+            records.append(record)
+        
+        with transaction.atomic():
+            # Serialises with pause/cancel and with any other run of this campaign
+            current = EmailCampaign.objects.select_for_update().filter(pk=campaign.pk).values(
+                'status', 'last_recipient_id'
+            ).first()
+            if not current or current['status'] != 'SENDING' or current['last_recipient_id'] != position:
+                return False
+            EmailService.queue_emails(records, workers)
+            EmailRecord.objects.bulk_create(failed)
+            EmailCampaign.objects.filter(pk=campaign.pk).update(
+                queued_count=F('queued_count') + len(recipients),
+                last_recipient_id=recipients[-1].id,
+                updated_at=timezone.now()
+            )
+        return True
+    
+    @staticmethod
+    def pause(campaign_id):
+        """Stop queueing and hold the campaign's unsent emails; emails already being sent finish"""
+        with transaction.atomic():
+            campaign = EmailCampaignService.get_campaign(campaign_id, lock=True)
+            if campaign.status != 'SENDING':
+                raise InvalidCampaignState(detail="Only sending campaigns can be paused.")
+            campaign.status = 'PAUSED'
+            campaign.save()
+            EmailRecord.objects.filter(campaign=campaign, status='SCHEDULED').update(
+                status='PAUSED', updated_at=timezone.now()
+            )
+            return campaign
+    
+    @staticmethod
+    def resume(campaign_id):
+        """Release held emails and continue queueing where the campaign stopped"""
+        from .tasks import prepare_email_campaign
+        
+        with transaction.atomic():
+            campaign = EmailCampaignService.get_campaign(campaign_id, lock=True)
+            if campaign.status != 'PAUSED':
+                raise InvalidCampaignState(detail="Only paused campaigns can be resumed.")
+            campaign.status = 'SENDING'
+            campaign.save()
+            resumed = EmailRecord.objects.filter(campaign=campaign, status='PAUSED').update(
+                status='SCHEDULED', updated_at=timezone.now()
+            )
+            workers = getattr(settings, 'EMAIL_CAMPAIGN_WORKERS', 4)
+            if resumed:
+                transaction.on_commit(lambda: EmailService.schedule_delivery(workers))
+            if not campaign.prepared_at:
+                transaction.on_commit(lambda: prepare_email_campaign.delay(campaign.id))
+            return campaign
+    
+    @staticmethod
+    def cancel(campaign_id):
+        """Stop the campaign for good, cancelling every email not yet sent"""
+        with transaction.atomic():
+            campaign = EmailCampaignService.get_campaign(campaign_id, lock=True)
+            if campaign.status in ('COMPLETED', 'CANCELLED'):
+                raise InvalidCampaignState(detail="The campaign has already finished.")
+            campaign.status = 'CANCELLED'
+            campaign.completed_at = timezone.now()
+            campaign.save()
+            EmailRecord.objects.filter(campaign=campaign, status__in=['SCHEDULED', 'PAUSED']).update(
+                status='CANCELLED', next_attempt_at=None, updated_at=timezone.now()
+            )
+            return campaign
+    
+    @staticmethod
+    def complete_finished(campaign_ids):
+        """
+        Mark sending campaigns COMPLETED once every recipient is queued and no email is
+        waiting for delivery
+        
+        Called by whichever of queueing and delivery finishes last.
+        
+        Returns:
+            Number of campaigns completed
+        """
+        waiting = EmailRecord.objects.filter(campaign=OuterRef('pk'), status__in=['SCHEDULED', 'PAUSED'])
+        now = timezone.now()
+        return (
+            EmailCampaign.objects.filter(pk__in=campaign_ids, status='SENDING', prepared_at__isnull=False)
+            .exclude(Exists(waiting))
+            .update(status='COMPLETED', completed_at=now, updated_at=now)
+        )
+    
+    @staticmethod
+    def get_progress(campaign):
+        """Per-status email counts for a campaign"""
+        counts = dict(
+            EmailRecord.objects.filter(campaign=campaign)
+            .values('status')
+            .annotate(count=Count('id'))
+            .order_by()
+            .values_list('status', 'count')
+        )
+        
+        return {
+            'status': campaign.status,
+            'total_recipients': campaign.total_recipients,
+            'queued': campaign.queued_count,
+            'sent': counts.get('SENT', 0),
+            'failed': counts.get('FAILED', 0),
+            'pending': counts.get('SCHEDULED', 0),
+            'paused': counts.get('PAUSED', 0),
+            'cancelled': counts.get('CANCELLED', 0),
+        }
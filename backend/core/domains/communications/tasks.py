@@ -0,0 +1,88 @@
+# backend/core/domains/communications/tasks.py
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def deliver_scheduled_emails(batch_size=None):
+    """Drain the outbound email queue in batches"""
+    from core.domains.communications.services import EmailService
+
+    batch_size = batch_size or getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 100)
+    claimed, retry_after = EmailService.deliver_scheduled(batch_size)
+
+    if retry_after is not None:
+        # Rate limited: pick up again when the quota window resets
+        deliver_scheduled_emails.apply_async((batch_size,), countdown=retry_after)
+    elif claimed >= batch_size:
+        # A full batch means more emails are probably waiting
+        deliver_scheduled_emails.delay(batch_size)
+
+    if claimed:
+        logger.info(f"Processed {claimed} queued emails")
+    return claimed
+
+
+@shared_task
+def prepare_email_campaign(campaign_id):
+    """Render and queue a campaign's emails"""
+    from core.domains.communications.services import EmailCampaignService
+
+    processed = EmailCampaignService.prepare(campaign_id)
+    logger.info(f"Queued {processed} emails for campaign {campaign_id}")
+    return processed
+
+
+@shared_task
+def resume_stalled_campaigns(minutes=5):
+    """Restart queueing for sending campaigns whose preparation stopped making progress"""
+    from datetime import timedelta
+
+    from core.domains.communications.models import EmailCampaign
+    from django.utils import timezone
+
+    stalled = EmailCampaign.objects.filter(
+        status='SENDING',
+        prepared_at__isnull=True,
+        updated_at__lt=timezone.now() - timedelta(minutes=minutes)
+    ).values_list('id', flat=True)
+    for campaign_id in stalled:
+        prepare_email_campaign.delay(campaign_id)
+
+
+@shared_task
+def archive_email_records(batch_size=None):
+    """Compact inline email bodies, apply EMAIL_RECORD_RETENTION_DAYS and purge unused bodies"""
+    from core.domains.communications.services import EmailService
+
+    batch_size = batch_size or getattr(settings, 'EMAIL_ARCHIVE_BATCH_SIZE', 1000)
+    compacted = 0
+    while True:
+        changed = EmailService.compact_records(batch_size)
+        compacted += changed
+        if changed < batch_size:
+            break
+
+    purged = 0
+    days = getattr(settings, 'EMAIL_RECORD_RETENTION_DAYS', None)
+    if days is not None:
+        while True:
+            deleted = EmailService.purge_records(days, batch_size)
+            purged += deleted
+            if deleted < batch_size:
+                break
+
+    bodies = 0
+    while True:
+        deleted = EmailService.purge_bodies(getattr(settings, 'EMAIL_BODY_PURGE_DAYS', 7), batch_size)
+        bodies += deleted
+        if deleted < batch_size:
+            break
+
+    if compacted or purged or bodies:
+        logger.info(f"Compacted {compacted} email records, purged {purged} records and {bodies} unused bodies")
+    return compacted
@@ -0,0 +1,321 @@
+# backend/core/domains/communications/tests.py
+import email
+import os
+import smtplib
+import tempfile
+from datetime import timedelta
+
+from core.utils.testing import LOCMEM_CACHE
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import bodies
+from .attachments import AttachmentError, EncodedAttachmentCache, ResolvedAttachment, iter_message, validate_reference
+from .exceptions import InvalidCampaignState
+from .models import EmailBody, EmailCampaign, EmailRecord, EmailTemplate
+from .services import EmailCampaignService, EmailService
+
+User = get_user_model()
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """Test backend that refuses some recipients the way an SMTP server would"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            recipient = message.to[0]
+            if recipient.startswith('bounce'):
+                raise smtplib.SMTPRecipientsRefused({recipient: (550, b'No such user')})
+            if recipient.startswith('busy'):
+                raise smtplib.SMTPRecipientsRefused({recipient: (451, b'Try again later')})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    EMAIL_BACKEND='core.domains.communications.tests.FlakyEmailBackend',
+    EMAIL_RATE_LIMIT=0,
+    EMAIL_MAX_ATTEMPTS=3,
+    EMAIL_RETRY_BASE_DELAY=60
+)
+class EmailQueueTests(TestCase):
+    """Test the outbound email queue"""
+
+    def setUp(self):
+        EmailTemplate.objects.create(
+            name='Welcome',
+            subject='Welcome {{ first_name }}',
+            body='<p>Hello {{ first_name }}</p>'
+        )
+
+    def queue(self, *recipients):
+        return EmailService.queue_emails([
+            EmailRecord(name='Test', subject='Subject', body='<p>Body</p>', recipient_email=recipient)
+            for recipient in recipients
+        ])
+
+    def test_send_email_queues_without_sending(self):
+        """Test that send_email stores a scheduled record and leaves SMTP to the worker"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            record = EmailService.send_email('Welcome', 'new@example.com', {'first_name': 'Ada'})
+
+        self.assertEqual(record.status, 'SCHEDULED')
+        self.assertEqual(record.subject, 'Welcome Ada')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        claimed, retry_after = EmailService.deliver_scheduled()
+
+        self.assertEqual((claimed, retry_after), (1, None))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'SENT')
+        self.assertEqual(record.attempts, 1)
+        self.assertIsNotNone(record.sent_at)
+
+    def test_failures_are_retried_per_recipient(self):
+        """Test that a temporary refusal backs off while the rest of the batch is sent"""
+        ok, busy, bounce = self.queue('ok@example.com', 'busy@example.com', 'bounce@example.com')
+
+        EmailService.deliver_scheduled()
+
+        ok.refresh_from_db()
+        busy.refresh_from_db()
+        bounce.refresh_from_db()
+        self.assertEqual(ok.status, 'SENT')
+        self.assertEqual(bounce.status, 'FAILED')
+        self.assertEqual(busy.status, 'SCHEDULED')
+        self.assertEqual(busy.attempts, 1)
+        self.assertIn('Try again later', busy.last_error)
+        self.assertGreater(busy.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(EmailService.deliver_scheduled(), (0, None))
+
+        # Backoff doubles with every attempt and the record fails after the last one
+        self.assertEqual(EmailService.retry_delay(2), 120)
+        for _ in range(2):
+            EmailRecord.objects.filter(pk=busy.pk).update(next_attempt_at=timezone.now())
+            EmailService.deliver_scheduled()
+        busy.refresh_from_db()
+        self.assertEqual(busy.attempts, 3)
+        self.assertEqual(busy.status, 'FAILED')
+
+    @override_settings(EMAIL_RATE_LIMIT=2, EMAIL_RATE_LIMIT_PERIOD=3600)
+    def test_rate_limit_defers_the_rest_of_the_batch(self):
+        """Test that emails over the quota wait for the next window without using an attempt"""
+        records = self.queue('a@example.com', 'b@example.com', 'c@example.com')
+
+        claimed, retry_after = EmailService.deliver_scheduled()
+
+        self.assertEqual(claimed, 3)
+        self.assertIsNotNone(retry_after)
+        self.assertEqual(len(mail.outbox), 2)
+        deferred = EmailRecord.objects.get(pk=records[2].pk)
+        self.assertEqual(deferred.status, 'SCHEDULED')
+        self.assertEqual(deferred.attempts, 0)
+        self.assertGreater(deferred.next_attempt_at, timezone.now())
+
+    @override_settings(EMAIL_RATE_LIMIT=3, EMAIL_CAMPAIGN_RATE_LIMIT=1, EMAIL_RATE_LIMIT_PERIOD=3600)
+    def test_transactional_mail_goes_before_campaigns(self):
+        """Test that campaign emails are claimed last and only use their share of the quota"""
+        campaign = EmailService.queue_emails([
+            EmailRecord(
+                name='Campaign', subject='Subject', body='<p>News</p>', recipient_email=recipient,
+                priority=EmailRecord.PRIORITY_CAMPAIGN
+            )
+            for recipient in ('news1@example.com', 'news2@example.com')
+        ])
+        self.queue('reset@example.com', 'invoice@example.com')
+
+        claimed, retry_after = EmailService.deliver_scheduled()
+
+        self.assertEqual(claimed, 4)
+        self.assertIsNotNone(retry_after)
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            ['reset@example.com', 'invoice@example.com', 'news1@example.com']
+        )
+        deferred = EmailRecord.objects.get(pk=campaign[1].pk)
+        self.assertEqual((deferred.status, deferred.attempts), ('SCHEDULED', 0))
+
+    def test_bodies_are_stored_once_and_compacted(self):
+        """Test that identical bodies share one compressed row, including compacted inline ones"""
+        records = self.queue('a@example.com', 'b@example.com')
+        legacy = EmailRecord.objects.create(
+            name='Test', subject='Subject', body='<p>Body</p>', recipient_email='c@example.com', status='SENT'
+        )
+
+        self.assertEqual(EmailBody.objects.count(), 1)
+        self.assertEqual({record.body for record in records}, {''})
+        self.assertEqual(EmailService.compact_records(), 1)
+
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.body, legacy.body_ref_id), ('', records[0].body_ref_id))
+        self.assertEqual(bodies.render(legacy), '<p>Body</p>')
+
+        # Bodies are only purged once no record uses them
+        EmailBody.objects.update(updated_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(EmailService.purge_bodies(7), 0)
+        EmailRecord.objects.all().delete()
+        self.assertEqual(EmailService.purge_bodies(7), 1)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    EMAIL_BACKEND='core.domains.communications.tests.FlakyEmailBackend',
+    EMAIL_RATE_LIMIT=0,
+    EMAIL_CAMPAIGN_CHUNK_SIZE=2
+)
+class EmailCampaignTests(TestCase):
+    """Test mail-merge campaigns"""
+    
+    def setUp(self):
+        for email in ('ada@example.com', 'grace@example.com', 'bounce@example.com'):
+            User.objects.create_user(email=email, password='password', first_name=email.split('@')[0], role='ADMIN')
+        User.objects.create_user(email='inactive@example.com', password='password', role='ADMIN', is_active=False)
+        template = EmailTemplate.objects.create(
+            name='Announcement',
+            subject='News for {{ first_name }}',
+            body='<p>Hello {{ first_name }}, see {{ link }}</p>'
+        )
+        self.campaign = EmailCampaign.objects.create(
+            name='Spring', template=template, context={'link': '/news'}, recipient_filter={'role': 'ADMIN'}
+        )
+    
+    def test_campaign_is_rendered_queued_and_tracked(self):
+        """Test that recipients are personalised, queued in chunks and counted per status"""
+        with self.captureOnCommitCallbacks():
+            EmailCampaignService.start(self.campaign.id)
+        
+        # Template edits after the start don't reach the campaign
+        EmailTemplate.objects.filter(pk=self.campaign.template_id).update(subject='Changed')
+        self.assertEqual(EmailCampaignService.prepare(self.campaign.id), 3)
+        
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.total_recipients, self.campaign.queued_count), (3, 3))
+        self.assertIsNotNone(self.campaign.prepared_at)
+        record = EmailRecord.objects.get(campaign=self.campaign, recipient_email='ada@example.com')
+        self.assertEqual(record.subject, 'News for ada')
+        self.assertEqual(record.body_context['first_name'], 'ada')
+        self.assertEqual(bodies.render(record), '<p>Hello ada, see /news</p>')
+        self.assertEqual(EmailBody.objects.count(), 1)
+        
+        # Running again is a no-op
+        self.assertEqual(EmailCampaignService.prepare(self.campaign.id), 0)
+        self.assertEqual(EmailRecord.objects.filter(campaign=self.campaign).count(), 3)
+        
+        EmailService.deliver_scheduled()
+        self.assertIn('<p>Hello grace, see /news</p>', [message.alternatives[0][0] for message in mail.outbox])
+        # Delivering the last email completes the campaign; reading progress changes nothing
+        self.campaign.refresh_from_db()
+        self.assertIsNotNone(self.campaign.completed_at)
+        progress = EmailCampaignService.get_progress(self.campaign)
+        self.assertEqual((progress['sent'], progress['failed'], progress['pending']), (2, 1, 0))
+        self.assertEqual(progress['status'], 'COMPLETED')
+        self.assertEqual(
+            EmailRecord.objects.get(campaign=self.campaign, status='FAILED').recipient_email, 'bounce@example.com'
+        )
+    
+    def test_recipient_filters_are_validated(self):
+        """Test that malformed audiences are rejected and unknown campaigns are not found"""
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(email='ada@example.com'))
+        url = reverse('communications:emailcampaign-list')
+        for recipient_filter in ({'is_active': 'maybe'}, {'ids': ['x']}, {'role': 'OWNER'}, {'team': 1}, ['ADMIN']):
+            response = client.post(
+                url, {'name': 'Bad', 'template': self.campaign.template_id, 'recipient_filter': recipient_filter},
+                format='json'
+            )
+            self.assertEqual(response.status_code, 400, recipient_filter)
+        
+        response = client.get(reverse('communications:emailcampaign-failures', args=[self.campaign.id + 1]))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_pause_and_resume(self):
+        """Test that a paused campaign neither queues nor sends until resumed"""
+        with self.captureOnCommitCallbacks():
+            EmailCampaignService.start(self.campaign.id)
+        EmailCampaignService.prepare(self.campaign.id)
+        EmailCampaignService.pause(self.campaign.id)
+        
+        self.assertEqual(EmailRecord.objects.filter(campaign=self.campaign, status='PAUSED').count(), 3)
+        self.assertEqual(EmailService.deliver_scheduled(), (0, None))
+        self.assertEqual(len(mail.outbox), 0)
+        
+        with self.captureOnCommitCallbacks():
+            EmailCampaignService.resume(self.campaign.id)
+        EmailService.deliver_scheduled()
+        self.assertEqual(len(mail.outbox), 2)
+        
+        with self.assertRaises(InvalidCampaignState):
+            EmailCampaignService.resume(self.campaign.id)
+    
+    def test_paused_campaign_resumes_from_its_cursor(self):
+        """Test that queueing stops on pause and continues without duplicates"""
+        with self.captureOnCommitCallbacks():
+            EmailCampaignService.start(self.campaign.id)
+        EmailCampaignService.pause(self.campaign.id)
+        self.assertEqual(EmailCampaignService.prepare(self.campaign.id), 0)
+        
+        with self.captureOnCommitCallbacks():
+            EmailCampaignService.resume(self.campaign.id)
+        self.assertEqual(EmailCampaignService.prepare(self.campaign.id), 3)
+        self.assertEqual(
+            EmailRecord.objects.filter(campaign=self.campaign).values('recipient_email').distinct().count(), 3
+        )
+
+
+class AttachmentStreamingTests(SimpleTestCase):
+    """Test streamed email attachments"""
+
+    def test_streamed_message_round_trips(self):
+        """Test that a cached encoding streams into a valid multipart message"""
+        content = os.urandom(200 * 1024)
+        attachment = ResolvedAttachment(ContentFile(content, name='quote.pdf'), 'Quote é.pdf', 'application/pdf', 'k')
+        message = EmailMultiAlternatives('Subject', 'Plain\n.leading dot', 'from@example.com', ['to@example.com'])
+        message.attach_alternative('<p>Body</p>', 'text/html')
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = EncodedAttachmentCache(directory)
+            path = cache.path(attachment)
+            self.assertEqual(cache.path(attachment), path)
+            raw = b''.join(iter_message(message, [(attachment, path)]))
+
+        # Undo SMTP dot-stuffing, as the receiving server would
+        parsed = email.message_from_bytes(raw.replace(b'\r\n..', b'\r\n.'))
+        parts = {part.get_content_type(): part for part in parsed.walk()}
+        self.assertEqual(parsed['Subject'], 'Subject')
+        self.assertIn('text/html', parts)
+        self.assertEqual(parts['application/pdf'].get_filename(), 'Quote é.pdf')
+        self.assertEqual(parts['application/pdf'].get_payload(decode=True), content)
+
+    def test_filenames_cannot_inject_headers(self):
+        """Test that control characters are rejected in references and stripped from headers"""
+        with self.assertRaises(AttachmentError):
+            validate_reference({'type': 'invoice', 'id': 1, 'filename': 'a.pdf\r\nBcc: x@example.com'})
+
+        attachment = ResolvedAttachment(ContentFile(b'%PDF'), 'a.pdf\r\nBcc: x@example.com', 'application/pdf', 'k')
+        message = EmailMultiAlternatives('Subject', 'Body', 'from@example.com', ['to@example.com'])
+        with tempfile.TemporaryDirectory() as directory:
+            raw = b''.join(iter_message(message, [(attachment, EncodedAttachmentCache(directory).path(attachment))]))
+        self.assertNotIn(b'\r\nBcc:', raw)
+
+    def test_cache_prunes_itself_on_write(self):
+        """Test that writing an encoding removes this host's stale ones"""
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, 'stale.b64')
+            open(stale, 'wb').close()
+            os.utime(stale, (0, 0))
+
+            attachment = ResolvedAttachment(ContentFile(b'%PDF'), 'a.pdf', 'application/pdf', 'k')
+            EncodedAttachmentCache(directory).path(attachment)
+            self.assertFalse(os.path.exists(stale))
@@ -9,6 +9,7 @@ app_name = 'communications'
 router = DefaultRouter()
 router.register(r'email-templates', views.EmailTemplateViewSet)
 router.register(r'email-records', views.EmailRecordViewSet)
+router.register(r'email-campaigns', views.EmailCampaignViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
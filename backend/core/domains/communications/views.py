@@ -5,13 +5,16 @@ from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import EmailRecord, EmailTemplate
+from .exceptions import InvalidCampaignState
+from .models import EmailCampaign, EmailRecord, EmailTemplate
 from .serializers import (
+    EmailCampaignSerializer,
+    EmailRecordDetailSerializer,
     EmailRecordSerializer,
     EmailTemplateSerializer,
     PreviewEmailTemplateSerializer,
 )
-from .services import EmailTemplateService
+from .services import EmailCampaignService, EmailTemplateService
 
 
 class EmailTemplateViewSet(viewsets.ModelViewSet):
@@ -180,8 +183,17 @@ class EmailRecordViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = EmailRecordSerializer
     permission_classes = [IsAdmin]
     
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return EmailRecordDetailSerializer
+        return EmailRecordSerializer
+    
     def get_queryset(self):
         queryset = super().get_queryset()
+        queryset = queryset.select_related('client', 'sent_by')
+        if self.action != 'retrieve':
+            # Listings never need bodies; the detail view reads one lazily
+            queryset = queryset.defer('body', 'body_context')
         
         # Filter by template_name if provided
         template_name = self.request.query_params.get('template_name', None)
@@ -192,5 +204,73 @@ class EmailRecordViewSet(viewsets.ReadOnlyModelViewSet):
         status = self.request.query_params.get('status', None)
         if status:
             queryset = queryset.filter(status=status)
+        
+        # Filter by campaign if provided
+        campaign = self.request.query_params.get('campaign', None)
+        if campaign:
+            queryset = queryset.filter(campaign_id=campaign)
             
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+class EmailCampaignViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for mail-merge campaigns
+    """
+    queryset = EmailCampaign.objects.select_related('template').order_by('-created_at')
+    serializer_class = EmailCampaignSerializer
+    permission_classes = [IsAdmin]
+    
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+    
+    def perform_update(self, serializer):
+        if serializer.instance.status != 'DRAFT':
+            raise InvalidCampaignState(detail="Only draft campaigns can be edited.")
+        serializer.save()
+    
+    def perform_destroy(self, instance):
+        if instance.status not in ('DRAFT', 'CANCELLED', 'COMPLETED'):
+            raise InvalidCampaignState(detail="Pause and cancel the campaign before deleting it.")
+        instance.delete()
+    
+    def _transition(self, method, pk):
+        campaign = method(pk)
+        return Response({**self.get_serializer(campaign).data, 'progress': EmailCampaignService.get_progress(campaign)})
+    
+    @action(detail=True, methods=['post'])
+    def start(self, request, pk=None):
+        """Start sending the campaign"""
+        return self._transition(EmailCampaignService.start, pk)
+    
+    @action(detail=True, methods=['post'])
+    def pause(self, request, pk=None):
+        """Hold the campaign's unsent emails"""
+        return self._transition(EmailCampaignService.pause, pk)
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Continue a paused campaign"""
+        return self._transition(EmailCampaignService.resume, pk)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel every email of the campaign not yet sent"""
+        return self._transition(EmailCampaignService.cancel, pk)
+    
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Per-status email counts"""
+        return Response(EmailCampaignService.get_progress(self.get_object()))
+    
+    @action(detail=True, methods=['get'])
+    def failures(self, request, pk=None):
+        """Recipients whose email failed, with the last error"""
+        campaign = EmailCampaignService.get_campaign(pk)
+        records = EmailRecord.objects.filter(campaign=campaign, status='FAILED').order_by('id').values(
+            'id', 'client_id', 'recipient_email', 'attempts', 'last_error', 'updated_at'
+        )
+        page = self.paginate_queryset(records)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(list(records))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the events table against writes
+    atomic = False
+
+    dependencies = [
+        ('events', '0002_alter_eventtype_description_event_eventfile_and_more'),
+        ('products', '0001_initial'),
+        ('workflows', '0002_workflowstage_metadata_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='event_name_trgm_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # backend/core/domains/events/models.py
 from core.utils.models import BaseModel
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import (
     FileExtensionValidator,
     MaxValueValidator,
@@ -8,6 +9,7 @@ from django.core.validators import (
 )
 from django.db import models
 from django.db.models import Sum
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 
@@ -119,6 +121,12 @@ class Event(BaseModel):
         event_name = self.name or f"{self.event_type} for {self.client}"
         return f"{event_name} on {self.start_date}"
 
+    class Meta:
+        indexes = [
+            # icontains compiles to UPPER(name) LIKE UPPER(...)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='event_name_trgm_idx'),
+        ]
+
 
 class EventProductOption(BaseModel):
     """Junction model linking products to events with quantity and pricing"""
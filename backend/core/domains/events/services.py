@@ -2,6 +2,7 @@
 import logging
 from datetime import datetime
 
+from core.utils import search
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.db.models import Q
@@ -112,13 +113,13 @@ class EventService:
         """Get all events with optional filtering"""
         queryset = Event.objects.all()
         
-        if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(client__first_name__icontains=search_query) |
-                Q(client__last_name__icontains=search_query) |
-                Q(client__email__icontains=search_query)
-            )
+        if search.normalize(search_query):
+            # A UNION of two trigram-indexed lookups; an OR across the join would scan every event
+            by_name = Event.objects.filter(name__icontains=search.normalize(search_query)).values('id')
+            by_client = Event.objects.filter(
+                search.document_filter('client__search_document', search_query)
+            ).values('id')
+            queryset = queryset.filter(pk__in=by_name.union(by_client))
         
         if event_type_id:
             queryset = queryset.filter(event_type_id=event_type_id)
@@ -113,8 +113,6 @@ class EventViewSet(viewsets.ModelViewSet):
     ViewSet for managing events
     """
     permission_classes = [IsAdminOrClient]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name', 'client__first_name', 'client__last_name', 'client__email']
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -0,0 +1,178 @@
+# backend/core/domains/notifications/channels.py
+import http.client
+import ipaddress
+import json
+import logging
+import socket
+import time
+from urllib.parse import urlsplit
+
+from core.domains.payments.webhooks import compute_signature
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'queue': 'celery',
+    'batch_size': 50,
+    'rate_limit': 0,
+    'rate_limit_period': 60,
+    'max_attempts': 5,
+    'retry_base_delay': 60,
+    'retry_max_delay': 60 * 60,
+    'timeout': 10,
+}
+
+
+class PermanentDeliveryError(Exception):
+    """A delivery that cannot succeed on retry"""
+
+
+class TemporaryDeliveryError(Exception):
+    """A delivery the receiver refused for now, e.g. with a 5xx response"""
+
+
+class UnsafeWebhookAddress(PermanentDeliveryError):
+    """A webhook URL pointing at a loopback, private, link-local or otherwise non-public address"""
+
+
+def resolve_webhook_address(url):
+    """
+    Return the IP address to deliver a webhook URL to.
+
+    Every address the host resolves to must be public, so a name cannot alternate
+    between a public and an internal answer. Resolution failures raise OSError.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeWebhookAddress("Invalid webhook URL")
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    addresses = []
+    for *_, sockaddr in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM):
+        address = ipaddress.ip_address(sockaddr[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise UnsafeWebhookAddress(f"Webhook host {parts.hostname} resolves to a non-public address")
+        addresses.append(str(address))
+    if not addresses:
+        raise UnsafeWebhookAddress(f"Webhook host {parts.hostname} does not resolve")
+    return addresses[0]
+
+
+class PinnedHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to an address vetted beforehand, so a second DNS lookup cannot redirect it"""
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection to a vetted address; the certificate is still checked against the host name"""
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class Channel:
+    """
+    Transport for one external notification channel.
+
+    Throughput, rate limit and retry policy come from NOTIFICATION_CHANNELS[code],
+    so each channel can be tuned, and run on its own worker queue, independently.
+    """
+    code = None
+
+    @property
+    def policy(self):
+        return {**DEFAULT_POLICY, **getattr(settings, 'NOTIFICATION_CHANNELS', {}).get(self.code, {})}
+
+    def retry_delay(self, attempts):
+        """Exponential backoff before the next attempt, in seconds"""
+        policy = self.policy
+        return min(policy['retry_base_delay'] * 2 ** max(attempts - 1, 0), policy['retry_max_delay'])
+
+    def send(self, delivery):
+        """Deliver one NotificationDelivery, raising on failure"""
+        raise NotImplementedError
+
+
+class WebhookChannel(Channel):
+    """POSTs the notification as signed JSON to the user's webhook URL"""
+    code = 'WEBHOOK'
+
+    def send(self, delivery):
+        from .realtime import notification_payload
+
+        notification = delivery.notification
+        body = json.dumps(
+            {'recipient': notification.recipient_id, **notification_payload(notification)},
+            cls=DjangoJSONEncoder
+        )
+        timestamp = int(time.time())
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Webhook-Signature': compute_signature(
+                getattr(settings, 'NOTIFICATION_WEBHOOK_SECRET', ''), timestamp, body
+            ),
+            'X-Webhook-Timestamp': str(timestamp),
+        }
+
+        # The destination is user supplied: connect only to the public address it was
+        # vetted as, and never follow redirects, which could point anywhere
+        parts = urlsplit(delivery.destination)
+        address = resolve_webhook_address(delivery.destination)
+        connection_class = PinnedHTTPSConnection if parts.scheme == 'https' else PinnedHTTPConnection
+        connection = connection_class(parts.hostname, parts.port, address, timeout=self.policy['timeout'])
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        try:
+            connection.request('POST', path, body=body.encode(), headers=headers)
+            status = connection.getresponse().status
+        finally:
+            connection.close()
+
+        if 300 <= status < 400:
+            raise PermanentDeliveryError(f"HTTP {status}: redirects are not followed")
+        # Client errors other than throttling will fail the same way again
+        if 400 <= status < 500 and status not in (408, 429):
+            raise PermanentDeliveryError(f"HTTP {status}")
+        if status >= 400:
+            raise TemporaryDeliveryError(f"HTTP {status}")
+
+
+class SmsChannel(Channel):
+    """
+    Stand-in SMS transport.
+
+    No SMS provider is integrated yet; messages are logged, like the console email
+    backend, so the queue, rate limit and retry policy can be exercised end to end.
+    """
+    code = 'SMS'
+
+    def send(self, delivery):
+        if not delivery.destination:
+            raise PermanentDeliveryError("No phone number")
+        notification = delivery.notification
+        logger.info(f"SMS to {delivery.destination}: {f'{notification.title}: {notification.content}'[:160]}")
+
+
+CHANNELS = {channel.code: channel for channel in (WebhookChannel(), SmsChannel())}
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Celery router sending each channel's delivery task to that channel's queue"""
+    if name == 'core.domains.notifications.tasks.deliver_notification_channel':
+        code = args[0] if args else kwargs.get('channel')
+        if code in CHANNELS:
+            return {'queue': CHANNELS[code].policy['queue']}
+    return None
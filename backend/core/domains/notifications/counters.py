@@ -0,0 +1,126 @@
+# backend/core/domains/notifications/counters.py
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('total', 'unread')
+
+
+def _key(user_id, field):
+    return f"notifications:counts:{user_id}:{field}"
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATION_COUNTS_TTL', 60 * 60 * 24)
+
+
+def get_counts(user_id):
+    """
+    Return {'total', 'unread'} for a user from the cache.
+
+    A miss on either counter rebuilds both from the database.
+    """
+    keys = {field: _key(user_id, field) for field in FIELDS}
+    try:
+        cached = cache.get_many(keys.values())
+    except Exception as e:
+        logger.error(f"Could not read notification counters: {str(e)}")
+        cached = {}
+    if len(cached) == len(keys):
+        return {field: cached[key] for field, key in keys.items()}
+    return rebuild([user_id])[user_id]
+
+
+def rebuild(user_ids):
+    """Recount users' notifications in one query and store the result"""
+    from .models import Notification
+
+    counts = {user_id: {'total': 0, 'unread': 0} for user_id in user_ids}
+    rows = (
+        Notification.objects.filter(recipient_id__in=user_ids)
+        .values('recipient_id')
+        .annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['recipient_id']] = {'total': row['total'], 'unread': row['unread']}
+
+    try:
+        cache.set_many(
+            {
+                _key(user_id, field): value
+                for user_id, values in counts.items()
+                for field, value in values.items()
+            },
+            timeout=_timeout()
+        )
+    except Exception as e:
+        logger.error(f"Could not store notification counters: {str(e)}")
+    return counts
+
+
+def adjust(user_id, total=0, unread=0):
+    """Apply a change to a user's counters once the current transaction commits"""
+    adjust_many({user_id: (total, unread)})
+
+
+def adjust_many(deltas):
+    """Apply {user_id: (total, unread)} changes once the current transaction commits"""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if any(delta)}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def _apply(deltas):
+    from . import realtime
+
+    for user_id, values in deltas.items():
+        for field, delta in zip(FIELDS, values):
+            if not delta:
+                continue
+            key = _key(user_id, field)
+            try:
+                if cache.incr(key, delta) < 0:
+                    # Drifted below zero; let the next read rebuild it
+                    cache.delete(key)
+            except ValueError:
+                # Not cached; the next read rebuilds it from the database
+                pass
+            except Exception as e:
+                # Healed by the TTL or the periodic reconcile
+                logger.error(f"Could not update notification counter {key}: {str(e)}")
+
+    # Push the new values to open streams
+    keys = {(user_id, field): _key(user_id, field) for user_id in deltas for field in FIELDS}
+    try:
+        cached = cache.get_many(keys.values())
+    except Exception as e:
+        logger.error(f"Could not read notification counters: {str(e)}")
+        return
+    counts = {}
+    for (user_id, field), key in keys.items():
+        if key in cached:
+            counts.setdefault(user_id, {})[field] = cached[key]
+    realtime.publish_counts({
+        user_id: values for user_id, values in counts.items() if len(values) == len(FIELDS)
+    })
+
+
+def reconcile(since):
+    """Rebuild counters for every user whose notifications changed since a point in time"""
+    from .models import Notification
+
+    user_ids = list(
+        Notification.objects.filter(updated_at__gte=since)
+        .values_list('recipient_id', flat=True)
+        .distinct()
+        .order_by()
+    )
+    for start in range(0, len(user_ids), 1000):
+        rebuild(user_ids[start:start + 1000])
+    return len(user_ids)
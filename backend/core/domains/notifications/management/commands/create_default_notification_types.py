@@ -103,6 +103,14 @@ class Command(BaseCommand):
                 'icon': 'person_add',
                 'color': '#2196f3',
             },
+            {
+                'code': 'CLIENTS_IMPORTED',
+                'name': 'Clients Imported',
+                'description': 'A bulk client import has completed',
+                'category': 'CLIENT',
+                'icon': 'group_add',
+                'color': '#2196f3',
+            },
         ]
 
         created_count = 0
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='aggregate_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='digest_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='digest_interval',
+            field=models.CharField(choices=[('IMMEDIATE', 'Immediate'), ('HOURLY', 'Hourly'), ('DAILY', 'Daily')], default='IMMEDIATE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationtype',
+            name='coalesce_window',
+            field=models.PositiveIntegerField(blank=True, help_text='Seconds during which repeats for the same object are merged; empty uses the default, 0 disables', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'notification_type', 'content_type', 'object_id', 'created_at'], name='notification_coalesce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('digest_pending', True)), fields=['recipient'], name='notification_digest_idx'),
+        ),
+    ]
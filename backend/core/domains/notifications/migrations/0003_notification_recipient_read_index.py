@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:35
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the notifications table against writes
+    atomic = False
+
+    dependencies = [
+        ('notifications', '0002_notification_coalescing_and_digests'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read'], name='notification_unread_idx'),
+        ),
+    ]
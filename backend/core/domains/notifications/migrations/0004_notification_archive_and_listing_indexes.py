@@ -0,0 +1,80 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without locking the notifications table against writes
+    atomic = False
+
+    dependencies = [
+        ('notifications', '0003_notification_recipient_read_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notification_id', models.BigIntegerField(help_text='ID the notification had in the hot table')),
+                ('title', models.CharField(max_length=255)),
+                ('content', models.TextField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('action_url', models.CharField(blank=True, max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('aggregate_count', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notification_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_unread_list_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'notification_type', '-created_at'], name='notification_type_list_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['notification_type', 'created_at'], name='notification_retention_idx'),
+        ),
+        # Superseded by notification_unread_list_idx
+        RemoveIndexConcurrently(
+            model_name='notification',
+            name='notification_unread_idx',
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='notification_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to='notifications.notificationtype'),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['recipient', '-created_at'], name='notif_archive_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['archived_at'], name='notif_archive_purge_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_archive_and_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='sms_enabled',
+            field=models.BooleanField(default=False, help_text='Also text notifications sent by email to the profile phone'),
+        ),
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='webhook_url',
+            field=models.URLField(blank=True, help_text='Endpoint every notification is POSTed to'),
+        ),
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('channel', models.CharField(choices=[('WEBHOOK', 'Webhook'), ('SMS', 'SMS')], max_length=20)),
+                ('destination', models.CharField(help_text='Webhook URL or phone number', max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='notifications.notification')),
+            ],
+            options={
+                'verbose_name_plural': 'Notification deliveries',
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['channel', 'next_attempt_at'], name='notif_delivery_queue_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
 # backend/core/domains/notifications/models.py
+from datetime import timedelta
+
 from core.utils.models import BaseModel
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class NotificationType(BaseModel):
@@ -23,9 +26,19 @@ class NotificationType(BaseModel):
     icon = models.CharField(max_length=50, blank=True)
     color = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
+    coalesce_window = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Seconds during which repeats for the same object are merged; empty uses the default, 0 disables"
+    )
     
     def __str__(self):
         return self.name
+    
+    def get_coalesce_window(self):
+        """Coalescing window in seconds, falling back to NOTIFICATION_COALESCE_WINDOW"""
+        if self.coalesce_window is not None:
+            return self.coalesce_window
+        return getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 300)
 
 
 class NotificationTemplate(BaseModel):
@@ -44,10 +57,28 @@ class NotificationTemplate(BaseModel):
 
 class NotificationPreference(BaseModel):
     """User preferences for receiving notifications"""
+    DIGEST_CHOICES = (
+        ('IMMEDIATE', 'Immediate'),
+        ('HOURLY', 'Hourly'),
+        ('DAILY', 'Daily'),
+    )
+    DIGEST_INTERVALS = {
+        'HOURLY': timedelta(hours=1),
+        'DAILY': timedelta(days=1),
+    }
+    
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notification_preferences')
     email_enabled = models.BooleanField(default=True)
     in_app_enabled = models.BooleanField(default=True)
     
+    # External channels
+    sms_enabled = models.BooleanField(default=False, help_text="Also text notifications sent by email to the profile phone")
+    webhook_url = models.URLField(blank=True, help_text="Endpoint every notification is POSTed to")
+    
+    # Email digest
+    digest_interval = models.CharField(max_length=20, choices=DIGEST_CHOICES, default='IMMEDIATE')
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+    
     # Delivery preferences by category
     system_notifications = models.BooleanField(default=True)
     event_notifications = models.BooleanField(default=True)
@@ -72,6 +103,11 @@ class NotificationPreference(BaseModel):
             return False
         return not self.disabled_types.filter(id=notification_type.id).exists()
     
+    @property
+    def wants_digest(self):
+        """Whether emails are batched into a periodic digest instead of sent one by one"""
+        return self.digest_interval in self.DIGEST_INTERVALS
+    
     def is_category_enabled(self, category):
         """Check if a notification category is enabled for this user"""
         category_map = {
@@ -109,12 +145,110 @@ class Notification(BaseModel):
     content_type = models.CharField(max_length=100, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     
+    # Number of notifications merged into this one within the coalescing window
+    aggregate_count = models.PositiveIntegerField(default=1)
+    
     # Email status
     is_emailed = models.BooleanField(default=False)
     emailed_at = models.DateTimeField(null=True, blank=True)
+    digest_pending = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Recipient-scoped listings: all, unread/read and by type, newest first
+            models.Index(fields=['recipient', '-created_at'], name='notification_recent_idx'),
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_unread_list_idx'),
+            models.Index(fields=['recipient', 'notification_type', '-created_at'], name='notification_type_list_idx'),
+            # Retention sweep over read notifications
+            models.Index(
+                fields=['notification_type', 'created_at'],
+                condition=models.Q(is_read=True),
+                name='notification_retention_idx'
+            ),
+            models.Index(
+                fields=['recipient', 'notification_type', 'content_type', 'object_id', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_coalesce_idx'
+            ),
+            models.Index(
+                fields=['recipient'],
+                condition=models.Q(digest_pending=True),
+                name='notification_digest_idx'
+            ),
+        ]
         
     def __str__(self):
-        return f"{self.notification_type.name} for {self.recipient.email}"
\ No newline at end of file
+        return f"{self.notification_type.name} for {self.recipient.email}"
+
+
+class NotificationDelivery(BaseModel):
+    """A notification queued for delivery on an external channel (webhook, SMS)"""
+    CHANNEL_CHOICES = (
+        ('WEBHOOK', 'Webhook'),
+        ('SMS', 'SMS'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+    
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    destination = models.CharField(max_length=255, help_text="Webhook URL or phone number")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = 'Notification deliveries'
+        indexes = [
+            models.Index(
+                fields=['channel', 'next_attempt_at'],
+                condition=models.Q(status='PENDING'),
+                name='notif_delivery_queue_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} delivery of notification {self.notification_id} ({self.status})"
+
+
+class NotificationArchive(BaseModel):
+    """
+    Read notifications moved out of the hot table by the retention job.
+
+    created_at keeps the original notification's timestamp.
+    """
+    notification_id = models.BigIntegerField(help_text="ID the notification had in the hot table")
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    notification_type = models.ForeignKey(
+        NotificationType,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    action_url = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    aggregate_count = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notif_archive_recent_idx'),
+            models.Index(fields=['archived_at'], name='notif_archive_purge_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type.name} for {self.recipient.email} (archived)"
@@ -0,0 +1,180 @@
+# backend/core/domains/notifications/preferences.py
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Category -> (bit, NotificationPreference field)
+CATEGORIES = {
+    'SYSTEM': (1 << 0, 'system_notifications'),
+    'EVENT': (1 << 1, 'event_notifications'),
+    'TASK': (1 << 2, 'task_notifications'),
+    'PAYMENT': (1 << 3, 'payment_notifications'),
+    'CLIENT': (1 << 4, 'client_notifications'),
+    'CONTRACT': (1 << 5, 'contract_notifications'),
+}
+ALL_CATEGORIES = sum(bit for bit, _ in CATEGORIES.values())
+
+# Bump when the cached tuple layout changes
+SNAPSHOT_VERSION = 2
+
+
+class PreferenceSnapshot:
+    """
+    Immutable, cacheable view of a user's notification preferences.
+
+    Categories are a bitmask and disabled types a frozenset of IDs, so every check
+    is a constant-time in-memory lookup.
+    """
+    __slots__ = (
+        'user_id', 'categories', 'disabled_types', 'email_enabled', 'in_app_enabled', 'digest_interval',
+        'sms_enabled', 'webhook_url'
+    )
+
+    def __init__(self, user_id, categories=ALL_CATEGORIES, disabled_types=frozenset(),
+                 email_enabled=True, in_app_enabled=True, digest_interval='IMMEDIATE',
+                 sms_enabled=False, webhook_url=''):
+        self.user_id = user_id
+        self.categories = categories
+        self.disabled_types = frozenset(disabled_types)
+        self.email_enabled = email_enabled
+        self.in_app_enabled = in_app_enabled
+        self.digest_interval = digest_interval
+        self.sms_enabled = sms_enabled
+        self.webhook_url = webhook_url
+
+    @classmethod
+    def from_row(cls, row):
+        categories = 0
+        for bit, field in CATEGORIES.values():
+            if row[field]:
+                categories |= bit
+        return cls(
+            row['user_id'],
+            categories,
+            row['disabled_type_ids'],
+            row['email_enabled'],
+            row['in_app_enabled'],
+            row['digest_interval'],
+            row['sms_enabled'],
+            row['webhook_url'],
+        )
+
+    def to_cache(self):
+        return (
+            SNAPSHOT_VERSION, self.categories, tuple(self.disabled_types),
+            self.email_enabled, self.in_app_enabled, self.digest_interval,
+            self.sms_enabled, self.webhook_url
+        )
+
+    @classmethod
+    def from_cache(cls, user_id, value):
+        if not isinstance(value, tuple) or value[0] != SNAPSHOT_VERSION:
+            return None
+        return cls(user_id, *value[1:])
+
+    def is_category_enabled(self, category):
+        bit = CATEGORIES.get(category)
+        return bit is None or bool(self.categories & bit[0])
+
+    def is_type_enabled(self, notification_type):
+        return (
+            self.is_category_enabled(notification_type.category)
+            and notification_type.id not in self.disabled_types
+        )
+
+    @property
+    def wants_digest(self):
+        from .models import NotificationPreference
+
+        return self.digest_interval in NotificationPreference.DIGEST_INTERVALS
+
+
+def _key(user_id):
+    return f"notifications:preferences:{user_id}"
+
+
+def get_snapshot(user_id):
+    return get_snapshots([user_id])[user_id]
+
+
+def get_snapshots(user_ids):
+    """
+    Return {user_id: PreferenceSnapshot} for many users.
+
+    Cached snapshots are fetched in one round trip; the rest are loaded with a
+    single query, and default preferences are created for users without any.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    snapshots = {}
+    try:
+        cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.error(f"Could not read preference snapshots: {str(e)}")
+        cached = {}
+    for user_id in user_ids:
+        snapshot = PreferenceSnapshot.from_cache(user_id, cached.get(_key(user_id)))
+        if snapshot is not None:
+            snapshots[user_id] = snapshot
+
+    missing = [user_id for user_id in user_ids if user_id not in snapshots]
+    if missing:
+        loaded = _load(missing)
+        snapshots.update(loaded)
+        try:
+            cache.set_many(
+                {_key(user_id): snapshot.to_cache() for user_id, snapshot in loaded.items()},
+                timeout=getattr(settings, 'NOTIFICATION_PREFERENCES_TTL', 60 * 60 * 24)
+            )
+        except Exception as e:
+            logger.error(f"Could not store preference snapshots: {str(e)}")
+    return snapshots
+
+
+def _load(user_ids):
+    from .models import NotificationPreference
+
+    rows = (
+        NotificationPreference.objects.filter(user_id__in=user_ids)
+        .values(
+            'user_id', 'email_enabled', 'in_app_enabled', 'digest_interval', 'sms_enabled', 'webhook_url',
+            *(field for _, field in CATEGORIES.values())
+        )
+        .annotate(
+            disabled_type_ids=ArrayAgg(
+                'disabled_types__id', filter=Q(disabled_types__isnull=False), default=[]
+            )
+        )
+        .order_by()
+    )
+    snapshots = {row['user_id']: PreferenceSnapshot.from_row(row) for row in rows}
+
+    # Users without a preference row get the defaults
+    absent = [user_id for user_id in user_ids if user_id not in snapshots]
+    if absent:
+        NotificationPreference.objects.bulk_create(
+            [NotificationPreference(user_id=user_id) for user_id in absent],
+            ignore_conflicts=True
+        )
+        for user_id in absent:
+            snapshots[user_id] = PreferenceSnapshot(user_id)
+    return snapshots
+
+
+def invalidate(user_ids):
+    """Drop cached snapshots now and again once the change is visible to other readers"""
+    keys = [_key(user_id) for user_id in user_ids]
+
+    def delete():
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Could not invalidate preference snapshots: {str(e)}")
+
+    delete()
+    transaction.on_commit(delete)
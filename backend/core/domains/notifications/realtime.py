@@ -0,0 +1,266 @@
+# backend/core/domains/notifications/realtime.py
+import asyncio
+import json
+import logging
+import time
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+STAFF_CHANNEL = 'realtime:staff'
+BROADCAST_CHANNEL = 'realtime:broadcast'
+RESYNC = object()
+
+
+def user_channel(user_id):
+    return f"realtime:user:{user_id}"
+
+
+def sse_frame(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+# Publishing (sync, from request handlers and workers)
+
+_publisher = None
+
+
+def _get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(
+            settings.REALTIME_REDIS_URL, socket_connect_timeout=1, socket_timeout=1
+        )
+    return _publisher
+
+
+def publish(messages):
+    """
+    Publish [(channel, event, data)] to subscribers once the current transaction commits.
+
+    Realtime delivery is best effort: clients fall back to the polling endpoints, so
+    a Redis failure is logged and never breaks the write that triggered it.
+    """
+    if not messages or not getattr(settings, 'REALTIME_ENABLED', True):
+        return
+    frames = [
+        (channel, json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder))
+        for channel, event, data in messages
+    ]
+    transaction.on_commit(lambda: _send(frames))
+
+
+def _send(frames):
+    try:
+        pipe = _get_publisher().pipeline(transaction=False)
+        for channel, frame in frames:
+            pipe.publish(channel, frame)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Could not publish realtime events: {str(e)}")
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.id,
+        'notification_type': notification.notification_type.code,
+        'title': notification.title,
+        'content': notification.content,
+        'action_url': notification.action_url,
+        'content_type': notification.content_type,
+        'object_id': notification.object_id,
+        'aggregate_count': notification.aggregate_count,
+        'created_at': notification.created_at,
+    }
+
+
+def publish_notifications(notifications):
+    """Push newly created or merged notifications to their recipients"""
+    publish([
+        (user_channel(notification.recipient_id), 'notification', notification_payload(notification))
+        for notification in notifications
+    ])
+
+
+def publish_timeline(entries):
+    """Push event timeline entries to staff, and to the event's client when they are public"""
+    from core.domains.events.models import Event
+
+    public_event_ids = {entry.event_id for entry in entries if entry.is_public}
+    clients = dict(
+        Event.objects.filter(pk__in=public_event_ids).values_list('id', 'client_id')
+    ) if public_event_ids else {}
+
+    messages = []
+    for entry in entries:
+        payload = {
+            'id': entry.id,
+            'event_id': entry.event_id,
+            'action_type': entry.action_type,
+            'description': entry.description,
+            'actor_id': entry.actor_id,
+            'is_public': entry.is_public,
+            'created_at': entry.created_at,
+        }
+        messages.append((STAFF_CHANNEL, 'timeline', payload))
+        if entry.is_public and clients.get(entry.event_id):
+            messages.append((user_channel(clients[entry.event_id]), 'timeline', payload))
+    publish(messages)
+
+
+def publish_changes(user_id, event, notification_ids):
+    """Tell a user's streams which notifications were marked read/unread or deleted"""
+    publish([(user_channel(user_id), event, {'ids': list(notification_ids)})])
+
+
+def publish_counts(counts):
+    """Push {user_id: {'total', 'unread'}} counter values to their users"""
+    publish([(user_channel(user_id), 'counts', values) for user_id, values in counts.items()])
+
+
+# Subscribing (async, inside the ASGI worker)
+
+class Subscription:
+    """A single stream's bounded inbox"""
+
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the backlog and tell the client to refetch over HTTP
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class SubscriptionHub:
+    """
+    Fan-out of one Redis pub/sub connection to every stream in the process.
+
+    Redis channels are subscribed while at least one local stream needs them, so
+    thousands of idle streams cost one Redis connection and a queue each.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._pubsub = None
+        self._listener = None
+        self._loop = None
+        self._lock = None
+
+    def _reset_for_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._channels = {}
+            self._pubsub = None
+            self._listener = None
+
+    async def _ensure_listening(self):
+        if self._listener is not None and not self._listener.done():
+            return
+        client = redis.asyncio.Redis.from_url(settings.REALTIME_REDIS_URL)
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        # Keep one permanent subscription so the listener always has a connection
+        await self._pubsub.subscribe(BROADCAST_CHANNEL, *self._channels)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Realtime listener error: {str(e)}")
+                await asyncio.sleep(1)
+
+    def _dispatch(self, message):
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            payload = json.loads(message['data'])
+            frame = sse_frame(payload['event'], payload['data'])
+        except (ValueError, KeyError, TypeError):
+            return
+
+        # Format once, deliver to every local subscriber
+        subscriptions = (
+            set().union(*self._channels.values()) if channel == BROADCAST_CHANNEL
+            else self._channels.get(channel, ())
+        )
+        for subscription in list(subscriptions):
+            subscription.deliver(frame)
+
+    async def subscribe(self, channels):
+        self._reset_for_loop()
+        subscription = Subscription(channels, getattr(settings, 'REALTIME_QUEUE_SIZE', 100))
+        async with self._lock:
+            await self._ensure_listening()
+            new = [channel for channel in channels if channel not in self._channels]
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+            if new:
+                await self._pubsub.subscribe(*new)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        async with self._lock:
+            unused = []
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+                    unused.append(channel)
+            if unused and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*unused)
+                except Exception as e:
+                    logger.error(f"Could not unsubscribe realtime channels: {str(e)}")
+
+
+hub = SubscriptionHub()
+
+
+async def event_stream(channels, expires_at, initial=()):
+    """
+    Subscribe to channels and yield SSE frames until the client leaves or its token expires.
+
+    Idle streams get a comment line every REALTIME_HEARTBEAT_INTERVAL seconds so
+    proxies keep the connection open and dead clients are noticed.
+    """
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_INTERVAL', 15)
+    subscription = await hub.subscribe(channels)
+    try:
+        yield f"retry: {getattr(settings, 'REALTIME_RETRY_MS', 5000)}\n" + sse_frame('ready', {})
+        for frame in initial:
+            yield frame
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                # Make the client reconnect with a fresh token
+                yield sse_frame('expired', {})
+                return
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield sse_frame('resync', {}) if frame is RESYNC else frame
+    finally:
+        await hub.unsubscribe(subscription)
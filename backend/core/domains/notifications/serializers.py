@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from .models import (
     Notification,
+    NotificationArchive,
     NotificationPreference,
     NotificationTemplate,
     NotificationType,
@@ -14,7 +15,7 @@ class NotificationTypeSerializer(serializers.ModelSerializer):
         model = NotificationType
         fields = [
             'id', 'code', 'name', 'description', 'category', 
-            'icon', 'color', 'is_active', 'created_at', 'updated_at'
+            'icon', 'color', 'is_active', 'coalesce_window', 'created_at', 'updated_at'
         ]
 
 
@@ -44,8 +45,10 @@ class NotificationPreferenceSerializer(serializers.ModelSerializer):
             'system_notifications', 'event_notifications', 
             'task_notifications', 'payment_notifications',
             'client_notifications', 'contract_notifications',
-            'disabled_types', 'created_at', 'updated_at'
+            'sms_enabled', 'webhook_url',
+            'disabled_types', 'digest_interval', 'last_digest_at', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['last_digest_at']
         
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -56,10 +59,23 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'recipient', 'notification_type', 'notification_type_details',
             'title', 'content', 'is_read', 'read_at', 'action_url',
-            'content_type', 'object_id', 'is_emailed', 'emailed_at',
+            'content_type', 'object_id', 'aggregate_count', 'is_emailed', 'emailed_at',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['is_emailed', 'emailed_at', 'created_at', 'updated_at']
+        read_only_fields = ['aggregate_count', 'is_emailed', 'emailed_at', 'created_at', 'updated_at']
+
+
+class NotificationArchiveSerializer(serializers.ModelSerializer):
+    notification_type_details = NotificationTypeSerializer(source='notification_type', read_only=True)
+    
+    class Meta:
+        model = NotificationArchive
+        fields = [
+            'id', 'notification_id', 'recipient', 'notification_type', 'notification_type_details',
+            'title', 'content', 'read_at', 'action_url', 'content_type', 'object_id',
+            'aggregate_count', 'created_at', 'archived_at'
+        ]
+        read_only_fields = fields
 
 
 class NotificationBulkActionSerializer(serializers.Serializer):
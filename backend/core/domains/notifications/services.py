@@ -1,13 +1,25 @@
 # backend/core/domains/notifications/services.py
-from datetime import datetime
+import logging
+import time
+from datetime import datetime, timedelta
 
+from core.domains.communications.models import EmailRecord
 from core.domains.communications.services import EmailService
+from core.domains.users.models import UserProfile
+from core.utils.ratelimit import RateLimiter
+from core.utils.templates import render_field
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
 from django.template import Context, Template
 from django.utils import timezone
 
+from . import counters, realtime
+from . import preferences as preference_cache
+from .channels import CHANNELS, PermanentDeliveryError, UnsafeWebhookAddress, resolve_webhook_address
 from .exceptions import (
     InvalidNotificationDataException,
     NotificationNotFoundException,
@@ -17,14 +29,34 @@ from .exceptions import (
 )
 from .models import (
     Notification,
+    NotificationArchive,
+    NotificationDelivery,
     NotificationPreference,
     NotificationTemplate,
     NotificationType,
 )
 
+logger = logging.getLogger(__name__)
+
+DIGEST_SUBJECT = Template(
+    "You have {{ count }} new notification{{ count|pluralize }}"
+)
+DIGEST_BODY = Template(
+    "<p>Hi {{ user.first_name|default:user.email }},</p>"
+    "<p>Here is what happened since your last update:</p>"
+    "<ul>{% for notification in notifications %}"
+    "<li><strong>{{ notification.title }}</strong>"
+    "{% if notification.aggregate_count > 1 %} ({{ notification.aggregate_count }} updates){% endif %}"
+    "<br>{{ notification.content }}"
+    "{% if notification.action_url %}<br><a href=\"{{ frontend_url }}{{ notification.action_url }}\">View</a>{% endif %}"
+    "</li>{% endfor %}</ul>"
+)
+
 
 class NotificationService:
     """Service for handling notification operations"""
+    
+    TEMPLATE_CACHE_VERSION_KEY = 'notifications:template-version'
 
     @staticmethod
     def get_notifications(user, is_read=None, notification_type=None, limit=None):
@@ -69,6 +101,7 @@ class NotificationService:
                 notification.is_read = True
                 notification.read_at = timezone.now()
                 notification.save(update_fields=['is_read', 'read_at', 'updated_at'])
+                counters.adjust(notification.recipient_id, unread=-1)
             return notification
     
     @staticmethod
@@ -80,30 +113,93 @@ class NotificationService:
                 notification.is_read = False
                 notification.read_at = None
                 notification.save(update_fields=['is_read', 'read_at', 'updated_at'])
+                counters.adjust(notification.recipient_id, unread=1)
             return notification
     
     @staticmethod
     def mark_all_as_read(user):
-        """Mark all notifications as read for a user"""
-        with transaction.atomic():
-            now = timezone.now()
-            updated = Notification.objects.filter(
-                recipient=user, 
-                is_read=False
-            ).update(
-                is_read=True, 
-                read_at=now,
-                updated_at=now
-            )
-            return updated
+        """
+        Mark all notifications as read for a user
+        
+        Runs as chunked UPDATE ... RETURNING statements, each in its own short
+        transaction, so users with thousands of unread notifications never hold
+        row locks for the whole sweep.
+        """
+        chunk_size = getattr(settings, 'NOTIFICATION_BULK_CHUNK_SIZE', 1000)
+        updated = 0
+        while True:
+            with transaction.atomic():
+                ids = NotificationService._set_read_state(user.id, True, limit=chunk_size)
+            updated += len(ids)
+            if len(ids) < chunk_size:
+                return updated
     
     @staticmethod
     def delete_notification(notification_id, user=None):
         """Delete a notification"""
         notification = NotificationService.get_notification_by_id(notification_id, user)
-        notification.delete()
+        NotificationService.delete_instance(notification)
         return True
     
+    @staticmethod
+    def delete_instance(notification):
+        """Delete a loaded notification, keeping the recipient's counters in step"""
+        with transaction.atomic():
+            notification.delete()
+            counters.adjust(notification.recipient_id, total=-1, unread=0 if notification.is_read else -1)
+    
+    @staticmethod
+    def get_active_template(notification_type_code):
+        """
+        Get the active template for a notification type, with the type selected
+        
+        Lookups are cached in the shared cache under a version key that is replaced
+        whenever a notification type or template changes. When the cache is down the
+        template is read from the database.
+        """
+        try:
+            version = cache.get_or_set(NotificationService.TEMPLATE_CACHE_VERSION_KEY, time.time_ns, timeout=None)
+            cache_key = f"notifications:template:{version}:{notification_type_code}"
+            template = cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"Could not read cached notification template: {str(e)}")
+            cache_key = template = None
+        if template is not None:
+            return template
+        
+        try:
+            template = NotificationTemplate.objects.select_related('notification_type').get(
+                notification_type__code=notification_type_code,
+                notification_type__is_active=True,
+                is_active=True
+            )
+        except NotificationTemplate.DoesNotExist:
+            if not NotificationType.objects.filter(code=notification_type_code, is_active=True).exists():
+                raise NotificationTypeNotFoundException(f"Notification type with code {notification_type_code} not found")
+            raise NotificationTemplateNotFoundException()
+        
+        if cache_key:
+            try:
+                cache.set(cache_key, template, getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_TTL', 3600))
+            except Exception as e:
+                logger.error(f"Could not cache notification template: {str(e)}")
+        return template
+    
+    @staticmethod
+    def invalidate_template_cache():
+        """Drop all cached type/template lookups"""
+        try:
+            cache.set(NotificationService.TEMPLATE_CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+        except Exception as e:
+            logger.error(f"Could not invalidate cached notification templates: {str(e)}")
+    
+    @staticmethod
+    def render_email(template, template_context):
+        """Render the email subject and body, falling back to the in-app title and content"""
+        subject = render_field(template, 'email_subject' if template.email_subject else 'title', template_context)
+        body = render_field(template, 'email_body' if template.email_body else 'content', template_context)
+        return subject, body
+    
     @staticmethod
     def create_notification(recipient, notification_type_code, context=None, email=False):
         """
@@ -113,7 +209,7 @@ class NotificationService:
             recipient: User to receive the notification
             notification_type_code: Code of the notification type
             context: Dictionary of context variables for templates
-            email: Whether to send an email notification
+            email: Whether to deliver outside the app (email, and SMS for users who opted in)
         
         Returns:
             Created notification object
@@ -121,36 +217,28 @@ class NotificationService:
         if not context:
             context = {}
             
-        # Get notification type
-        try:
-            notification_type = NotificationType.objects.get(code=notification_type_code, is_active=True)
-        except NotificationType.DoesNotExist:
-            raise NotificationTypeNotFoundException(f"Notification type with code {notification_type_code} not found")
+        # Get notification type and template
+        template = NotificationService.get_active_template(notification_type_code)
+        notification_type = template.notification_type
             
         # Check user notification preferences
-        try:
-            preferences = NotificationPreference.objects.get(user=recipient)
-        except NotificationPreference.DoesNotExist:
-            # Create default preferences if none exist
-            preferences = NotificationPreference.objects.create(user=recipient)
-            
-        # Check if this notification type is enabled for the user
-        if not preferences.is_type_enabled(notification_type):
+        preference = preference_cache.get_snapshot(recipient.id)
+        if not preference.is_type_enabled(notification_type):
             return None
             
-        # Get template
-        try:
-            template = NotificationTemplate.objects.get(
-                notification_type=notification_type,
-                is_active=True
-            )
-        except NotificationTemplate.DoesNotExist:
-            raise NotificationTemplateNotFoundException()
-            
         # Render templates with context
         template_context = Context(context)
-        title = Template(template.title).render(template_context)
-        content = Template(template.content).render(template_context)
+        title = render_field(template, 'title', template_context)
+        content = render_field(template, 'content', template_context)
+        
+        # Merge repeats for the same object into the recent unread notification
+        merged = NotificationService.coalesce([recipient.id], notification_type, context, title, content)
+        if merged:
+            notification = Notification.objects.select_related('notification_type').get(pk=merged[recipient.id])
+            realtime.publish_notifications([notification])
+            return notification
+        
+        wants_email = email and preference.email_enabled and bool(recipient.email)
         
         # Create notification
         notification = Notification.objects.create(
@@ -160,73 +248,394 @@ class NotificationService:
             content=content,
             action_url=context.get('action_url', ''),
             content_type=context.get('content_type', ''),
-            object_id=context.get('object_id')
+            object_id=context.get('object_id'),
+            digest_pending=wants_email and preference.wants_digest
         )
+        counters.adjust(recipient.id, total=1, unread=1)
+        realtime.publish_notifications([notification])
         
-        # Send email if enabled for user and requested
-        if email and preferences.email_enabled:
-            email_subject = Template(template.email_subject or template.title).render(template_context)
-            email_body = Template(template.email_body or template.content).render(template_context)
-            
-            try:
-                EmailService.send_notification_email(
-                    recipient.email,
-                    email_subject,
-                    email_body,
-                    context
-                )
-                notification.is_emailed = True
-                notification.emailed_at = timezone.now()
-                notification.save(update_fields=['is_emailed', 'emailed_at'])
-            except Exception as e:
-                # Log error but don't fail the notification creation
-                print(f"Error sending notification email: {str(e)}")
+        # Hand webhook/SMS delivery to the channel workers
+        phone = (
+            NotificationDeliveryService.get_phones([recipient.id]).get(recipient.id)
+            if email and preference.sms_enabled else None
+        )
+        NotificationDeliveryService.queue(
+            NotificationDeliveryService.plan(notification, preference, phone, external=email)
+        )
+        
+        # Queue email if enabled for user and requested, unless it goes out in a digest
+        if wants_email and not notification.digest_pending:
+            email_subject, email_body = NotificationService.render_email(template, template_context)
+            EmailService.queue_notification_emails([notification], email_subject, email_body)
                 
         return notification
     
+    @staticmethod
+    def create_notifications_bulk(recipients, notification_type_code, context=None, email=False):
+        """
+        Create the same notification for many recipients
+        
+        The type, template and every recipient's preferences are loaded up front, the
+        templates are rendered once, and all notifications are inserted in a single
+        query. Emails and webhook/SMS deliveries are queued in one query each and sent
+        by per-channel background workers.
+        
+        Args:
+            recipients: Users (or a queryset of users) to receive the notification
+            notification_type_code: Code of the notification type
+            context: Dictionary of context variables for templates
+            email: Whether to deliver outside the app (email, and SMS for users who opted in)
+        
+        Returns:
+            List of created notification objects; repeats merged into an existing
+            notification are not included
+        """
+        if not context:
+            context = {}
+        
+        recipients = list(recipients)
+        if not recipients:
+            return []
+        
+        # Get notification type and template
+        template = NotificationService.get_active_template(notification_type_code)
+        notification_type = template.notification_type
+        
+        # Load every recipient's preferences, from the cache where possible
+        snapshots = preference_cache.get_snapshots([recipient.id for recipient in recipients])
+        
+        # Render templates once for all recipients
+        template_context = Context(context)
+        title = render_field(template, 'title', template_context)
+        content = render_field(template, 'content', template_context)
+        
+        recipients = [
+            recipient for recipient in recipients
+            if snapshots[recipient.id].is_type_enabled(notification_type)
+        ]
+        
+        # Merge repeats for the same object into recipients' recent unread notifications
+        merged = NotificationService.coalesce(
+            [recipient.id for recipient in recipients], notification_type, context, title, content
+        )
+        
+        notifications = []
+        email_notifications = []
+        for recipient in recipients:
+            if recipient.id in merged:
+                continue
+            preference = snapshots[recipient.id]
+            wants_email = email and preference.email_enabled and bool(recipient.email)
+            notification = Notification(
+                recipient=recipient,
+                notification_type=notification_type,
+                title=title,
+                content=content,
+                action_url=context.get('action_url', ''),
+                content_type=context.get('content_type', ''),
+                object_id=context.get('object_id'),
+                digest_pending=wants_email and preference.wants_digest
+            )
+            notifications.append(notification)
+            if wants_email and not notification.digest_pending:
+                email_notifications.append(notification)
+        
+        Notification.objects.bulk_create(notifications)
+        counters.adjust_many({notification.recipient_id: (1, 1) for notification in notifications})
+        realtime.publish_notifications(notifications)
+        
+        # Hand webhook/SMS delivery to the channel workers
+        phones = NotificationDeliveryService.get_phones([
+            notification.recipient_id for notification in notifications
+            if email and snapshots[notification.recipient_id].sms_enabled
+        ])
+        NotificationDeliveryService.queue([
+            delivery
+            for notification in notifications
+            for delivery in NotificationDeliveryService.plan(
+                notification, snapshots[notification.recipient_id], phones.get(notification.recipient_id), external=email
+            )
+        ])
+        
+        if email_notifications:
+            email_subject, email_body = NotificationService.render_email(template, template_context)
+            EmailService.queue_notification_emails(email_notifications, email_subject, email_body)
+        
+        return notifications
+    
+    @staticmethod
+    def coalesce(recipient_ids, notification_type, context, title, content):
+        """
+        Merge a repeat notification into each recipient's recent unread one
+        
+        A notification of the same type for the same content_type/object_id created
+        within the type's coalescing window is updated to the latest title and content
+        and its aggregate_count incremented, instead of adding another row. Repeats
+        about no object are grouped by type alone.
+        
+        Returns:
+            Dict of recipient ID to the ID of the notification that absorbed the repeat
+        """
+        window = notification_type.get_coalesce_window()
+        if not window or not recipient_ids:
+            return {}
+        
+        now = timezone.now()
+        if context.get('object_id') is None:
+            subject = Q(object_id__isnull=True)
+        else:
+            subject = Q(content_type=context.get('content_type', ''), object_id=context['object_id'])
+        merged = dict(
+            Notification.objects.filter(
+                subject,
+                recipient_id__in=recipient_ids,
+                notification_type=notification_type,
+                is_read=False,
+                created_at__gte=now - timedelta(seconds=window)
+            )
+            .order_by('recipient_id', '-created_at')
+            .distinct('recipient_id')
+            .values_list('recipient_id', 'id')
+        )
+        if merged:
+            Notification.objects.filter(pk__in=merged.values()).update(
+                title=title,
+                content=content,
+                action_url=context.get('action_url', ''),
+                aggregate_count=F('aggregate_count') + 1,
+                updated_at=now
+            )
+        return merged
+    
+    @staticmethod
+    def send_digests(batch_size=500):
+        """
+        Queue a digest email for every user whose digest interval has elapsed
+        
+        Each digest lists the user's pending notifications. Preferences are claimed
+        with SKIP LOCKED so concurrent runs never send the same digest twice.
+        
+        Returns:
+            Number of preferences claimed, including those that needed no email
+        """
+        now = timezone.now()
+        due = Q()
+        for interval, period in NotificationPreference.DIGEST_INTERVALS.items():
+            # A first digest waits a full interval from when the user opted in
+            due |= Q(digest_interval=interval) & (
+                Q(last_digest_at__lte=now - period) | Q(last_digest_at__isnull=True, updated_at__lte=now - period)
+            )
+        pending = Notification.objects.filter(recipient_id=OuterRef('user_id'), digest_pending=True)
+        
+        with transaction.atomic():
+            preferences = list(
+                NotificationPreference.objects.select_for_update(skip_locked=True, of=('self',))
+                .exclude(digest_interval='IMMEDIATE')
+                .filter(due, Exists(pending))
+                .select_related('user')
+                .order_by('id')[:batch_size]
+            )
+            if not preferences:
+                return 0
+            
+            notifications = {}
+            for notification in (
+                Notification.objects.filter(
+                    recipient_id__in=[preference.user_id for preference in preferences],
+                    digest_pending=True
+                ).order_by('-updated_at')
+            ):
+                notifications.setdefault(notification.recipient_id, []).append(notification)
+            
+            records = []
+            for preference in preferences:
+                user = preference.user
+                items = notifications.get(user.id, [])
+                if not items or not preference.email_enabled or not user.email:
+                    continue
+                digest_context = Context({
+                    'user': user,
+                    'notifications': items,
+                    'count': sum(item.aggregate_count for item in items),
+                    'frontend_url': (
+                        settings.CLIENT_FRONTEND_URL if user.role == 'CLIENT' else settings.ADMIN_FRONTEND_URL
+                    ),
+                })
+                records.append(EmailRecord(
+                    name='NOTIFICATION_DIGEST',
+                    subject=DIGEST_SUBJECT.render(digest_context).strip(),
+                    body=DIGEST_BODY.render(digest_context),
+                    client=user,
+                    recipient_email=user.email
+                ))
+            EmailService.queue_emails(records)
+            
+            Notification.objects.filter(
+                recipient_id__in=[record.client_id for record in records], digest_pending=True
+            ).update(digest_pending=False, is_emailed=True, emailed_at=now)
+            # Users who turned email off since: drop what they would have received
+            Notification.objects.filter(
+                recipient_id__in=[preference.user_id for preference in preferences], digest_pending=True
+            ).update(digest_pending=False)
+            NotificationPreference.objects.filter(pk__in=[preference.pk for preference in preferences]).update(
+                last_digest_at=now, updated_at=now
+            )
+            logger.info(f"Queued {len(records)} notification digests for {len(preferences)} due users")
+            return len(preferences)
+    
+    @staticmethod
+    def archive_notifications(category, days, batch_size=1000):
+        """
+        Move one batch of a category's read notifications older than `days` to the archive
+        
+        Rows are claimed with SKIP LOCKED in a short transaction so the job never
+        blocks, or waits on, users reading their notifications. With
+        NOTIFICATION_ARCHIVE_ENABLED off they are deleted instead.
+        
+        Returns:
+            Number of notifications removed from the hot table
+        """
+        now = timezone.now()
+        type_ids = list(NotificationType.objects.filter(category=category).values_list('id', flat=True))
+        if not type_ids:
+            return 0
+        
+        with transaction.atomic():
+            rows = list(
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(notification_type_id__in=type_ids, is_read=True, created_at__lt=now - timedelta(days=days))
+                .order_by()
+                .values(
+                    'id', 'recipient_id', 'notification_type_id', 'title', 'content', 'read_at',
+                    'action_url', 'content_type', 'object_id', 'aggregate_count', 'created_at'
+                )[:batch_size]
+            )
+            if not rows:
+                return 0
+            
+            ids = [row.pop('id') for row in rows]
+            if getattr(settings, 'NOTIFICATION_ARCHIVE_ENABLED', True):
+                NotificationArchive.objects.bulk_create([
+                    NotificationArchive(notification_id=notification_id, archived_at=now, updated_at=now, **row)
+                    for notification_id, row in zip(ids, rows)
+                ])
+            Notification.objects.filter(pk__in=ids).delete()
+            
+            removed = {}
+            for row in rows:
+                removed[row['recipient_id']] = removed.get(row['recipient_id'], 0) - 1
+            counters.adjust_many({user_id: (total, 0) for user_id, total in removed.items()})
+            return len(rows)
+    
+    @staticmethod
+    def purge_archive(days, batch_size=1000):
+        """Delete one batch of archived notifications archived more than `days` ago"""
+        ids = list(
+            NotificationArchive.objects.filter(archived_at__lt=timezone.now() - timedelta(days=days))
+            .order_by()
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            NotificationArchive.objects.filter(pk__in=ids).delete()
+        return len(ids)
+    
     @staticmethod
     def bulk_action(user_id, notification_ids, action):
-        """Perform bulk actions on multiple notifications"""
+        """
+        Perform bulk actions on multiple notifications
+        
+        Each chunk of IDs is changed by a single UPDATE/DELETE ... RETURNING
+        statement; the returned rows drive the counter and realtime updates.
+        """
         if not notification_ids:
             raise InvalidNotificationDataException("No notification IDs provided")
-            
-        notifications = Notification.objects.filter(
-            recipient_id=user_id,
-            id__in=notification_ids
-        )
+        if action not in ('mark_read', 'mark_unread', 'delete'):
+            raise InvalidNotificationDataException(f"Unknown action: {action}")
         
-        if not notifications.exists():
-            raise NotificationNotFoundException("No matching notifications found")
-            
+        notification_ids = list(dict.fromkeys(notification_ids))
+        chunk_size = getattr(settings, 'NOTIFICATION_BULK_CHUNK_SIZE', 1000)
+        changed = 0
         with transaction.atomic():
-            if action == 'mark_read':
-                now = timezone.now()
-                return notifications.filter(is_read=False).update(
-                    is_read=True, 
-                    read_at=now, 
-                    updated_at=now
-                )
-            elif action == 'mark_unread':
-                now = timezone.now()
-                return notifications.filter(is_read=True).update(
-                    is_read=False, 
-                    read_at=None, 
-                    updated_at=now
-                )
-            elif action == 'delete':
-                count = notifications.count()
-                notifications.delete()
-                return count
+            for start in range(0, len(notification_ids), chunk_size):
+                chunk = notification_ids[start:start + chunk_size]
+                if action == 'delete':
+                    changed += len(NotificationService._delete_returning(user_id, chunk))
+                else:
+                    changed += len(NotificationService._set_read_state(user_id, action == 'mark_read', ids=chunk))
+            
+            # Only look further when nothing changed: already in that state, or not theirs
+            if not changed and not Notification.objects.filter(
+                recipient_id=user_id, id__in=notification_ids
+            ).exists():
+                raise NotificationNotFoundException("No matching notifications found")
+        return changed
+    
+    @staticmethod
+    def _set_read_state(user_id, is_read, ids=None, limit=None):
+        """
+        Flip a user's notifications to is_read in one statement, returning the changed IDs
+        
+        Either the given IDs or, with a limit, the oldest matching rows are updated.
+        """
+        table = connection.ops.quote_name(Notification._meta.db_table)
+        now = timezone.now()
+        params = [is_read, now if is_read else None, now, user_id, not is_read]
+        if ids is not None:
+            target = "id = ANY(%s)"
+            params.append(list(ids))
+        else:
+            target = f"id IN (SELECT id FROM {table} WHERE recipient_id = %s AND is_read = %s ORDER BY id LIMIT %s FOR UPDATE)"
+            params += [user_id, not is_read, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET is_read = %s, read_at = %s, updated_at = %s "
+                f"WHERE recipient_id = %s AND is_read = %s AND {target} RETURNING id",
+                params
+            )
+            changed = [row[0] for row in cursor.fetchall()]
+        
+        if changed:
+            counters.adjust(user_id, unread=-len(changed) if is_read else len(changed))
+            realtime.publish_changes(user_id, 'read' if is_read else 'unread', changed)
+        return changed
+    
+    @staticmethod
+    def _delete_returning(user_id, ids):
+        """
+        Delete a user's notifications in one statement, returning (id, is_read) rows
+        
+        Skips the ORM collector; the same statement detaches queued emails and
+        removes pending channel deliveries, as their on_delete rules would.
+        """
+        table = connection.ops.quote_name(Notification._meta.db_table)
+        email_table = connection.ops.quote_name(EmailRecord._meta.db_table)
+        delivery_table = connection.ops.quote_name(NotificationDelivery._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH deleted AS ("
+                f"DELETE FROM {table} WHERE recipient_id = %s AND id = ANY(%s) RETURNING id, is_read"
+                f"), detached AS ("
+                f"UPDATE {email_table} SET notification_id = NULL WHERE notification_id IN (SELECT id FROM deleted)"
+                f"), cancelled AS ("
+                f"DELETE FROM {delivery_table} WHERE notification_id IN (SELECT id FROM deleted)"
+                f") SELECT id, is_read FROM deleted",
+                [user_id, list(ids)]
+            )
+            deleted = cursor.fetchall()
+        
+        if deleted:
+            counters.adjust(
+                user_id,
+                total=-len(deleted),
+                unread=-sum(1 for _, is_read in deleted if not is_read)
+            )
+            realtime.publish_changes(user_id, 'deleted', [notification_id for notification_id, _ in deleted])
+        return deleted
                 
     @staticmethod
     def get_notification_counts(user_id):
-        """Get notification counts for a user"""
-        total = Notification.objects.filter(recipient_id=user_id).count()
-        unread = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
-        return {
-            'total': total,
-            'unread': unread
-        }
+        """Get notification counts for a user from the cached counters"""
+        return counters.get_counts(user_id)
     
     @staticmethod
     def get_or_create_user_preferences(user_id):
@@ -243,8 +652,29 @@ class NotificationService:
             preferences = NotificationService.get_or_create_user_preferences(user_id)
             
             # Update simple boolean fields
+            if 'digest_interval' in preference_data:
+                if preference_data['digest_interval'] not in dict(NotificationPreference.DIGEST_CHOICES):
+                    raise InvalidNotificationDataException("Invalid digest interval")
+                if preference_data['digest_interval'] != preferences.digest_interval:
+                    # The first digest covers one interval from now, not everything so far
+                    preferences.last_digest_at = timezone.now()
+                preferences.digest_interval = preference_data['digest_interval']
+            
+            if 'webhook_url' in preference_data:
+                webhook_url = preference_data['webhook_url'] or ''
+                if webhook_url:
+                    try:
+                        URLValidator(schemes=['https', 'http'])(webhook_url)
+                    except ValidationError:
+                        raise InvalidNotificationDataException("Invalid webhook URL")
+                    try:
+                        resolve_webhook_address(webhook_url)
+                    except (UnsafeWebhookAddress, OSError):
+                        raise InvalidNotificationDataException("Webhook URL must resolve to a public address")
+                preferences.webhook_url = webhook_url
+            
             for field in [
-                'email_enabled', 'in_app_enabled',
+                'email_enabled', 'in_app_enabled', 'sms_enabled',
                 'system_notifications', 'event_notifications', 
                 'task_notifications', 'payment_notifications',
                 'client_notifications', 'contract_notifications'
@@ -262,4 +692,141 @@ class NotificationService:
                     preferences.disabled_types.add(*notification_types)
             
             preferences.save()
-            return preferences
\ No newline at end of file
+            return preferences
+
+
+class NotificationDeliveryService:
+    """Service for delivering notifications on external channels (webhook, SMS)"""
+    
+    SCHEDULED_KEY = 'notifications:delivery-scheduled:{channel}'
+    
+    @staticmethod
+    def plan(notification, preference, phone=None, external=False):
+        """
+        Build the external deliveries a new notification needs
+        
+        Webhooks receive every notification; SMS only goes out when the caller
+        asked for delivery outside the app (the email flag) and the user opted in.
+        """
+        deliveries = []
+        if preference.webhook_url:
+            deliveries.append(NotificationDelivery(
+                notification=notification, channel='WEBHOOK', destination=preference.webhook_url
+            ))
+        if external and preference.sms_enabled and phone:
+            deliveries.append(NotificationDelivery(notification=notification, channel='SMS', destination=phone))
+        return deliveries
+    
+    @staticmethod
+    def get_phones(user_ids):
+        """Profile phone numbers for users, in one query"""
+        if not user_ids:
+            return {}
+        return dict(
+            UserProfile.objects.filter(user_id__in=user_ids)
+            .exclude(phone__isnull=True)
+            .exclude(phone='')
+            .values_list('user_id', 'phone')
+        )
+    
+    @staticmethod
+    def queue(deliveries):
+        """Store deliveries in one query and wake each channel's worker once the transaction commits"""
+        if not deliveries:
+            return []
+        NotificationDelivery.objects.bulk_create(deliveries)
+        for channel in {delivery.channel for delivery in deliveries}:
+            transaction.on_commit(lambda channel=channel: NotificationDeliveryService.schedule(channel))
+        return deliveries
+    
+    @staticmethod
+    def schedule(channel):
+        """Queue a delivery run for a channel, coalescing bursts into one task per batch window"""
+        from .tasks import deliver_notification_channel
+        
+        delay = getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_DELAY', 1)
+        try:
+            if cache.add(NotificationDeliveryService.SCHEDULED_KEY.format(channel=channel), 1, timeout=delay):
+                deliver_notification_channel.apply_async((channel,), countdown=delay)
+        except Exception as e:
+            # The deliveries are stored; the periodic sweep will pick them up
+            logger.error(f"Could not schedule {channel} delivery: {str(e)}")
+    
+    @staticmethod
+    def claim(channel, batch_size):
+        """
+        Claim a batch of a channel's due deliveries for this worker
+        
+        Rows are locked with SKIP LOCKED only long enough to lease them for
+        NOTIFICATION_DELIVERY_LEASE seconds, so no transport call runs inside a
+        transaction and a crashed worker's deliveries become due again.
+        """
+        now = timezone.now()
+        lease = timedelta(seconds=getattr(settings, 'NOTIFICATION_DELIVERY_LEASE', 300))
+        with transaction.atomic():
+            deliveries = list(
+                NotificationDelivery.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(channel=channel, status='PENDING')
+                .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+                .select_related('notification__notification_type')
+                .order_by('next_attempt_at', 'id')[:batch_size]
+            )
+            if deliveries:
+                NotificationDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+                    next_attempt_at=now + lease
+                )
+        return deliveries
+    
+    @staticmethod
+    def deliver(channel_code, batch_size=None):
+        """
+        Deliver one batch of a channel's pending notifications
+        
+        Each delivery is retried with the channel's backoff up to its max_attempts,
+        and sending stops early when the channel's shared rate limit is used up.
+        Statuses are written back in one query.
+        
+        Returns:
+            Tuple of (deliveries claimed, seconds until the rate limit resets or None)
+        """
+        channel = CHANNELS[channel_code]
+        policy = channel.policy
+        deliveries = NotificationDeliveryService.claim(channel_code, batch_size or policy['batch_size'])
+        if not deliveries:
+            return 0, None
+        
+        limiter = RateLimiter(
+            f"notifications:{channel_code.lower()}", policy['rate_limit'], policy['rate_limit_period']
+        )
+        retry_after = None
+        for delivery in deliveries:
+            now = timezone.now()
+            delivery.updated_at = now
+            if retry_after is not None or not limiter.acquire():
+                # Out of quota: try again when the window resets, without using an attempt
+                retry_after = limiter.retry_after()
+                delivery.next_attempt_at = now + timedelta(seconds=retry_after)
+                continue
+            
+            delivery.attempts += 1
+            try:
+                channel.send(delivery)
+            except Exception as e:
+                logger.error(f"Error delivering notification {delivery.notification_id} by {channel_code}: {str(e)}")
+                delivery.last_error = str(e)
+                if isinstance(e, PermanentDeliveryError) or delivery.attempts >= policy['max_attempts']:
+                    delivery.status = 'FAILED'
+                    delivery.next_attempt_at = None
+                else:
+                    delivery.next_attempt_at = now + timedelta(seconds=channel.retry_delay(delivery.attempts))
+                continue
+            
+            delivery.status = 'SENT'
+            delivery.delivered_at = now
+            delivery.next_attempt_at = None
+            delivery.last_error = ''
+        
+        NotificationDelivery.objects.bulk_update(
+            deliveries, ['status', 'attempts', 'next_attempt_at', 'last_error', 'delivered_at', 'updated_at']
+        )
+        return len(deliveries), retry_after
@@ -1,12 +1,14 @@
 # backend/core/domains/notifications/signals.py
 from core.domains.contracts.models import EventContract
-from core.domains.events.models import Event, EventTask
+from core.domains.events.models import Event, EventTask, EventTimeline
 from core.domains.payments.models import Payment
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import NotificationPreference
+from . import preferences, realtime
+from .models import NotificationPreference, NotificationTemplate, NotificationType
 from .services import NotificationService
 
 User = get_user_model()
@@ -18,6 +20,36 @@ def create_notification_preferences(sender, instance, created, **kwargs):
     if created:
         NotificationPreference.objects.create(user=instance)
         
+@receiver([post_save, post_delete], sender=NotificationType)
+@receiver([post_save, post_delete], sender=NotificationTemplate)
+def invalidate_notification_template_cache(sender, **kwargs):
+    """Drop cached type/template lookups now and again once the change is visible"""
+    NotificationService.invalidate_template_cache()
+    transaction.on_commit(NotificationService.invalidate_template_cache)
+
+@receiver([post_save, post_delete], sender=NotificationPreference)
+def invalidate_preference_snapshot(sender, instance, **kwargs):
+    """Drop the user's cached preference snapshot when their preferences change"""
+    preferences.invalidate([instance.user_id])
+
+@receiver(m2m_changed, sender=NotificationPreference.disabled_types.through)
+def invalidate_preference_snapshot_types(sender, instance, action, pk_set, reverse, **kwargs):
+    """Drop cached snapshots when disabled types are added or removed"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        preferences.invalidate([instance.user_id])
+    elif pk_set:
+        preferences.invalidate(
+            NotificationPreference.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)
+        )
+
+@receiver(post_save, sender=EventTimeline)
+def publish_timeline_entry(sender, instance, created, **kwargs):
+    """Push new timeline entries to open realtime streams"""
+    if created:
+        realtime.publish_timeline([instance])
+
 @receiver(post_save, sender=User)
 def user_notifications(sender, instance, created, **kwargs):
     """Generate notifications for user changes"""
@@ -27,19 +59,18 @@ def user_notifications(sender, instance, created, **kwargs):
         print(f"CLIENT created signal fired for user: {instance.id} - {instance.email}")
         
         # Notify admins about new client
-        for admin in User.objects.filter(is_staff=True, is_active=True):
-            NotificationService.create_notification(
-                recipient=admin,
-                notification_type_code='CLIENT_CREATED',
-                context={
-                    'client_id': instance.id,
-                    'client_name': f"{instance.first_name} {instance.last_name}",
-                    'action_url': f'/clients/{instance.id}',
-                    'content_type': 'user',
-                    'object_id': instance.id
-                },
-                email=True
-            )
+        NotificationService.create_notifications_bulk(
+            recipients=User.objects.filter(is_staff=True, is_active=True),
+            notification_type_code='CLIENT_CREATED',
+            context={
+                'client_id': instance.id,
+                'client_name': f"{instance.first_name} {instance.last_name}",
+                'action_url': f'/clients/{instance.id}',
+                'content_type': 'user',
+                'object_id': instance.id
+            },
+            email=True
+        )
 
 # Event-related notification signals
 @receiver(post_save, sender=Event)
@@ -49,20 +80,19 @@ def event_notifications(sender, instance, created, update_fields, **kwargs):
     if not created and (update_fields is None or 'status' in update_fields):
         if instance.status == 'CONFIRMED':
             # Notify admins about event confirmation
-            for admin in User.objects.filter(is_staff=True, is_active=True):
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type_code='EVENT_CONFIRMED',
-                    context={
-                        'event_id': instance.id,
-                        'event_name': instance.name,
-                        'client_name': instance.client_name,
-                        'action_url': f'/events/{instance.id}',
-                        'content_type': 'event',
-                        'object_id': instance.id
-                    },
-                    email=True
-                )
+            NotificationService.create_notifications_bulk(
+                recipients=User.objects.filter(is_staff=True, is_active=True),
+                notification_type_code='EVENT_CONFIRMED',
+                context={
+                    'event_id': instance.id,
+                    'event_name': instance.name,
+                    'client_name': instance.client_name,
+                    'action_url': f'/events/{instance.id}',
+                    'content_type': 'event',
+                    'object_id': instance.id
+                },
+                email=True
+            )
 
 # Task-related notification signals
 @receiver(post_save, sender=EventTask)
@@ -110,21 +140,20 @@ def contract_notifications(sender, instance, created, update_fields, **kwargs):
     if not created and (update_fields is None or 'status' in update_fields):
         if instance.status == 'SIGNED':
             # Notify admins about contract signing
-            for admin in User.objects.filter(is_staff=True, is_active=True):
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type_code='CONTRACT_SIGNED',
-                    context={
-                        'contract_id': instance.id,
-                        'contract_name': instance.template_name,
-                        'event_name': instance.event.name if isinstance(instance.event, Event) else 'Unknown Event',
-                        'client_name': instance.event.client_name if isinstance(instance.event, Event) else 'Unknown Client',
-                        'action_url': f'/contracts/{instance.id}',
-                        'content_type': 'contract',
-                        'object_id': instance.id
-                    },
-                    email=True
-                )
+            NotificationService.create_notifications_bulk(
+                recipients=User.objects.filter(is_staff=True, is_active=True),
+                notification_type_code='CONTRACT_SIGNED',
+                context={
+                    'contract_id': instance.id,
+                    'contract_name': instance.template_name,
+                    'event_name': instance.event.name if isinstance(instance.event, Event) else 'Unknown Event',
+                    'client_name': instance.event.client_name if isinstance(instance.event, Event) else 'Unknown Client',
+                    'action_url': f'/contracts/{instance.id}',
+                    'content_type': 'contract',
+                    'object_id': instance.id
+                },
+                email=True
+            )
 
 # Payment-related notification signals
 @receiver(post_save, sender=Payment)
@@ -133,19 +162,18 @@ def payment_notifications(sender, instance, created, update_fields, **kwargs):
     if not created and (update_fields is None or 'status' in update_fields):
         if instance.status == 'COMPLETED':
             # Notify admins about payment completion
-            for admin in User.objects.filter(is_staff=True, is_active=True):
-                NotificationService.create_notification(
-                    recipient=admin,
-                    notification_type_code='PAYMENT_RECEIVED',
-                    context={
-                        'payment_id': instance.id,
-                        'payment_number': instance.payment_number,
-                        'amount': instance.amount,
-                        'event_name': instance.event.name if isinstance(instance.event, Event) else 'Unknown Event',
-                        'client_name': instance.event.client_name if isinstance(instance.event, Event) else 'Unknown Client',
-                        'action_url': f'/payments/{instance.id}',
-                        'content_type': 'payment',
-                        'object_id': instance.id
-                    },
-                    email=True
-                )
\ No newline at end of file
+            NotificationService.create_notifications_bulk(
+                recipients=User.objects.filter(is_staff=True, is_active=True),
+                notification_type_code='PAYMENT_RECEIVED',
+                context={
+                    'payment_id': instance.id,
+                    'payment_number': instance.payment_number,
+                    'amount': instance.amount,
+                    'event_name': instance.event.name if isinstance(instance.event, Event) else 'Unknown Event',
+                    'client_name': instance.event.client_name if isinstance(instance.event, Event) else 'Unknown Client',
+                    'action_url': f'/payments/{instance.id}',
+                    'content_type': 'payment',
+                    'object_id': instance.id
+                },
+                email=True
+            )
\ No newline at end of file
@@ -0,0 +1,97 @@
+# backend/core/domains/notifications/tasks.py
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_notification_digests(batch_size=500):
+    """Queue digest emails for users whose digest interval has elapsed, returning how many users were due"""
+    from core.domains.notifications.services import NotificationService
+
+    total = 0
+    while True:
+        # Loop on claimed preferences: a batch can be full yet queue few emails
+        claimed = NotificationService.send_digests(batch_size)
+        total += claimed
+        if claimed < batch_size:
+            break
+    return total
+
+
+@shared_task
+def reconcile_notification_counts(minutes=None):
+    """Rebuild cached counters for users whose notifications changed recently"""
+    from core.domains.notifications import counters
+
+    minutes = minutes or getattr(settings, 'NOTIFICATION_COUNTS_RECONCILE_MINUTES', 15)
+    rebuilt = counters.reconcile(timezone.now() - timedelta(minutes=minutes))
+
+    if rebuilt:
+        logger.info(f"Reconciled notification counters for {rebuilt} users")
+    return rebuilt
+
+
+@shared_task
+def archive_notifications(batch_size=None):
+    """Apply NOTIFICATION_RETENTION_DAYS to read notifications and purge the archive"""
+    from core.domains.notifications.services import NotificationService
+
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000)
+    total = 0
+    for category, days in getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {}).items():
+        if days is None:
+            continue
+        while True:
+            archived = NotificationService.archive_notifications(category, days, batch_size)
+            total += archived
+            if archived < batch_size:
+                break
+
+    purged = 0
+    archive_days = getattr(settings, 'NOTIFICATION_ARCHIVE_RETENTION_DAYS', None)
+    if archive_days is not None:
+        while True:
+            deleted = NotificationService.purge_archive(archive_days, batch_size)
+            purged += deleted
+            if deleted < batch_size:
+                break
+
+    if total or purged:
+        logger.info(f"Archived {total} notifications and purged {purged} archived notifications")
+    return total
+
+
+@shared_task
+def deliver_notification_channel(channel, batch_size=None):
+    """Drain one external channel's delivery queue in batches (routed to the channel's own queue)"""
+    from core.domains.notifications.channels import CHANNELS
+    from core.domains.notifications.services import NotificationDeliveryService
+
+    batch_size = batch_size or CHANNELS[channel].policy['batch_size']
+    claimed, retry_after = NotificationDeliveryService.deliver(channel, batch_size)
+
+    if retry_after is not None:
+        # Rate limited: pick up again when the channel's quota window resets
+        deliver_notification_channel.apply_async((channel, batch_size), countdown=retry_after)
+    elif claimed >= batch_size:
+        # A full batch means more deliveries are probably waiting
+        deliver_notification_channel.delay(channel, batch_size)
+
+    if claimed:
+        logger.info(f"Processed {claimed} {channel} notification deliveries")
+    return claimed
+
+
+@shared_task
+def sweep_notification_channels():
+    """Queue a delivery run for every external channel"""
+    from core.domains.notifications.channels import CHANNELS
+
+    for channel in CHANNELS:
+        deliver_notification_channel.delay(channel)
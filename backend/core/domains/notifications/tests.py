@@ -1,20 +1,39 @@
 # backend/core/domains/notifications/tests.py
+import logging
+import socket
+import time
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from asgiref.sync import async_to_sync
+from core.domains.communications import bodies
+from core.domains.communications.models import EmailRecord
+from core.domains.communications.services import EmailService
+from core.utils import accesslog
+from core.utils.testing import LOCMEM_CACHE
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from . import channels, counters, preferences, realtime
+from .exceptions import InvalidNotificationDataException, NotificationNotFoundException
 from .models import (
     Notification,
+    NotificationArchive,
+    NotificationDelivery,
     NotificationPreference,
     NotificationTemplate,
     NotificationType,
 )
-from .services import NotificationService
+from .services import NotificationDeliveryService, NotificationService
+from .tasks import archive_notifications
 
 User = get_user_model()
 
+@override_settings(CACHES=LOCMEM_CACHE)
 class NotificationModelTests(TestCase):
     """Test the notification models"""
     
@@ -77,6 +96,7 @@ class NotificationModelTests(TestCase):
         self.assertEqual(str(self.notification), f'Test Type for {self.user.email}')
 
 
+@override_settings(CACHES=LOCMEM_CACHE)
 class NotificationServiceTests(TestCase):
     """Test the notification service"""
     
@@ -223,6 +243,33 @@ class NotificationServiceTests(TestCase):
         self.assertEqual(notification.content_type, 'test')
         self.assertEqual(notification.object_id, 123)
         
+    def test_template_lookup_is_cached(self):
+        """Test that repeated notifications reuse the cached template until it changes"""
+        context = {'name': 'User Name', 'variable': 'Test Variable', 'content_type': 'test'}
+        NotificationService.create_notification(self.user, 'TEST_TYPE', {**context, 'object_id': 1})
+        
+        # Coalescing lookup and insert only; type, template and preferences are cached
+        with self.assertNumQueries(2):
+            NotificationService.create_notification(self.user, 'TEST_TYPE', {**context, 'object_id': 2})
+        
+        self.template.title = 'Updated Title {{ name }}'
+        self.template.save()
+        
+        notification = NotificationService.create_notification(self.user, 'TEST_TYPE', {**context, 'object_id': 3})
+        self.assertEqual(notification.title, 'Updated Title User Name')
+        
+    def test_template_lookup_survives_cache_outage(self):
+        """Test that notifications are still created from the database when the cache is down"""
+        with patch('core.domains.notifications.services.cache') as broken_cache:
+            broken_cache.get_or_set.side_effect = ConnectionError('Redis is down')
+            broken_cache.set.side_effect = ConnectionError('Redis is down')
+            notification = NotificationService.create_notification(
+                self.user, 'TEST_TYPE', {'name': 'User Name', 'variable': 'Test Variable'}
+            )
+            NotificationService.invalidate_template_cache()
+        
+        self.assertEqual(notification.title, 'Test Title User Name')
+        
     def test_bulk_action_mark_read(self):
         """Test bulk marking notifications as read"""
         # Create additional notifications
@@ -288,6 +335,7 @@ class NotificationServiceTests(TestCase):
         self.assertEqual(counts['unread'], 2)
 
 
+@override_settings(CACHES=LOCMEM_CACHE)
 class NotificationAPITests(TestCase):
     """Test the notification API endpoints"""
     
@@ -435,4 +483,547 @@ class NotificationAPITests(TestCase):
         # Verify in database
         prefs = NotificationPreference.objects.get(user=self.user)
         self.assertFalse(prefs.email_enabled)
-        self.assertFalse(prefs.system_notifications)
\ No newline at end of file
+        self.assertFalse(prefs.system_notifications)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NotificationFanOutTests(TestCase):
+    """Test creating one notification for many recipients"""
+    
+    def setUp(self):
+        self.admins = [
+            User.objects.create_user(
+                email=f'admin{i}@example.com',
+                password='adminpassword',
+                role='ADMIN',
+                is_staff=True
+            )
+            for i in range(5)
+        ]
+        
+        self.notification_type = NotificationType.objects.create(
+            code='PAYMENT_RECEIVED',
+            name='Payment Received',
+            category='PAYMENT'
+        )
+        
+        NotificationTemplate.objects.create(
+            notification_type=self.notification_type,
+            title='Payment {{ payment_number }} received',
+            content='Payment of {{ amount }} received',
+            email_subject='Payment {{ payment_number }}',
+            email_body='<p>Payment of {{ amount }} received</p>',
+            is_active=True
+        )
+        
+        # One admin opted out of payment notifications, one out of this type, one out of email
+        self.admins[0].notification_preferences.payment_notifications = False
+        self.admins[0].notification_preferences.save()
+        self.admins[1].notification_preferences.disabled_types.add(self.notification_type)
+        self.admins[2].notification_preferences.email_enabled = False
+        self.admins[2].notification_preferences.save()
+        
+        self.context = {'payment_number': 'PAY-1', 'amount': '500.00', 'action_url': '/payments/1'}
+    
+    def test_bulk_creation_respects_preferences(self):
+        """Test that recipients who opted out are skipped"""
+        notifications = NotificationService.create_notifications_bulk(
+            User.objects.filter(is_staff=True), 'PAYMENT_RECEIVED', self.context
+        )
+        
+        self.assertEqual(
+            {notification.recipient_id for notification in notifications},
+            {self.admins[2].id, self.admins[3].id, self.admins[4].id}
+        )
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(notifications[0].title, 'Payment PAY-1 received')
+    
+    def test_query_count_does_not_grow_with_recipients(self):
+        """Test that fan-out uses a fixed number of queries"""
+        # Recipients, template, preferences, coalescing lookup, notification and email inserts
+        with self.assertNumQueries(6):
+            NotificationService.create_notifications_bulk(
+                User.objects.filter(is_staff=True), 'PAYMENT_RECEIVED', self.context, email=True
+            )
+        
+        # Template and preference snapshots now come from the cache
+        with self.assertNumQueries(4):
+            NotificationService.create_notifications_bulk(
+                User.objects.filter(is_staff=True), 'PAYMENT_RECEIVED',
+                {**self.context, 'object_id': 2}, email=True
+            )
+    
+    def test_preference_changes_invalidate_snapshots(self):
+        """Test that cached preference snapshots follow preference updates"""
+        admin = self.admins[3]
+        self.assertTrue(preferences.get_snapshot(admin.id).is_type_enabled(self.notification_type))
+        
+        NotificationService.update_user_preferences(admin.id, {'disabled_types': [self.notification_type.id]})
+        self.assertFalse(preferences.get_snapshot(admin.id).is_type_enabled(self.notification_type))
+        
+        NotificationService.update_user_preferences(admin.id, {'disabled_types': [], 'email_enabled': False})
+        snapshot = preferences.get_snapshot(admin.id)
+        self.assertTrue(snapshot.is_type_enabled(self.notification_type))
+        self.assertFalse(snapshot.email_enabled)
+        
+        admin.notification_preferences.payment_notifications = False
+        admin.notification_preferences.save()
+        self.assertFalse(preferences.get_snapshot(admin.id).is_category_enabled('PAYMENT'))
+    
+    def test_emails_are_queued_and_delivered_in_one_batch(self):
+        """Test that emails are queued once and sent to email-enabled recipients"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            NotificationService.create_notifications_bulk(
+                User.objects.filter(is_staff=True), 'PAYMENT_RECEIVED', self.context, email=True
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(EmailRecord.objects.filter(status='SCHEDULED').count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        
+        claimed, _ = EmailService.deliver_scheduled()
+        
+        self.assertEqual(claimed, 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [self.admins[3].email, self.admins[4].email]
+        )
+        self.assertEqual(mail.outbox[0].subject, 'Payment PAY-1')
+        self.assertEqual(Notification.objects.filter(is_emailed=True).count(), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, NOTIFICATION_COALESCE_WINDOW=300)
+class NotificationCoalescingTests(TestCase):
+    """Test merging repeat notifications and digest emails"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='assignee@example.com',
+            password='password',
+            first_name='Sam',
+            role='ADMIN'
+        )
+        self.notification_type = NotificationType.objects.create(
+            code='TASK_UPDATED',
+            name='Task Updated',
+            category='TASK'
+        )
+        NotificationTemplate.objects.create(
+            notification_type=self.notification_type,
+            title='Task {{ task }} updated',
+            content='{{ change }}',
+            is_active=True
+        )
+    
+    def notify(self, task_id, change, email=False):
+        return NotificationService.create_notification(
+            self.user,
+            'TASK_UPDATED',
+            {'task': task_id, 'change': change, 'content_type': 'task', 'object_id': task_id},
+            email=email
+        )
+    
+    def test_repeats_for_the_same_object_are_merged(self):
+        """Test that a burst for one object becomes one notification with the latest content"""
+        first = self.notify(1, 'Due date changed')
+        self.notify(1, 'Priority changed')
+        merged = self.notify(1, 'Description changed')
+        self.notify(2, 'Due date changed')
+        
+        self.assertEqual(merged.id, first.id)
+        self.assertEqual(merged.aggregate_count, 3)
+        self.assertEqual(merged.content, 'Description changed')
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 2)
+    
+    def test_repeats_about_no_object_are_merged_by_type(self):
+        """Test that notifications without an object coalesce per notification type"""
+        first = NotificationService.create_notification(self.user, 'TASK_UPDATED', {'task': 1, 'change': 'Sync'})
+        merged = NotificationService.create_notification(
+            self.user, 'TASK_UPDATED', {'task': 2, 'change': 'Sync', 'content_type': 'task'}
+        )
+        
+        self.assertEqual((merged.id, merged.aggregate_count), (first.id, 2))
+        self.assertNotEqual(self.notify(1, 'Due date changed').id, first.id)
+    
+    def test_read_or_old_notifications_are_not_merged(self):
+        """Test that repeats start a new notification once the previous one is read or outside the window"""
+        first = self.notify(1, 'Due date changed')
+        NotificationService.mark_as_read(first.id, self.user)
+        second = self.notify(1, 'Priority changed')
+        self.assertNotEqual(second.id, first.id)
+        
+        Notification.objects.filter(pk=second.pk).update(created_at=timezone.now() - timedelta(minutes=10))
+        third = self.notify(1, 'Description changed')
+        self.assertNotEqual(third.id, second.id)
+        
+        self.notification_type.coalesce_window = 0
+        self.notification_type.save()
+        self.assertNotEqual(self.notify(1, 'Status changed').id, third.id)
+    
+    def test_digest_batches_emails(self):
+        """Test that digest users get one email listing their pending notifications"""
+        NotificationService.update_user_preferences(self.user.id, {'digest_interval': 'HOURLY'})
+        
+        self.notify(1, 'Due date changed', email=True)
+        self.notify(1, 'Priority changed', email=True)
+        self.notify(2, 'Due date changed', email=True)
+        
+        self.assertFalse(EmailRecord.objects.exists())
+        self.assertEqual(Notification.objects.filter(digest_pending=True).count(), 2)
+        
+        # The first digest waits an interval from opting in
+        self.assertEqual(NotificationService.send_digests(), 0)
+        NotificationPreference.objects.filter(user=self.user).update(
+            last_digest_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(NotificationService.send_digests(), 1)
+        
+        record = EmailRecord.objects.get()
+        self.assertEqual(record.recipient_email, self.user.email)
+        self.assertEqual(record.subject, 'You have 3 new notifications')
+        self.assertIn('Task 1 updated', bodies.render(record))
+        self.assertIn('(2 updates)', bodies.render(record))
+        self.assertFalse(Notification.objects.filter(digest_pending=True).exists())
+        
+        # Nothing new and the interval has not elapsed
+        self.notify(3, 'Due date changed', email=True)
+        self.assertEqual(NotificationService.send_digests(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NotificationCounterTests(TestCase):
+    """Test the cached total/unread counters"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='counter@example.com',
+            password='password',
+            role='ADMIN'
+        )
+        self.notification_type = NotificationType.objects.create(
+            code='COUNTER_TYPE',
+            name='Counter Type',
+            category='SYSTEM',
+            coalesce_window=0
+        )
+        NotificationTemplate.objects.create(
+            notification_type=self.notification_type,
+            title='Title',
+            content='Content',
+            is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def assertCounts(self, total, unread):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/notifications/notifications/counts/')
+        self.assertEqual((response.data['total'], response.data['unread']), (total, unread))
+    
+    def test_counts_follow_changes_without_queries(self):
+        """Test that counters are kept in step by every write path and read from the cache"""
+        self.assertEqual(NotificationService.get_notification_counts(self.user.id), {'total': 0, 'unread': 0})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications = [
+                NotificationService.create_notification(self.user, 'COUNTER_TYPE') for _ in range(4)
+            ]
+        self.assertCounts(4, 4)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.mark_as_read(notifications[0].id, self.user)
+        self.assertCounts(4, 3)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.bulk_action(self.user.id, [notifications[1].id, notifications[0].id], 'delete')
+        self.assertCounts(2, 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.mark_all_as_read(self.user)
+        self.assertCounts(2, 0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/notifications/notifications/{notifications[2].id}/')
+        self.assertCounts(1, 0)
+    
+    @override_settings(NOTIFICATION_BULK_CHUNK_SIZE=2)
+    def test_bulk_paths_use_returned_rows(self):
+        """Test that chunked bulk updates and deletes report exactly the rows they changed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications = [
+                NotificationService.create_notification(self.user, 'COUNTER_TYPE') for _ in range(5)
+            ]
+        record = EmailRecord.objects.create(
+            name='Test', subject='Subject', body='Body',
+            recipient_email=self.user.email, notification=notifications[0]
+        )
+        
+        with patch.object(realtime, 'publish_changes') as publish_changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(NotificationService.mark_all_as_read(self.user), 5)
+            self.assertCounts(5, 0)
+            self.assertEqual(
+                sorted(notification_id for call in publish_changes.call_args_list for notification_id in call.args[2]),
+                sorted(notification.id for notification in notifications)
+            )
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                count = NotificationService.bulk_action(
+                    self.user.id, [notifications[0].id, notifications[1].id, notifications[2].id], 'mark_unread'
+                )
+            self.assertEqual(count, 3)
+            self.assertCounts(5, 3)
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                count = NotificationService.bulk_action(
+                    self.user.id, [notifications[0].id, notifications[3].id, 0], 'delete'
+                )
+            self.assertEqual(count, 2)
+            self.assertCounts(3, 2)
+            user_id, event, deleted = publish_changes.call_args.args
+            self.assertEqual((user_id, event), (self.user.id, 'deleted'))
+            self.assertEqual(set(deleted), {notifications[0].id, notifications[3].id})
+        
+        # Queued emails are detached like on_delete=SET_NULL
+        record.refresh_from_db()
+        self.assertIsNone(record.notification_id)
+        
+        # Already in the requested state is not an error; someone else's IDs are
+        self.assertEqual(NotificationService.bulk_action(self.user.id, [notifications[4].id], 'mark_read'), 0)
+        with self.assertRaises(NotificationNotFoundException):
+            NotificationService.bulk_action(self.user.id, [0], 'mark_read')
+    
+    def test_counters_rebuild_on_miss(self):
+        """Test that lost or drifted counters are rebuilt from the database"""
+        NotificationService.create_notification(self.user, 'COUNTER_TYPE')
+        
+        # The on_commit update never ran, so the counters are rebuilt on first read
+        self.assertEqual(NotificationService.get_notification_counts(self.user.id), {'total': 1, 'unread': 1})
+        
+        Notification.objects.filter(recipient=self.user).update(is_read=True, updated_at=timezone.now())
+        counters.reconcile(timezone.now() - timedelta(minutes=1))
+        self.assertCounts(1, 0)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    NOTIFICATION_CHANNELS={
+        'WEBHOOK': {'max_attempts': 2, 'retry_base_delay': 60, 'timeout': 1},
+        'SMS': {'rate_limit': 1, 'rate_limit_period': 3600},
+    }
+)
+class NotificationDeliveryTests(TestCase):
+    """Test webhook/SMS delivery through the per-channel queues"""
+    
+    def resolve(self, *addresses):
+        """Make every host name resolve to the given addresses"""
+        resolver = patch.object(channels.socket, 'getaddrinfo', return_value=[
+            (socket.AF_INET6 if ':' in address else socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 443))
+            for address in addresses
+        ])
+        resolver.start()
+        self.addCleanup(resolver.stop)
+    
+    def setUp(self):
+        # The webhook host resolves to a public address that refuses connections, so
+        # deliveries fail and are retried
+        self.resolve('93.184.215.14')
+        refuse = patch.object(channels.socket, 'create_connection', side_effect=ConnectionRefusedError)
+        refuse.start()
+        self.addCleanup(refuse.stop)
+        
+        self.user = User.objects.create_user(email='channels@example.com', password='password', role='ADMIN')
+        self.user.profile.phone = '+15550100'
+        self.user.profile.save()
+        NotificationService.update_user_preferences(self.user.id, {
+            'sms_enabled': True,
+            'webhook_url': 'https://hooks.example.com/hook',
+        })
+        notification_type = NotificationType.objects.create(
+            code='CHANNEL_TYPE', name='Channel Type', category='SYSTEM', coalesce_window=0
+        )
+        NotificationTemplate.objects.create(
+            notification_type=notification_type, title='Title', content='Content', is_active=True
+        )
+    
+    def test_channels_are_queued_and_delivered_independently(self):
+        """Test that each channel records its own status, retries and rate limit"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            notification = NotificationService.create_notification(self.user, 'CHANNEL_TYPE', email=True)
+            NotificationService.create_notification(self.user, 'CHANNEL_TYPE')
+        
+        # Webhook for both, SMS only where delivery outside the app was requested
+        deliveries = NotificationDelivery.objects.filter(notification__recipient=self.user)
+        self.assertEqual(deliveries.filter(channel='WEBHOOK').count(), 2)
+        self.assertEqual(list(deliveries.filter(channel='SMS').values_list('notification_id', flat=True)), [notification.id])
+        self.assertEqual(deliveries.filter(status='PENDING').count(), 3)
+        self.assertTrue(callbacks)
+        
+        self.assertEqual(NotificationDeliveryService.deliver('SMS'), (1, None))
+        sms = deliveries.get(channel='SMS')
+        self.assertEqual((sms.status, sms.destination, sms.attempts), ('SENT', '+15550100', 1))
+        
+        claimed, _ = NotificationDeliveryService.deliver('WEBHOOK')
+        self.assertEqual(claimed, 2)
+        for delivery in deliveries.filter(channel='WEBHOOK'):
+            self.assertEqual((delivery.status, delivery.attempts), ('PENDING', 1))
+            self.assertGreater(delivery.next_attempt_at, timezone.now())
+        
+        deliveries.filter(channel='WEBHOOK').update(next_attempt_at=timezone.now())
+        NotificationDeliveryService.deliver('WEBHOOK')
+        self.assertEqual(deliveries.filter(channel='WEBHOOK', status='FAILED').count(), 2)
+        
+        # The SMS quota (1 per hour) defers the next text without using an attempt
+        NotificationService.create_notification(self.user, 'CHANNEL_TYPE', email=True)
+        claimed, retry_after = NotificationDeliveryService.deliver('SMS')
+        self.assertEqual(claimed, 1)
+        self.assertIsNotNone(retry_after)
+        self.assertEqual(deliveries.filter(channel='SMS', status='PENDING', attempts=0).count(), 1)
+    
+    def test_webhooks_to_internal_addresses_are_refused(self):
+        """Test that webhook URLs resolving to non-public addresses are rejected on save and on send"""
+        for address in ('127.0.0.1', '10.0.0.5', '169.254.169.254', '::1', '::ffff:192.168.0.1'):
+            self.resolve('93.184.215.14', address)
+            with self.assertRaises(InvalidNotificationDataException):
+                NotificationService.update_user_preferences(self.user.id, {'webhook_url': 'https://internal.example.com/'})
+        
+        # A host that resolved publicly when saved but no longer does fails without retries
+        NotificationService.create_notification(self.user, 'CHANNEL_TYPE')
+        self.resolve('127.0.0.1')
+        NotificationDeliveryService.deliver('WEBHOOK')
+        delivery = NotificationDelivery.objects.get(notification__recipient=self.user, channel='WEBHOOK')
+        self.assertEqual((delivery.status, delivery.attempts), ('FAILED', 1))
+        self.assertIn('non-public', delivery.last_error)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    NOTIFICATION_RETENTION_DAYS={'SYSTEM': 30, 'PAYMENT': None},
+    NOTIFICATION_ARCHIVE_RETENTION_DAYS=365
+)
+class NotificationRetentionTests(TestCase):
+    """Test archiving of old read notifications"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='retention@example.com', password='password', role='ADMIN')
+        self.system_type = NotificationType.objects.create(code='RETENTION_SYSTEM', name='System', category='SYSTEM')
+        self.payment_type = NotificationType.objects.create(code='RETENTION_PAYMENT', name='Payment', category='PAYMENT')
+    
+    def notify(self, notification_type, days_old, is_read=True):
+        notification = Notification.objects.create(
+            recipient=self.user, notification_type=notification_type, title='Title', content='Content', is_read=is_read
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+        return notification
+    
+    def test_old_read_notifications_are_archived(self):
+        """Test that only read notifications past their category's retention move to the archive"""
+        expired = self.notify(self.system_type, 40)
+        self.notify(self.system_type, 40, is_read=False)
+        self.notify(self.system_type, 10)
+        self.notify(self.payment_type, 400)
+        self.assertEqual(NotificationService.get_notification_counts(self.user.id)['total'], 4)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_notifications(), 1)
+        
+        self.assertFalse(Notification.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(Notification.objects.count(), 3)
+        archived = NotificationArchive.objects.get()
+        self.assertEqual(archived.notification_id, expired.id)
+        self.assertLess(archived.created_at, timezone.now() - timedelta(days=39))
+        self.assertEqual(NotificationService.get_notification_counts(self.user.id), {'total': 3, 'unread': 1})
+        
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/notifications/notifications/archived/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_batches_and_archive_purge(self):
+        """Test that archiving runs in batches and expired archive rows are purged"""
+        for _ in range(5):
+            self.notify(self.system_type, 40)
+        
+        self.assertEqual(archive_notifications(batch_size=2), 5)
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        
+        NotificationArchive.objects.update(archived_at=timezone.now() - timedelta(days=400))
+        self.assertEqual(NotificationService.purge_archive(365), 5)
+        self.assertFalse(NotificationArchive.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NotificationStreamTests(TestCase):
+    """Test the realtime notification stream"""
+    
+    def test_stream_requires_a_valid_token(self):
+        """Test that connecting without a valid access token is rejected"""
+        response = self.client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        response = self.client.get('/api/notifications/stream/?token=not-a-token')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_slow_subscriber_is_told_to_resync(self):
+        """Test that a full inbox is replaced by a single resync marker"""
+        async def fill():
+            subscription = realtime.Subscription(['realtime:user:1'], maxsize=2)
+            for i in range(3):
+                subscription.deliver(realtime.sse_frame('notification', {'id': i}))
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        
+        self.assertEqual(async_to_sync(fill)(), [realtime.RESYNC])
+    
+    def listen_locally(self):
+        """Stand in for the Redis listener so frames can be dispatched to the hub by hand"""
+        async def ensure_listening(hub):
+            hub._pubsub = AsyncMock()
+        return patch.object(realtime.SubscriptionHub, '_ensure_listening', ensure_listening)
+    
+    def test_published_events_reach_subscribed_streams(self):
+        """Test that events are published after commit and streamed only to their channel's subscribers"""
+        channel = realtime.user_channel(7)
+        with patch.object(realtime, '_send') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                realtime.publish_changes(7, 'read', [1, 2])
+                realtime.publish_counts({8: {'total': 1, 'unread': 1}})
+                self.assertFalse(send.called)
+        frames = [frame for call in send.call_args_list for frame in call.args[0]]
+        self.assertEqual([frame[0] for frame in frames], [channel, realtime.user_channel(8)])
+        
+        async def stream():
+            events = realtime.event_stream([channel], time.time() + 60, [realtime.sse_frame('counts', {'unread': 0})])
+            received = [await events.__anext__(), await events.__anext__()]
+            for name, frame in reversed(frames):
+                realtime.hub._dispatch({'channel': name.encode(), 'data': frame})
+            received.append(await events.__anext__())
+            await events.aclose()
+            return received, dict(realtime.hub._channels)
+        
+        with self.listen_locally():
+            received, channels = async_to_sync(stream)()
+        
+        self.assertIn('event: ready', received[0])
+        self.assertEqual(received[1], realtime.sse_frame('counts', {'unread': 0}))
+        self.assertEqual(received[2], realtime.sse_frame('read', {'ids': [1, 2]}))
+        # Closing the stream drops its subscription
+        self.assertEqual(channels, {})
+    
+    def test_stream_ends_when_the_token_expires(self):
+        """Test that a stream tells the client to reconnect once its token has expired"""
+        async def stream():
+            return [frame async for frame in realtime.event_stream([realtime.user_channel(7)], time.time() - 1)]
+        
+        with self.listen_locally():
+            received = async_to_sync(stream)()
+        
+        self.assertEqual(received[-1], realtime.sse_frame('expired', {}))
+    
+    def test_stream_token_is_kept_out_of_access_logs(self):
+        """Test that the ?token= query parameter is masked in access log records"""
+        record = logging.LogRecord(
+            'uvicorn.access', logging.INFO, __file__, 0, '%s - "%s %s HTTP/%s" %d',
+            ('127.0.0.1:5000', 'GET', '/api/notifications/stream/?token=secret.jwt&x=1', '1.1', 200), None
+        )
+        accesslog.RedactSecretsFilter().filter(record)
+        self.assertNotIn('secret', record.getMessage())
+        self.assertIn('?token=[redacted]&x=1', record.getMessage())
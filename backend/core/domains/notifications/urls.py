@@ -7,6 +7,7 @@ from .views import (
     NotificationTemplateViewSet,
     NotificationTypeViewSet,
     NotificationViewSet,
+    notification_stream,
 )
 
 router = DefaultRouter()
@@ -16,5 +17,6 @@ router.register(r'templates', NotificationTemplateViewSet, basename='notificatio
 router.register(r'preferences', NotificationPreferenceViewSet, basename='notification-preference')
 
 urlpatterns = [
+    path('stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,18 +1,26 @@
 # backend/core/domains/notifications/views.py
+from asgiref.sync import sync_to_async
 from core.utils.permissions import IsAdmin
-from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
 
+from . import counters, realtime
 from .models import (
     Notification,
+    NotificationArchive,
     NotificationPreference,
     NotificationTemplate,
     NotificationType,
 )
 from .serializers import (
+    NotificationArchiveSerializer,
     NotificationBulkActionSerializer,
     NotificationCountSerializer,
     NotificationPreferenceSerializer,
@@ -22,6 +30,8 @@ from .serializers import (
 )
 from .services import NotificationService
 
+User = get_user_model()
+
 
 class NotificationViewSet(viewsets.ModelViewSet):
     """ViewSet for managing user notifications"""
@@ -63,9 +73,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         # Mark as read if not already read
         if not notification.is_read:
-            notification.is_read = True
-            notification.read_at = timezone.now()
-            notification.save(update_fields=['is_read', 'read_at', 'updated_at'])
+            notification = NotificationService.mark_as_read(notification.id, request.user)
         
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
@@ -79,6 +87,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
             )
         return super().create(request, *args, **kwargs)
     
+    def perform_create(self, serializer):
+        notification = serializer.save()
+        counters.adjust(notification.recipient_id, total=1, unread=0 if notification.is_read else 1)
+    
     def update(self, request, *args, **kwargs):
         """Update notification - restricted to admin users"""
         if not request.user.is_staff:
@@ -88,6 +100,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
             )
         return super().update(request, *args, **kwargs)
     
+    def perform_update(self, serializer):
+        previous = (serializer.instance.recipient_id, serializer.instance.is_read)
+        notification = serializer.save()
+        if previous != (notification.recipient_id, notification.is_read):
+            counters.adjust(previous[0], total=-1, unread=0 if previous[1] else -1)
+            counters.adjust(notification.recipient_id, total=1, unread=0 if notification.is_read else 1)
+    
     def destroy(self, request, *args, **kwargs):
         """Delete a notification"""
         # Allow users to delete their own notifications
@@ -99,6 +118,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)
     
+    def perform_destroy(self, instance):
+        NotificationService.delete_instance(instance)
+    
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark a notification as read"""
@@ -163,6 +185,21 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notifications = NotificationService.get_notifications(request.user, limit=limit)
         serializer = self.get_serializer(notifications, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """Get the current user's archived notifications"""
+        notifications = NotificationArchive.objects.filter(
+            recipient=request.user
+        ).select_related('notification_type')
+        page = self.paginate_queryset(notifications)
+        
+        if page is not None:
+            serializer = NotificationArchiveSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = NotificationArchiveSerializer(notifications, many=True)
+        return Response(serializer.data)
 
 
 class NotificationTypeViewSet(viewsets.ModelViewSet):
@@ -223,4 +260,40 @@ class NotificationPreferenceViewSet(viewsets.ModelViewSet):
             request.data
         )
         serializer = self.get_serializer(preferences)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the current user's notifications and counters.
+    
+    Staff also receive event timeline updates. EventSource cannot send headers, so
+    the access token may be passed as ?token= instead of an Authorization header.
+    The polling endpoints remain the fallback when the stream asks for a resync.
+    """
+    header = request.headers.get('Authorization', '')
+    raw_token = header.split(' ', 1)[1] if header.startswith('Bearer ') else request.GET.get('token')
+    try:
+        token = AccessToken(raw_token)
+    except (TokenError, TypeError):
+        return JsonResponse({"detail": "Invalid or expired token."}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    user = await User.objects.filter(
+        pk=token[jwt_settings.USER_ID_CLAIM], is_active=True
+    ).only('id', 'is_staff').afirst()
+    if user is None:
+        return JsonResponse({"detail": "User not found."}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    channels = [realtime.user_channel(user.id)]
+    if user.is_staff:
+        channels.append(realtime.STAFF_CHANNEL)
+    
+    # Start with the current counters so the client needs no initial poll
+    counts = await sync_to_async(counters.get_counts)(user.id)
+    
+    response = StreamingHttpResponse(
+        realtime.event_stream(channels, token['exp'], [realtime.sse_frame('counts', counts)]),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,34 @@
+# backend/core/domains/payments/admin.py
+from django.contrib import admin, messages
+
+from .models import InvoiceBatchRun
+from .services import InvoiceBatchService
+
+
+@admin.register(InvoiceBatchRun)
+class InvoiceBatchRunAdmin(admin.ModelAdmin):
+    """Admin for bulk invoicing runs"""
+    list_display = [
+        'id', 'status', 'progress', 'processed_quotes', 'total_quotes',
+        'invoices_created', 'invoices_issued', 'issue_date', 'created_by', 'created_at'
+    ]
+    list_filter = ['status', 'issue_date']
+    readonly_fields = [
+        'status', 'quote_ids', 'total_quotes', 'processed_quotes', 'invoices_created',
+        'invoices_issued', 'last_quote_id', 'started_at', 'completed_at', 'error_message',
+        'created_by', 'created_at', 'updated_at'
+    ]
+    actions = ['resume_runs']
+    
+    def get_queryset(self, request):
+        """Optimize query with select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('created_by')
+    
+    @admin.action(description='Resume selected runs')
+    def resume_runs(self, request, queryset):
+        resumed = 0
+        for run in queryset.exclude(status='COMPLETED'):
+            InvoiceBatchService.resume_run(run.id)
+            resumed += 1
+        self.message_user(request, f"Resumed {resumed} invoice batch run(s)", messages.SUCCESS)
@@ -55,4 +55,19 @@ class RefundExceedsPaymentException(APIException):
 
 class InvalidRefundStatusException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
-    default_detail = "Cannot refund a payment with this status."
\ No newline at end of file
+    default_detail = "Cannot refund a payment with this status."
+
+
+class PaymentGatewayNotFoundException(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Payment gateway not found."
+
+
+class InvalidWebhookSignatureException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Invalid webhook signature."
+
+
+class InvoiceBatchRunNotFoundException(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Invoice batch run not found."
@@ -0,0 +1,53 @@
+# backend/core/domains/payments/management/commands/recalculate_document_totals.py
+from core.domains.payments.models import Invoice
+from core.domains.sales.models import EventQuote, QuoteOption
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+DOCUMENTS = {
+    'invoices': Invoice,
+    'quotes': EventQuote,
+    'options': QuoteOption,
+}
+
+
+class Command(BaseCommand):
+    help = 'Recalculate stored invoice, quote and quote option totals from their line items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--documents', nargs='+', choices=list(DOCUMENTS), default=list(DOCUMENTS),
+            help='Document types to recalculate'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Documents updated per statement; 0 updates each table in a single statement'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        for name in options['documents']:
+            model = DOCUMENTS[name]
+
+            if not chunk_size:
+                with transaction.atomic():
+                    updated = model.recalculate_totals()
+                self.stdout.write(self.style.SUCCESS(f'Recalculated {updated} {name}'))
+                continue
+
+            updated = 0
+            last_id = 0
+            while True:
+                ids = list(
+                    model.objects.filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                with transaction.atomic():
+                    updated += model.recalculate_totals(ids)
+                last_id = ids[-1]
+
+            self.stdout.write(self.style.SUCCESS(f'Recalculated {updated} {name}'))
@@ -0,0 +1,55 @@
+# backend/core/domains/payments/management/commands/simulate_gateway_webhooks.py
+from core.domains.payments.models import Payment, PaymentGateway
+from core.domains.payments.services import PaymentWebhookService
+from core.domains.payments.simulator import SIMULATOR_GATEWAY_CODE, GatewaySimulator
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Replay a burst of signed gateway webhooks against the intake endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Number of webhooks to send')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent senders')
+        parser.add_argument('--gateway', default=SIMULATOR_GATEWAY_CODE, help='Gateway code to sign webhooks for')
+        parser.add_argument('--url', default=None, help='Send over HTTP to this URL instead of in-process')
+        parser.add_argument('--payments', type=int, default=100, help='Number of pending payments to target')
+        parser.add_argument('--duplicate-rate', type=float, default=0.1, help='Fraction of repeated transaction IDs')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of failed payment webhooks')
+        parser.add_argument('--process', action='store_true', help='Drain the queue synchronously afterwards')
+
+    def handle(self, *args, **options):
+        if options['gateway'] == SIMULATOR_GATEWAY_CODE:
+            gateway = GatewaySimulator.get_or_create_gateway()
+        else:
+            try:
+                gateway = PaymentGateway.objects.get(code=options['gateway'])
+            except PaymentGateway.DoesNotExist:
+                raise CommandError(f"Payment gateway {options['gateway']} not found")
+
+        payments = Payment.objects.filter(status='PENDING').order_by('id')[:options['payments']]
+        if not payments:
+            raise CommandError('No pending payments to simulate webhooks for')
+
+        simulator = GatewaySimulator(gateway, url=options['url'])
+        stats = simulator.burst(
+            payments,
+            options['count'],
+            concurrency=options['concurrency'],
+            duplicate_rate=options['duplicate_rate'],
+            failure_rate=options['failure_rate']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats['sent']} webhooks in {stats['elapsed']}s "
+            f"({stats['per_second']}/s): {stats['accepted']} accepted, {stats['rejected']} rejected"
+        ))
+
+        if options['process']:
+            total = 0
+            while True:
+                processed = PaymentWebhookService.process_pending_events()
+                if not processed:
+                    break
+                total += processed
+            self.stdout.write(self.style.SUCCESS(f"Processed {total} webhook events"))
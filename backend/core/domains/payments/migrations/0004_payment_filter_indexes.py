@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:23
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without locking the payments table against writes
+    atomic = False
+
+    dependencies = [
+        ('events', '0002_alter_eventtype_description_event_eventfile_and_more'),
+        ('payments', '0003_invoicebatchrun'),
+        ('sales', '0002_eventquote_client_message_eventquote_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['status', 'due_date'], name='payment_status_due_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['event', 'status'], name='payment_event_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('payment_number'), name='gin_trgm_ops'), name='payment_number_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def suffix_duplicate_transactions(apps, schema_editor):
+    # Simulated transaction IDs were only unique to the second; keep the oldest row's ID
+    PaymentTransaction = apps.get_model('payments', 'PaymentTransaction')
+    duplicates = (
+        PaymentTransaction.objects.values('gateway_id', 'transaction_id')
+        .annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        transactions = PaymentTransaction.objects.filter(
+            gateway_id=duplicate['gateway_id'], transaction_id=duplicate['transaction_id']
+        ).order_by('id')
+        for transaction in transactions[1:]:
+            transaction.transaction_id = f"{transaction.transaction_id}-{transaction.pk}"
+            transaction.save(update_fields=['transaction_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(suffix_duplicate_transactions, migrations.RunPython.noop),
+        # The unique index replaces the plain one for lookups, so add it first
+        migrations.AddConstraint(
+            model_name='paymenttransaction',
+            constraint=models.UniqueConstraint(fields=('gateway', 'transaction_id'), name='unique_gateway_transaction'),
+        ),
+        migrations.RemoveIndex(
+            model_name='paymenttransaction',
+            name='payments_pa_gateway_0589f8_idx',
+        ),
+    ]
@@ -3,7 +3,11 @@ from datetime import timedelta
 from decimal import Decimal
 
 from core.utils.models import BaseModel
+from core.utils.totals import deferred_totals, sum_of, update_totals
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import F, OuterRef
+from django.db.models.functions import Now, Upper
 from django.utils import timezone
 
 
@@ -152,6 +156,17 @@ class Payment(BaseModel):
 
     class Meta:
         ordering = ['-due_date']
+        # Indexes backing the PaymentViewSet filters; covered by PaymentQueryPlanTests
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='payment_status_due_idx'),
+            models.Index(fields=['event', 'status'], name='payment_event_status_idx'),
+            models.Index(fields=['created_at'], name='payment_created_at_idx'),
+            # icontains compiles to UPPER(payment_number) LIKE UPPER(...)
+            GinIndex(
+                OpClass(Upper('payment_number'), name='gin_trgm_ops'),
+                name='payment_number_trgm_idx'
+            ),
+        ]
 
 
 class PaymentGateway(BaseModel):
@@ -237,6 +252,43 @@ class PaymentTransaction(BaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            # One row per gateway transaction, however many workers see its callbacks
+            models.UniqueConstraint(fields=['gateway', 'transaction_id'], name='unique_gateway_transaction'),
+        ]
+
+
+class PaymentWebhookEvent(BaseModel):
+    """Raw gateway callback, persisted on receipt and processed asynchronously"""
+    STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSED', 'Processed'),
+        ('DUPLICATE', 'Duplicate'),
+        ('IGNORED', 'Ignored'),
+        ('FAILED', 'Failed'),
+    ]
+
+    gateway = models.ForeignKey(PaymentGateway, on_delete=models.CASCADE, related_name='webhook_events')
+    raw_body = models.TextField()
+    signature = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RECEIVED')
+    
+    # Filled in by the processor once the payload has been parsed
+    event_id = models.CharField(max_length=255, blank=True)
+    event_type = models.CharField(max_length=100, blank=True)
+    transaction_id = models.CharField(max_length=255, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Webhook {self.event_id or self.id} from {self.gateway.code} - {self.status}"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['gateway', 'transaction_id']),
+        ]
 
 
 class PaymentPlan(BaseModel):
@@ -452,13 +504,26 @@ class Invoice(BaseModel):
     def __str__(self):
         return f"Invoice {self.invoice_id}"
     
+    TOTAL_FIELDS = ['subtotal', 'tax_amount', 'total_amount']
+    
     def calculate_totals(self):
         """Calculate invoice totals from line items"""
-        line_items = self.line_items.all()
-        self.subtotal = sum(item.total for item in line_items)
-        self.tax_amount = sum(item.total * (item.tax_rate / 100) for item in line_items)
-        self.total_amount = self.subtotal + self.tax_amount
-        self.save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
+        update_totals(self)
+    
+    @classmethod
+    def recalculate_totals(cls, pks=None):
+        """Recalculate totals from line items in one UPDATE (all invoices when pks is None)"""
+        line_items = InvoiceLineItem.objects.filter(invoice=OuterRef('pk'))
+        subtotal = sum_of(line_items, 'invoice', 'total')
+        tax_amount = sum_of(line_items, 'invoice', F('total') * F('tax_rate') / 100)
+        
+        queryset = cls.objects.all() if pks is None else cls.objects.filter(pk__in=pks)
+        return queryset.update(
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            total_amount=subtotal + tax_amount,
+            updated_at=Now()
+        )
     
     def mark_as_paid(self):
         """Mark invoice as paid"""
@@ -502,31 +567,33 @@ class Invoice(BaseModel):
         if not quote or not quote.event:
             return None
         
-        # Create invoice
-        invoice = cls.objects.create(
-            invoice_id=f"INV-{timezone.now().strftime('%Y%m%d')}-{quote.event.id}-{quote.id}",
-            event=quote.event,
-            client=quote.event.client,
-            subtotal=quote.subtotal,
-            tax_amount=quote.tax_amount,
-            total_amount=quote.total_amount,
-            issue_date=timezone.now().date(),
-            due_date=timezone.now().date() + timedelta(days=due_days),
-            status='DRAFT',
-            notes=f"Invoice generated from quote #{quote.id}",
-            quote=quote
-        )
-        
-        # Create line items from quote
-        for quote_item in quote.line_items.all():
-            InvoiceLineItem.objects.create(
-                invoice=invoice,
-                description=quote_item.description,
-                quantity=quote_item.quantity,
-                unit_price=quote_item.unit_price,
-                tax_rate=quote_item.tax_rate,
-                total=quote_item.total
+        # Totals are recalculated once from the line items when the block ends
+        with deferred_totals():
+            # Create invoice
+            invoice = cls.objects.create(
+                invoice_id=f"INV-{timezone.now().strftime('%Y%m%d')}-{quote.event.id}-{quote.id}",
+                event=quote.event,
+                client=quote.event.client,
+                subtotal=quote.subtotal,
+                tax_amount=quote.tax_amount,
+                total_amount=quote.total_amount,
+                issue_date=timezone.now().date(),
+                due_date=timezone.now().date() + timedelta(days=due_days),
+                status='DRAFT',
+                notes=f"Invoice generated from quote #{quote.id}",
+                quote=quote
             )
+            
+            # Create line items from quote
+            for quote_item in quote.line_items.all():
+                InvoiceLineItem.objects.create(
+                    invoice=invoice,
+                    description=quote_item.description,
+                    quantity=quote_item.quantity,
+                    unit_price=quote_item.unit_price,
+                    tax_rate=quote_item.tax_rate,
+                    total=quote_item.total
+                )
         
         return invoice
 
@@ -585,4 +652,44 @@ class PaymentNotification(BaseModel):
         return f"{self.get_notification_type_display()} sent to {self.sent_to} on {self.sent_at.strftime('%Y-%m-%d')}"
     
     class Meta:
-        ordering = ['-sent_at']
\ No newline at end of file
+        ordering = ['-sent_at']
+
+
+class InvoiceBatchRun(BaseModel):
+    """Bulk invoice generation run over accepted quotes, resumable from its cursor"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    quote_ids = models.JSONField(null=True, blank=True, help_text="Restrict the run to these quotes; empty means all eligible quotes")
+    issue_invoices = models.BooleanField(default=True)
+    due_days = models.PositiveIntegerField(default=14)
+    issue_date = models.DateField(default=timezone.localdate)
+    created_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='invoice_batch_runs')
+    
+    # Progress, committed together with each chunk of invoices
+    total_quotes = models.PositiveIntegerField(default=0)
+    processed_quotes = models.PositiveIntegerField(default=0)
+    invoices_created = models.PositiveIntegerField(default=0)
+    invoices_issued = models.PositiveIntegerField(default=0)
+    last_quote_id = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Invoice batch {self.id} - {self.status}"
+    
+    @property
+    def progress(self):
+        """Percentage of quotes processed"""
+        if not self.total_quotes:
+            return 100 if self.status == 'COMPLETED' else 0
+        return round(self.processed_quotes * 100 / self.total_quotes, 1)
+    
+    class Meta:
+        ordering = ['-created_at']
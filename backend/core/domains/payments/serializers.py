@@ -6,6 +6,7 @@ from rest_framework import serializers
 
 from .models import (
     Invoice,
+    InvoiceBatchRun,
     InvoiceLineItem,
     InvoiceTax,
     Payment,
@@ -15,6 +16,7 @@ from .models import (
     PaymentNotification,
     PaymentPlan,
     PaymentTransaction,
+    PaymentWebhookEvent,
     Refund,
     TaxRate,
 )
@@ -80,6 +82,36 @@ class PaymentTransactionSerializer(serializers.ModelSerializer):
         }
 
 
+class PaymentWebhookEventSerializer(serializers.ModelSerializer):
+    gateway_code = serializers.CharField(source='gateway.code', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = PaymentWebhookEvent
+        fields = [
+            'id', 'gateway', 'gateway_code', 'event_id', 'event_type',
+            'transaction_id', 'status', 'status_display', 'raw_body',
+            'processed_at', 'error_message', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class InvoiceBatchRunSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = InvoiceBatchRun
+        fields = [
+            'id', 'status', 'status_display', 'quote_ids', 'issue_invoices',
+            'due_days', 'issue_date', 'created_by', 'total_quotes',
+            'processed_quotes', 'invoices_created', 'invoices_issued',
+            'progress', 'started_at', 'completed_at', 'error_message',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
 class PaymentNotificationSerializer(serializers.ModelSerializer):
     payment_details = serializers.SerializerMethodField(read_only=True)
     notification_type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
@@ -1,10 +1,18 @@
 # backend/core/domains/payments/services.py
+import json
+import logging
+import uuid
 from datetime import timedelta
 from decimal import Decimal
 
 from core.domains.events.models import Event, EventTimeline
+from core.domains.notifications import realtime
 from core.domains.sales.models import EventQuote
+from core.utils.totals import deferred_totals
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Exists, F, OuterRef
 from django.utils import timezone
 
 from .exceptions import (
@@ -12,9 +20,12 @@ from .exceptions import (
     InvalidPaymentAmountException,
     InvalidPaymentStatusTransition,
     InvalidRefundStatusException,
+    InvalidWebhookSignatureException,
+    InvoiceBatchRunNotFoundException,
     InvoiceNotFoundException,
     PaymentAlreadyCompletedException,
     PaymentGatewayException,
+    PaymentGatewayNotFoundException,
     PaymentMethodNotFoundException,
     PaymentNotFoundException,
     PaymentPlanNotFoundException,
@@ -22,6 +33,7 @@ from .exceptions import (
 )
 from .models import (
     Invoice,
+    InvoiceBatchRun,
     InvoiceLineItem,
     InvoiceTax,
     Payment,
@@ -31,9 +43,13 @@ from .models import (
     PaymentNotification,
     PaymentPlan,
     PaymentTransaction,
+    PaymentWebhookEvent,
     Refund,
     TaxRate,
 )
+from .webhooks import EVENT_STATUS_MAP, get_webhook_secret, verify_signature
+
+logger = logging.getLogger(__name__)
 
 
 class PaymentService:
@@ -207,7 +223,7 @@ class PaymentService:
         # For now, we'll simulate a gateway response
         simulated_response = {
             'success': True,
-            'transaction_id': f"txn_{timezone.now().strftime('%Y%m%d%H%M%S')}",
+            'transaction_id': f"txn_{uuid.uuid4().hex}",
             'amount': str(payment.amount),
             'status': 'approved',
             'timestamp': timezone.now().isoformat()
@@ -278,7 +294,7 @@ class PaymentService:
             # Process the refund - in real implementation, this would call the payment gateway
             # For now, just simulate a successful refund
             refund.status = 'COMPLETED'
-            refund.refund_transaction_id = f"ref_{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            refund.refund_transaction_id = f"ref_{uuid.uuid4().hex}"
             refund.save()
             
             # Record in event timeline
@@ -322,7 +338,7 @@ class InvoiceService:
         issue_date = data.get('issue_date', timezone.now().date())
         due_date = data.get('due_date', issue_date + timedelta(days=30))
         
-        with transaction.atomic():
+        with deferred_totals():
             # Create the invoice
             invoice = Invoice.objects.create(
                 invoice_id=invoice_id,
@@ -395,7 +411,7 @@ class InvoiceService:
         if invoice.status not in ['DRAFT'] and set(data.keys()) - {'status', 'notes'}:
             raise ValueError("Can only update status and notes for non-draft invoices")
         
-        with transaction.atomic():
+        with deferred_totals():
             # Update basic fields
             for field in ['notes', 'payment_terms', 'due_date']:
                 if field in data:
@@ -469,6 +485,235 @@ class InvoiceService:
         invoice.delete()
 
 
+class InvoiceBatchService:
+    """Service for generating invoices from accepted quotes in bulk"""
+    
+    @staticmethod
+    def eligible_quotes(quote_ids=None):
+        """Accepted quotes that have not been invoiced yet"""
+        queryset = EventQuote.objects.filter(status='ACCEPTED').filter(
+            ~Exists(Invoice.objects.filter(quote=OuterRef('pk')))
+        )
+        if quote_ids:
+            queryset = queryset.filter(pk__in=quote_ids)
+        return queryset
+    
+    @staticmethod
+    def start_run(user=None, quote_ids=None, issue_invoices=True, due_days=14, issue_date=None):
+        """Create a batch run and queue it for processing"""
+        from .tasks import generate_invoice_batch
+        
+        run = InvoiceBatchRun.objects.create(
+            quote_ids=list(quote_ids) if quote_ids else None,
+            issue_invoices=issue_invoices,
+            due_days=due_days,
+            issue_date=issue_date or timezone.localdate(),
+            created_by=user,
+            total_quotes=InvoiceBatchService.eligible_quotes(quote_ids).count()
+        )
+        transaction.on_commit(lambda: generate_invoice_batch.delay(run.id))
+        return run
+    
+    @staticmethod
+    def resume_run(run_id):
+        """Queue an unfinished run to continue from its cursor"""
+        from .tasks import generate_invoice_batch
+        
+        try:
+            run = InvoiceBatchRun.objects.get(pk=run_id)
+        except InvoiceBatchRun.DoesNotExist:
+            raise InvoiceBatchRunNotFoundException(f"Invoice batch run with ID {run_id} not found")
+        
+        if run.status == 'COMPLETED':
+            raise ValueError("Invoice batch run is already completed")
+        
+        run.status = 'PENDING'
+        run.error_message = ''
+        run.save(update_fields=['status', 'error_message', 'updated_at'])
+        transaction.on_commit(lambda: generate_invoice_batch.delay(run.id))
+        return run
+    
+    @staticmethod
+    def run_batch(run_id, chunk_size=200):
+        """
+        Process a run chunk by chunk until no eligible quotes remain.
+        
+        Each chunk commits its invoices together with the run's cursor and counters,
+        so an interrupted run resumes after the last committed quote.
+        """
+        try:
+            run = InvoiceBatchRun.objects.get(pk=run_id)
+        except InvoiceBatchRun.DoesNotExist:
+            raise InvoiceBatchRunNotFoundException(f"Invoice batch run with ID {run_id} not found")
+        
+        if run.status == 'COMPLETED':
+            return run
+        
+        run.status = 'RUNNING'
+        run.started_at = run.started_at or timezone.now()
+        run.save(update_fields=['status', 'started_at', 'updated_at'])
+        
+        try:
+            while True:
+                run, processed = InvoiceBatchService._process_chunk(run.id, chunk_size)
+                if not processed:
+                    break
+        except Exception as e:
+            logger.error(f"Invoice batch run {run_id} failed: {str(e)}")
+            InvoiceBatchRun.objects.filter(pk=run_id).update(
+                status='FAILED', error_message=str(e), updated_at=timezone.now()
+            )
+            run.refresh_from_db()
+            return run
+        
+        run.status = 'COMPLETED'
+        run.completed_at = timezone.now()
+        run.save(update_fields=['status', 'completed_at', 'updated_at'])
+        return run
+    
+    @staticmethod
+    def _process_chunk(run_id, chunk_size):
+        """Create invoices for the next chunk of quotes in one transaction"""
+        from .tasks import issue_invoice_batch
+        
+        with transaction.atomic():
+            # Locking the run keeps two workers from invoicing the same chunk
+            run = InvoiceBatchRun.objects.select_for_update().get(pk=run_id)
+            quotes = list(
+                InvoiceBatchService.eligible_quotes(run.quote_ids)
+                .filter(pk__gt=run.last_quote_id)
+                .select_related('event')
+                .prefetch_related('line_items')
+                .order_by('pk')[:chunk_size]
+            )
+            if not quotes:
+                return run, 0
+            
+            invoice_numbers = InvoiceBatchService.allocate_invoice_numbers(quotes, run)
+            due_date = run.issue_date + timedelta(days=run.due_days)
+            
+            invoices = Invoice.objects.bulk_create([
+                Invoice(
+                    invoice_id=invoice_numbers[quote.id],
+                    event_id=quote.event_id,
+                    client_id=quote.event.client_id,
+                    # Recalculated from the line items below
+                    subtotal=0,
+                    tax_amount=0,
+                    total_amount=0,
+                    issue_date=run.issue_date,
+                    due_date=due_date,
+                    status='DRAFT',
+                    notes=f"Invoice generated from quote #{quote.id}",
+                    quote=quote
+                )
+                for quote in quotes
+            ])
+            
+            # bulk_create skips InvoiceLineItem.save(), so the chunk's totals are recalculated
+            # afterwards in one UPDATE, the same way Invoice.create_from_quote arrives at them
+            InvoiceLineItem.objects.bulk_create([
+                InvoiceLineItem(
+                    invoice=invoice,
+                    description=item.description,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    tax_rate=item.tax_rate,
+                    total=item.total or item.quantity * item.unit_price,
+                    product_id=item.product_id
+                )
+                for invoice, quote in zip(invoices, quotes)
+                for item in quote.line_items.all()
+            ], batch_size=1000)
+            Invoice.recalculate_totals([invoice.id for invoice in invoices])
+            
+            run.last_quote_id = quotes[-1].id
+            run.processed_quotes += len(quotes)
+            run.invoices_created += len(invoices)
+            run.save(update_fields=['last_quote_id', 'processed_quotes', 'invoices_created', 'updated_at'])
+            
+            if run.issue_invoices:
+                invoice_ids = [invoice.id for invoice in invoices]
+                transaction.on_commit(lambda: issue_invoice_batch.delay(run_id, invoice_ids))
+            
+            return run, len(quotes)
+    
+    @staticmethod
+    def allocate_invoice_numbers(quotes, run):
+        """
+        Assign invoice numbers for a chunk of quotes with a single lookup.
+        
+        Numbers follow Invoice.create_from_quote; the rare number already taken
+        gets the run ID appended.
+        """
+        prefix = f"INV-{run.issue_date.strftime('%Y%m%d')}"
+        numbers = {quote.id: f"{prefix}-{quote.event_id}-{quote.id}" for quote in quotes}
+        taken = set(
+            Invoice.objects.filter(invoice_id__in=numbers.values()).values_list('invoice_id', flat=True)
+        )
+        return {
+            quote_id: f"{number}-B{run.id}" if number in taken else number
+            for quote_id, number in numbers.items()
+        }
+    
+    @staticmethod
+    def issue_invoices(invoice_ids, run_id=None):
+        """
+        Issue a batch of draft invoices.
+        
+        Bulk equivalent of Invoice.issue(): one status and issue date update plus one
+        insert each for the payment notifications and timeline entries.
+        """
+        now = timezone.now()
+        
+        with transaction.atomic():
+            invoices = list(
+                Invoice.objects.select_for_update(of=('self',))
+                .filter(pk__in=invoice_ids, status='DRAFT')
+                .select_related('client')
+            )
+            if not invoices:
+                return 0
+            
+            for invoice in invoices:
+                invoice.status = 'ISSUED'
+                invoice.issue_date = now.date()
+                invoice.updated_at = now
+            Invoice.objects.bulk_update(invoices, ['status', 'issue_date', 'updated_at'])
+            
+            PaymentNotification.objects.bulk_create([
+                PaymentNotification(
+                    notification_type='INVOICE_ISSUED',
+                    sent_at=now,
+                    sent_to=invoice.client.email,
+                    is_successful=True,
+                    reference=f"invoice_{invoice.id}"
+                )
+                for invoice in invoices
+            ])
+            
+            timeline = EventTimeline.objects.bulk_create([
+                EventTimeline(
+                    event_id=invoice.event_id,
+                    action_type='SYSTEM_UPDATE',
+                    description=f"Invoice {invoice.invoice_id} issued to client",
+                    is_public=True,
+                    action_data={'invoice_id': invoice.id}
+                )
+                for invoice in invoices
+            ])
+            # bulk_create skips post_save, so push the entries to open streams directly
+            realtime.publish_timeline(timeline)
+            
+            if run_id:
+                InvoiceBatchRun.objects.filter(pk=run_id).update(
+                    invoices_issued=F('invoices_issued') + len(invoices),
+                    updated_at=now
+                )
+            
+            return len(invoices)
+
+
 class PaymentPlanService:
     """Service for managing payment plans"""
     
@@ -823,4 +1068,176 @@ class TaxRateService:
         if is_used:
             raise ValueError("Cannot delete a tax rate that is in use")
         
-        tax_rate.delete()
\ No newline at end of file
+        tax_rate.delete()
+
+
+class PaymentWebhookService:
+    """Service for ingesting and processing payment gateway callbacks"""
+    
+    DRAIN_SCHEDULED_KEY = 'payments:webhooks:drain-scheduled'
+    
+    @staticmethod
+    def receive_webhook(gateway_code, raw_body, signature, timestamp):
+        """
+        Verify and persist a gateway callback.
+        
+        This is all the work done inside the request: the payload is stored as-is
+        and parsed later by the batch processor, so gateway latency never waits on
+        payment processing.
+        """
+        try:
+            gateway = PaymentGateway.objects.only('id', 'config').get(code=gateway_code, is_active=True)
+        except PaymentGateway.DoesNotExist:
+            raise PaymentGatewayNotFoundException(f"Payment gateway {gateway_code} not found")
+        
+        if isinstance(raw_body, bytes):
+            raw_body = raw_body.decode('utf-8', errors='replace')
+        
+        tolerance = getattr(settings, 'PAYMENT_WEBHOOK_SIGNATURE_TOLERANCE', 300)
+        if not verify_signature(get_webhook_secret(gateway), timestamp, raw_body, signature, tolerance):
+            raise InvalidWebhookSignatureException()
+        
+        webhook_event = PaymentWebhookEvent.objects.create(
+            gateway=gateway,
+            raw_body=raw_body,
+            signature=signature
+        )
+        
+        transaction.on_commit(PaymentWebhookService.schedule_processing)
+        return webhook_event
+    
+    @staticmethod
+    def schedule_processing():
+        """Queue a batch run, coalescing bursts into one task per batch window"""
+        from .tasks import process_webhook_events
+        
+        delay = getattr(settings, 'PAYMENT_WEBHOOK_BATCH_DELAY', 2)
+        try:
+            if cache.add(PaymentWebhookService.DRAIN_SCHEDULED_KEY, 1, timeout=delay):
+                process_webhook_events.apply_async(countdown=delay)
+        except Exception as e:
+            # The event is already stored; the periodic sweep will pick it up
+            logger.error(f"Could not schedule webhook processing: {str(e)}")
+    
+    @staticmethod
+    def process_pending_events(batch_size=500):
+        """
+        Process one batch of received callbacks.
+        
+        Rows are claimed with SKIP LOCKED so several workers can drain the queue in
+        parallel. Callbacks in the batch are deduplicated by gateway transaction ID:
+        only the latest callback per transaction is applied, and a callback that
+        would not change the stored transaction status is marked as a duplicate.
+        
+        Returns:
+            Number of callbacks claimed
+        """
+        with transaction.atomic():
+            events = list(
+                PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='RECEIVED')
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                return 0
+            
+            now = timezone.now()
+            latest = {}
+            for webhook_event in events:
+                webhook_event.processed_at = now
+                webhook_event.updated_at = now
+                try:
+                    payload = json.loads(webhook_event.raw_body)
+                    data = payload.get('data') or {}
+                    webhook_event.event_id = str(payload.get('id', ''))[:255]
+                    webhook_event.event_type = str(payload.get('type', ''))[:100]
+                    webhook_event.transaction_id = str(data.get('transaction_id', ''))[:255]
+                    webhook_event.payload = payload
+                except (ValueError, AttributeError) as e:
+                    webhook_event.status = 'FAILED'
+                    webhook_event.error_message = f"Invalid payload: {str(e)}"
+                    continue
+                
+                if webhook_event.event_type not in EVENT_STATUS_MAP or not webhook_event.transaction_id:
+                    webhook_event.status = 'IGNORED'
+                    continue
+                
+                key = (webhook_event.gateway_id, webhook_event.transaction_id)
+                if key in latest:
+                    latest[key].status = 'DUPLICATE'
+                latest[key] = webhook_event
+            
+            # Load everything the batch refers to in two queries
+            existing_transactions = {
+                (txn.gateway_id, txn.transaction_id): txn
+                for txn in PaymentTransaction.objects.filter(
+                    gateway_id__in={gateway_id for gateway_id, _ in latest},
+                    transaction_id__in={transaction_id for _, transaction_id in latest}
+                ).select_related('payment')
+            }
+            payment_numbers = {
+                str((event.payload.get('data') or {}).get('payment_number', ''))
+                for event in latest.values()
+            }
+            payments = {
+                payment.payment_number: payment
+                for payment in Payment.objects.filter(payment_number__in=payment_numbers)
+            }
+            
+            for key, webhook_event in latest.items():
+                try:
+                    with transaction.atomic():
+                        PaymentWebhookService._apply_event(
+                            webhook_event, existing_transactions.get(key), payments
+                        )
+                except Exception as e:
+                    logger.error(f"Error processing webhook {webhook_event.id}: {str(e)}")
+                    webhook_event.status = 'FAILED'
+                    webhook_event.error_message = str(e)
+            
+            PaymentWebhookEvent.objects.bulk_update(
+                events,
+                ['status', 'event_id', 'event_type', 'transaction_id', 'processed_at', 'error_message', 'updated_at']
+            )
+            return len(events)
+    
+    @staticmethod
+    def _apply_event(webhook_event, existing_transaction, payments):
+        """Apply a single deduplicated callback to its PaymentTransaction"""
+        data = webhook_event.payload.get('data') or {}
+        new_status = EVENT_STATUS_MAP[webhook_event.event_type]
+        
+        if not existing_transaction:
+            payment = payments.get(str(data.get('payment_number', '')))
+            if not payment:
+                webhook_event.status = 'FAILED'
+                webhook_event.error_message = f"Payment {data.get('payment_number')} not found"
+                return
+            
+            # The unique (gateway, transaction_id) constraint makes this safe against
+            # another worker recording the same transaction from a later callback
+            existing_transaction, created = PaymentTransaction.objects.get_or_create(
+                gateway_id=webhook_event.gateway_id,
+                transaction_id=webhook_event.transaction_id,
+                defaults={
+                    'payment': payment,
+                    'amount': Decimal(str(data.get('amount', payment.amount))),
+                    'status': new_status,
+                    'response_data': webhook_event.payload,
+                    'error_message': data.get('error_message', ''),
+                    'is_test': bool(data.get('test', False)),
+                }
+            )
+            if created:
+                webhook_event.status = 'PROCESSED'
+                return
+        
+        if existing_transaction.status == new_status:
+            webhook_event.status = 'DUPLICATE'
+            return
+        existing_transaction.status = new_status
+        existing_transaction.response_data = webhook_event.payload
+        existing_transaction.error_message = data.get('error_message', '')
+        # save() cascades the status to the payment
+        existing_transaction.save()
+        webhook_event.status = 'PROCESSED'
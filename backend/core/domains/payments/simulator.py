@@ -0,0 +1,158 @@
+# backend/core/domains/payments/simulator.py
+import json
+import random
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import PaymentGateway
+from .webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, get_webhook_secret, signed_headers
+
+SIMULATOR_GATEWAY_CODE = 'simulator'
+
+
+class GatewaySimulator:
+    """
+    Local stand-in for a payment gateway.
+
+    Builds correctly signed callbacks for existing payments and delivers them to the
+    webhook intake endpoint, either in-process through Django's test client or over
+    HTTP to a running server. Used for load-testing the intake path without any
+    external service.
+    """
+
+    def __init__(self, gateway, url=None, host='localhost'):
+        self.gateway = gateway
+        self.secret = get_webhook_secret(gateway)
+        self.url = url
+        self.host = host
+        self._local = threading.local()
+
+    @classmethod
+    def get_or_create_gateway(cls, code=SIMULATOR_GATEWAY_CODE):
+        """Get the simulator gateway, creating it with a fresh secret if needed"""
+        gateway, created = PaymentGateway.objects.get_or_create(
+            code=code,
+            defaults={
+                'name': 'Local Simulator',
+                'description': 'Local gateway simulator for development and load testing',
+                'config': {'webhook_secret': secrets.token_hex(32)},
+            }
+        )
+        if not get_webhook_secret(gateway):
+            gateway.config = {**(gateway.config or {}), 'webhook_secret': secrets.token_hex(32)}
+            gateway.save(update_fields=['config', 'updated_at'])
+        return gateway
+
+    def build_event(self, payment, event_type='payment.completed', transaction_id=None):
+        """Build the raw body of a callback for a payment"""
+        payload = {
+            'id': f"evt_{secrets.token_hex(12)}",
+            'type': event_type,
+            'created': int(time.time()),
+            'data': {
+                'transaction_id': transaction_id or f"txn_{secrets.token_hex(12)}",
+                'payment_number': payment.payment_number,
+                'amount': str(payment.amount),
+                'test': True,
+            },
+        }
+        if event_type == 'payment.failed':
+            payload['data']['error_message'] = 'Simulated decline'
+        return json.dumps(payload)
+
+    def send(self, body):
+        """Deliver one callback and return the HTTP status code"""
+        headers = signed_headers(self.secret, body)
+
+        if self.url:
+            request = urllib.request.Request(
+                self.url,
+                data=body.encode(),
+                method='POST',
+                headers={
+                    'Content-Type': 'application/json',
+                    'X-Webhook-Signature': headers[SIGNATURE_HEADER],
+                    'X-Webhook-Timestamp': headers[TIMESTAMP_HEADER],
+                }
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(HTTP_HOST=self.host)
+        response = client.post(
+            reverse('payment-webhook', kwargs={'gateway_code': self.gateway.code}),
+            data=body,
+            content_type='application/json',
+            **headers
+        )
+        return response.status_code
+
+    def burst(self, payments, count, concurrency=10, duplicate_rate=0.0, failure_rate=0.0):
+        """
+        Deliver a burst of callbacks spread across the given payments.
+
+        Args:
+            payments: Payments to generate callbacks for
+            count: Total number of callbacks to send
+            concurrency: Number of concurrent senders
+            duplicate_rate: Fraction of callbacks that repeat an earlier transaction ID
+            failure_rate: Fraction of callbacks reporting a failed payment
+
+        Returns:
+            Dictionary with delivery statistics
+        """
+        payments = list(payments)
+        if not payments:
+            return {'sent': 0, 'accepted': 0, 'rejected': 0, 'elapsed': 0, 'per_second': 0}
+
+        bodies = []
+        transaction_ids = []
+        for i in range(count):
+            payment = payments[i % len(payments)]
+            if transaction_ids and random.random() < duplicate_rate:
+                transaction_id = random.choice(transaction_ids)
+            else:
+                transaction_id = f"txn_{secrets.token_hex(12)}"
+                transaction_ids.append(transaction_id)
+            event_type = 'payment.failed' if random.random() < failure_rate else 'payment.completed'
+            bodies.append(self.build_event(payment, event_type, transaction_id))
+
+        def deliver(chunk):
+            try:
+                return [self.send(body) for body in chunk]
+            finally:
+                # In-process delivery opens a database connection per sender thread
+                if not self.url:
+                    connection.close()
+
+        concurrency = max(1, min(concurrency, len(bodies)))
+        chunks = [bodies[i::concurrency] for i in range(concurrency)]
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = [code for codes in executor.map(deliver, chunks) for code in codes]
+        elapsed = time.monotonic() - started
+
+        accepted = sum(1 for code in results if code == 200)
+        return {
+            'sent': len(results),
+            'accepted': accepted,
+            'rejected': len(results) - accepted,
+            'elapsed': round(elapsed, 3),
+            'per_second': round(len(results) / elapsed, 1) if elapsed else 0,
+            'finished_at': timezone.now().isoformat(),
+        }
@@ -0,0 +1,43 @@
+# backend/core/domains/payments/tasks.py
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_webhook_events(batch_size=None):
+    """Drain received gateway callbacks in batches"""
+    from core.domains.payments.services import PaymentWebhookService
+
+    batch_size = batch_size or getattr(settings, 'PAYMENT_WEBHOOK_BATCH_SIZE', 500)
+    processed = PaymentWebhookService.process_pending_events(batch_size)
+
+    # A full batch means more callbacks are probably waiting
+    if processed >= batch_size:
+        process_webhook_events.delay(batch_size)
+
+    if processed:
+        logger.info(f"Processed {processed} payment webhook events")
+    return processed
+
+
+@shared_task
+def generate_invoice_batch(run_id, chunk_size=None):
+    """Create invoices for a bulk invoicing run, resuming from its cursor"""
+    from core.domains.payments.services import InvoiceBatchService
+
+    chunk_size = chunk_size or getattr(settings, 'INVOICE_BATCH_CHUNK_SIZE', 200)
+    run = InvoiceBatchService.run_batch(run_id, chunk_size)
+    logger.info(f"Invoice batch run {run_id} {run.status.lower()}: {run.invoices_created} invoices created")
+    return run.invoices_created
+
+
+@shared_task
+def issue_invoice_batch(run_id, invoice_ids):
+    """Issue one chunk of invoices created by a bulk invoicing run"""
+    from core.domains.payments.services import InvoiceBatchService
+
+    return InvoiceBatchService.issue_invoices(invoice_ids, run_id=run_id)
@@ -0,0 +1,504 @@
+# backend/core/domains/payments/tests.py
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from core.domains.events.models import Event, EventTimeline, EventType
+from core.domains.sales.models import EventQuote, QuoteLineItem
+from core.domains.users.models import User
+from core.utils.testing import LOCMEM_CACHE, QueryPlanAssertionsMixin
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import (
+    Invoice,
+    InvoiceBatchRun,
+    InvoiceLineItem,
+    Payment,
+    PaymentGateway,
+    PaymentMethod,
+    PaymentNotification,
+    PaymentTransaction,
+    PaymentWebhookEvent,
+)
+from .services import InvoiceBatchService, PaymentService, PaymentWebhookService
+from .simulator import GatewaySimulator
+from .views import PaymentViewSet
+from .webhooks import signed_headers
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaymentIdempotencyTests(TestCase):
+    """Test Idempotency-Key handling on payment endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+            role='ADMIN'
+        )
+
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='clientpassword',
+            first_name='Client',
+            last_name='User',
+            role='CLIENT'
+        )
+
+        self.event_type = EventType.objects.create(name='Wedding')
+
+        self.event = Event.objects.create(
+            client=self.client_user,
+            event_type=self.event_type,
+            name='Test Wedding',
+            status='LEAD',
+            start_date=timezone.now() + timedelta(days=30),
+            total_amount_due=2000.00
+        )
+
+        self.payload = {
+            'event': self.event.id,
+            'amount': '500.00',
+            'due_date': str(timezone.now().date()),
+            'description': 'Deposit'
+        }
+
+        self.client.force_authenticate(user=self.admin)
+
+    def test_replayed_key_returns_stored_response(self):
+        """Test that a retried request with the same key does not create a second payment"""
+        first = self.client.post(
+            '/api/payments/payments/', self.payload, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-1'
+        )
+        second = self.client.post(
+            '/api/payments/payments/', self.payload, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-1'
+        )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        """Test that a key cannot be reused for a different request"""
+        self.client.post(
+            '/api/payments/payments/', self.payload, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-2'
+        )
+        response = self.client.post(
+            '/api/payments/payments/', {**self.payload, 'amount': '750.00'}, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-2'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """Test that requests without a key behave as before"""
+        first = self.client.post('/api/payments/payments/', self.payload, format='json')
+        second = self.client.post('/api/payments/payments/', self.payload, format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', second)
+
+    def test_failed_requests_are_not_stored(self):
+        """Test that a failed request can be retried with the same key"""
+        invalid = self.client.post(
+            '/api/payments/payments/', {**self.payload, 'amount': '0'}, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-3'
+        )
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+        retried = self.client.post(
+            '/api/payments/payments/', {**self.payload, 'amount': '0'}, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-3'
+        )
+        self.assertEqual(retried.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Idempotent-Replayed', retried)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaymentWebhookTests(TestCase):
+    """Test gateway webhook intake and batch processing"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='clientpassword',
+            role='CLIENT'
+        )
+
+        self.event = Event.objects.create(
+            client=self.client_user,
+            name='Test Wedding',
+            status='CONFIRMED',
+            start_date=timezone.now() + timedelta(days=30),
+            total_amount_due=2000.00
+        )
+
+        self.payment = Payment.objects.create(
+            payment_number='PAY-TEST-1',
+            event=self.event,
+            amount=500,
+            status='PENDING',
+            due_date=timezone.now().date()
+        )
+
+        self.gateway = PaymentGateway.objects.create(
+            name='Test Gateway',
+            code='test',
+            config={'webhook_secret': 'secret'}
+        )
+        self.simulator = GatewaySimulator(self.gateway, host='testserver')
+
+    def post_webhook(self, body, headers):
+        return self.client.post(
+            '/api/payments/webhooks/test/', data=body,
+            content_type='application/json', **headers
+        )
+
+    def test_valid_webhook_is_stored_without_processing(self):
+        """Test that intake persists the payload and defers processing"""
+        body = self.simulator.build_event(self.payment)
+        response = self.post_webhook(body, signed_headers('secret', body))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        webhook_event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(webhook_event.status, 'RECEIVED')
+        self.assertEqual(webhook_event.raw_body, body)
+        self.assertFalse(PaymentTransaction.objects.exists())
+
+    def test_invalid_signature_is_rejected(self):
+        """Test that callbacks signed with the wrong secret are not stored"""
+        body = self.simulator.build_event(self.payment)
+        response = self.post_webhook(body, signed_headers('wrong-secret', body))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_processing_deduplicates_by_transaction_id(self):
+        """Test that repeated callbacks for one transaction are applied once"""
+        for _ in range(3):
+            body = self.simulator.build_event(self.payment, transaction_id='txn_1')
+            self.post_webhook(body, signed_headers('secret', body))
+
+        processed = PaymentWebhookService.process_pending_events()
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(PaymentTransaction.objects.filter(transaction_id='txn_1').count(), 1)
+        self.assertEqual(PaymentWebhookEvent.objects.filter(status='PROCESSED').count(), 1)
+        self.assertEqual(PaymentWebhookEvent.objects.filter(status='DUPLICATE').count(), 2)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'COMPLETED')
+
+    def test_transaction_recorded_by_another_worker_is_not_duplicated(self):
+        """Test that a callback racing another worker's insert updates its transaction instead"""
+        body = self.simulator.build_event(self.payment, transaction_id='txn_2')
+        self.post_webhook(body, signed_headers('secret', body))
+        webhook_event = PaymentWebhookEvent.objects.get()
+        
+        # Another worker recorded the transaction after this batch looked it up
+        PaymentTransaction.objects.create(
+            payment=self.payment, gateway=self.gateway, transaction_id='txn_2', amount=500, status='PENDING'
+        )
+        with patch.object(PaymentTransaction.objects, 'filter', return_value=PaymentTransaction.objects.none()):
+            PaymentWebhookService.process_pending_events()
+        
+        webhook_event.refresh_from_db()
+        self.assertEqual(webhook_event.status, 'PROCESSED')
+        self.assertEqual(webhook_event.updated_at, webhook_event.processed_at)
+        self.assertEqual(PaymentTransaction.objects.get(transaction_id='txn_2').status, 'COMPLETED')
+    
+    def test_simulator_callbacks_are_accepted(self):
+        """Test that the simulator delivers correctly signed callbacks"""
+        for _ in range(5):
+            self.assertEqual(self.simulator.send(self.simulator.build_event(self.payment)), 200)
+
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 5)
+
+    def test_payments_processed_together_get_distinct_transactions(self):
+        """Test that simulated transaction IDs never collide within the same second"""
+        method = PaymentMethod.objects.create(user=self.client_user, type='CREDIT_CARD', gateway=self.gateway)
+        second = Payment.objects.create(
+            payment_number='PAY-TEST-2', event=self.event, amount=500, status='PENDING',
+            due_date=timezone.now().date()
+        )
+
+        for payment in (self.payment, second):
+            PaymentService.process_payment(payment.id, {'payment_method': method.id}, None)
+
+        self.assertEqual(PaymentTransaction.objects.values('transaction_id').distinct().count(), 2)
+
+
+class InvoiceBatchTests(TestCase):
+    """Test bulk invoice generation from accepted quotes"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='clientpassword',
+            role='CLIENT'
+        )
+
+        self.quotes = []
+        for i in range(3):
+            event = Event.objects.create(
+                client=self.client_user,
+                name=f'Test Event {i}',
+                status='CONFIRMED',
+                start_date=timezone.now() + timedelta(days=30)
+            )
+            quote = EventQuote.objects.create(
+                event=event,
+                status='ACCEPTED',
+                subtotal=200,
+                tax_amount=20,
+                total_amount=220,
+                valid_until=timezone.now().date() + timedelta(days=30)
+            )
+            QuoteLineItem.objects.bulk_create([
+                QuoteLineItem(quote=quote, description='Venue', quantity=1, unit_price=150, tax_rate=10, total=150),
+                QuoteLineItem(quote=quote, description='Flowers', quantity=2, unit_price=25, total=50),
+            ])
+            self.quotes.append(quote)
+
+        # Not eligible: still a draft
+        EventQuote.objects.create(
+            event=event,
+            version=2,
+            status='DRAFT',
+            total_amount=100,
+            valid_until=timezone.now().date() + timedelta(days=30)
+        )
+
+    def test_run_invoices_each_accepted_quote_once(self):
+        """Test that a run creates one invoice with line items per eligible quote"""
+        run = InvoiceBatchService.start_run(issue_invoices=False)
+        self.assertEqual(run.total_quotes, 3)
+
+        run = InvoiceBatchService.run_batch(run.id, chunk_size=2)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(run.processed_quotes, 3)
+        self.assertEqual(run.invoices_created, 3)
+        self.assertEqual(run.progress, 100)
+        self.assertEqual(run.last_quote_id, self.quotes[-1].id)
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual(InvoiceLineItem.objects.count(), 6)
+
+        # Totals come from the line items, as with Invoice.create_from_quote, not the quote
+        invoice = Invoice.objects.get(quote=self.quotes[0])
+        self.assertEqual(invoice.status, 'DRAFT')
+        self.assertEqual((invoice.subtotal, invoice.tax_amount, invoice.total_amount), (200, 15, 215))
+        self.assertEqual(
+            invoice.invoice_id,
+            f"INV-{run.issue_date.strftime('%Y%m%d')}-{self.quotes[0].event_id}-{self.quotes[0].id}"
+        )
+
+    def test_interrupted_run_resumes_from_cursor(self):
+        """Test that resuming a run does not invoice committed quotes again"""
+        run = InvoiceBatchService.start_run(issue_invoices=False)
+        InvoiceBatchService._process_chunk(run.id, 2)
+        InvoiceBatchRun.objects.filter(pk=run.id).update(status='FAILED')
+
+        InvoiceBatchService.resume_run(run.id)
+        run = InvoiceBatchService.run_batch(run.id, chunk_size=2)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(run.processed_quotes, 3)
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual(InvoiceBatchService.eligible_quotes().count(), 0)
+
+    def test_issue_invoices_in_bulk(self):
+        """Test that issuing a chunk records notifications and timeline entries"""
+        run = InvoiceBatchService.start_run()
+        run = InvoiceBatchService.run_batch(run.id)
+        invoice_ids = list(Invoice.objects.values_list('id', flat=True))
+
+        issued = InvoiceBatchService.issue_invoices(invoice_ids, run_id=run.id)
+
+        run.refresh_from_db()
+        self.assertEqual(issued, 3)
+        self.assertEqual(run.invoices_issued, 3)
+        self.assertEqual(Invoice.objects.filter(status='ISSUED', issue_date=timezone.now().date()).count(), 3)
+        self.assertEqual(PaymentNotification.objects.filter(notification_type='INVOICE_ISSUED').count(), 3)
+        self.assertEqual(EventTimeline.objects.filter(action_data__invoice_id__in=invoice_ids).count(), 3)
+
+        # Issuing again is a no-op
+        self.assertEqual(InvoiceBatchService.issue_invoices(invoice_ids, run_id=run.id), 0)
+
+
+class InvoiceTotalsTests(TestCase):
+    """Test database-side invoice total calculation"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='clientpassword',
+            role='CLIENT'
+        )
+
+        self.event = Event.objects.create(
+            client=self.client_user,
+            name='Test Wedding',
+            status='CONFIRMED',
+            start_date=timezone.now() + timedelta(days=30)
+        )
+
+        self.invoice = Invoice.objects.create(
+            invoice_id='INV-TEST-1',
+            event=self.event,
+            client=self.client_user,
+            subtotal=0,
+            tax_amount=0,
+            total_amount=0,
+            issue_date=timezone.now().date(),
+            due_date=timezone.now().date() + timedelta(days=14),
+            status='DRAFT'
+        )
+
+    def test_line_item_save_updates_totals(self):
+        """Test that saving a line item recalculates the invoice"""
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice, description='Venue', quantity=1, unit_price=100, tax_rate=12, total=100
+        )
+
+        self.assertEqual(self.invoice.subtotal, 100)
+        self.assertEqual(self.invoice.tax_amount, 12)
+        self.assertEqual(self.invoice.total_amount, 112)
+
+    def test_invoice_from_quote_recalculates_once(self):
+        """Test that copying a quote's lines updates the invoice totals once, not per line"""
+        quote = EventQuote.objects.create(
+            event=self.event, status='ACCEPTED', subtotal=0, tax_amount=0, total_amount=0,
+            valid_until=timezone.now().date() + timedelta(days=30)
+        )
+        QuoteLineItem.objects.bulk_create([
+            QuoteLineItem(quote=quote, description=f'Item {i}', quantity=1, unit_price=50, tax_rate=10, total=50)
+            for i in range(3)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            invoice = Invoice.create_from_quote(quote)
+
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "payments_invoice"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual((invoice.subtotal, invoice.tax_amount, invoice.total_amount), (150, 15, 165))
+
+    def test_recalculate_command_fixes_drift(self):
+        """Test that the recalculation command repairs stale stored totals"""
+        InvoiceLineItem.objects.bulk_create([
+            InvoiceLineItem(invoice=self.invoice, description='Venue', quantity=1, unit_price=100, tax_rate=10, total=100),
+            InvoiceLineItem(invoice=self.invoice, description='Flowers', quantity=2, unit_price=25, tax_rate=0, total=50),
+        ])
+
+        call_command('recalculate_document_totals', documents=['invoices'], chunk_size=1, stdout=StringIO())
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.subtotal, 150)
+        self.assertEqual(self.invoice.tax_amount, 10)
+        self.assertEqual(self.invoice.total_amount, 160)
+
+
+class PaymentQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """Check that common PaymentViewSet filters are served by indexes on a large table"""
+
+    PAYMENT_COUNT = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        client_user = User.objects.create_user(
+            email='client@example.com',
+            password='clientpassword',
+            role='CLIENT'
+        )
+
+        now = timezone.now()
+        cls.events = Event.objects.bulk_create([
+            Event(
+                client=client_user,
+                name=f'Event {i}',
+                status='CONFIRMED',
+                start_date=now + timedelta(days=i)
+            )
+            for i in range(200)
+        ])
+
+        # Mostly settled payments with a small open backlog, as in production
+        today = now.date()
+        payments = []
+        for i in range(cls.PAYMENT_COUNT):
+            if i % 50 == 0:
+                payment_status = 'FAILED'
+            elif i % 10 == 0:
+                payment_status = 'PENDING'
+            else:
+                payment_status = 'COMPLETED'
+            payments.append(Payment(
+                payment_number=f'PAY-{i:06d}',
+                event=cls.events[i % len(cls.events)],
+                amount=100 + i % 900,
+                status=payment_status,
+                due_date=today - timedelta(days=i % 730),
+                created_at=now - timedelta(minutes=i)
+            ))
+        Payment.objects.bulk_create(payments, batch_size=2000)
+
+        cls.analyze(Payment)
+
+    def filtered(self, **params):
+        """Payments as filtered by the list endpoint, first page only"""
+        view = PaymentViewSet()
+        view.request = Request(APIRequestFactory().get('/api/payments/payments/', params))
+        return view.get_queryset()[:20]
+
+    def test_default_listing(self):
+        """Test that the unfiltered list reads the newest rows from the created_at index"""
+        queryset = self.filtered()
+        self.assertNoSeqScan(queryset)
+        self.assertUsesIndex(queryset, 'payment_created_at_idx')
+
+    def test_status_and_due_date_range(self):
+        """Test filtering open payments by due date"""
+        today = timezone.now().date()
+        queryset = Payment.objects.filter(
+            status='PENDING',
+            due_date__gte=today - timedelta(days=30),
+            due_date__lte=today
+        )
+        self.assertNoSeqScan(queryset)
+        self.assertUsesIndex(queryset, 'payment_status_due_idx')
+        self.assertNoSeqScan(self.filtered(
+            status='PENDING',
+            start_date=str(today - timedelta(days=30)),
+            end_date=str(today)
+        ))
+
+    def test_event_and_status(self):
+        """Test filtering an event's payments by status"""
+        queryset = Payment.objects.filter(event=self.events[0], status='PENDING')
+        self.assertNoSeqScan(queryset)
+        self.assertUsesIndex(queryset, 'payment_event_status_idx')
+        self.assertNoSeqScan(self.filtered(event=self.events[0].id, status='PENDING'))
+
+    def test_payment_number_search(self):
+        """Test that substring search on payment_number uses the trigram index"""
+        queryset = Payment.objects.filter(payment_number__icontains='012345')
+        self.assertNoSeqScan(queryset)
+        self.assertUsesIndex(queryset, 'payment_number_trgm_idx')
+        self.assertNoSeqScan(self.filtered(search='012345'))
@@ -3,6 +3,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    InvoiceBatchRunViewSet,
     InvoiceLineItemViewSet,
     InvoiceTaxViewSet,
     InvoiceViewSet,
@@ -13,6 +14,8 @@ from .views import (
     PaymentPlanViewSet,
     PaymentTransactionViewSet,
     PaymentViewSet,
+    PaymentWebhookEventViewSet,
+    PaymentWebhookView,
     RefundViewSet,
     TaxRateViewSet,
 )
@@ -20,6 +23,7 @@ from .views import (
 router = DefaultRouter()
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
+router.register(r'invoice-batches', InvoiceBatchRunViewSet, basename='invoice-batch')
 router.register(r'payment-plans', PaymentPlanViewSet, basename='payment-plan')
 router.register(r'installments', PaymentInstallmentViewSet, basename='installment')
 router.register(r'payment-methods', PaymentMethodViewSet, basename='payment-method')
@@ -30,7 +34,9 @@ router.register(r'refunds', RefundViewSet, basename='refund')
 router.register(r'invoice-items', InvoiceLineItemViewSet, basename='invoice-item')
 router.register(r'invoice-taxes', InvoiceTaxViewSet, basename='invoice-tax')
 router.register(r'notifications', PaymentNotificationViewSet, basename='notification')
+router.register(r'webhook-events', PaymentWebhookEventViewSet, basename='webhook-event')
 
 urlpatterns = [
+    path('webhooks/<str:gateway_code>/', PaymentWebhookView.as_view(), name='payment-webhook'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,12 +1,16 @@
 # backend/core/domains/payments/views.py
+from core.utils.idempotency import idempotent
 from core.utils.permissions import IsAdmin
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .exceptions import InvoiceBatchRunNotFoundException
 from .models import (
     Invoice,
+    InvoiceBatchRun,
     InvoiceLineItem,
     InvoiceTax,
     Payment,
@@ -16,10 +20,12 @@ from .models import (
     PaymentNotification,
     PaymentPlan,
     PaymentTransaction,
+    PaymentWebhookEvent,
     Refund,
     TaxRate,
 )
 from .serializers import (
+    InvoiceBatchRunSerializer,
     InvoiceLineItemSerializer,
     InvoiceSerializer,
     InvoiceTaxSerializer,
@@ -30,17 +36,21 @@ from .serializers import (
     PaymentPlanSerializer,
     PaymentSerializer,
     PaymentTransactionSerializer,
+    PaymentWebhookEventSerializer,
     RefundSerializer,
     TaxRateSerializer,
 )
 from .services import (
+    InvoiceBatchService,
     InvoiceService,
     PaymentGatewayService,
     PaymentMethodService,
     PaymentPlanService,
     PaymentService,
+    PaymentWebhookService,
     TaxRateService,
 )
+from .webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER
 
 
 class PaymentViewSet(viewsets.ModelViewSet):
@@ -95,6 +105,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @idempotent('payments.create')
     def create(self, request, *args, **kwargs):
         """Create a new payment"""
         try:
@@ -116,6 +127,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @idempotent('payments.process')
     def process(self, request, pk=None):
         """Process a payment through a payment gateway"""
         try:
@@ -128,6 +140,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @idempotent('payments.refund')
     def refund(self, request, pk=None):
         """Create a refund for a payment"""
         try:
@@ -292,6 +305,49 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class InvoiceBatchRunViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for bulk invoicing runs over accepted quotes"""
+    queryset = InvoiceBatchRun.objects.all()
+    serializer_class = InvoiceBatchRunSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by('-created_at')
+        
+        status = self.request.query_params.get('status', None)
+        if status:
+            queryset = queryset.filter(status=status)
+        
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """Start a bulk invoicing run"""
+        try:
+            run = InvoiceBatchService.start_run(
+                user=request.user,
+                quote_ids=request.data.get('quote_ids'),
+                issue_invoices=request.data.get('issue_invoices', True),
+                due_days=int(request.data.get('due_days', 14)),
+                issue_date=request.data.get('issue_date')
+            )
+            serializer = self.get_serializer(run)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Resume a failed or interrupted run from its last committed quote"""
+        try:
+            run = InvoiceBatchService.resume_run(pk)
+            serializer = self.get_serializer(run)
+            return Response(serializer.data)
+        except InvoiceBatchRunNotFoundException as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class PaymentPlanViewSet(viewsets.ModelViewSet):
     """ViewSet for managing payment plans"""
     queryset = PaymentPlan.objects.all()
@@ -373,6 +429,7 @@ class PaymentInstallmentViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
     
     @action(detail=True, methods=['post'])
+    @idempotent('installments.create_payment')
     def create_payment(self, request, pk=None):
         """Create a payment for this installment"""
         try:
@@ -646,6 +703,52 @@ class PaymentTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
+class PaymentWebhookView(APIView):
+    """
+    Intake endpoint for payment gateway callbacks.
+    
+    Only verifies the signature and stores the raw payload; processing happens
+    asynchronously in batches.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def post(self, request, gateway_code):
+        webhook_event = PaymentWebhookService.receive_webhook(
+            gateway_code,
+            request.body,
+            request.META.get(SIGNATURE_HEADER, ''),
+            request.META.get(TIMESTAMP_HEADER, '')
+        )
+        return Response({"received": True, "id": webhook_event.id}, status=status.HTTP_200_OK)
+
+
+class PaymentWebhookEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for viewing received gateway callbacks"""
+    queryset = PaymentWebhookEvent.objects.all()
+    serializer_class = PaymentWebhookEventSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('gateway').order_by('-created_at')
+        
+        # Apply filters
+        gateway_id = self.request.query_params.get('gateway', None)
+        status = self.request.query_params.get('status', None)
+        transaction_id = self.request.query_params.get('transaction_id', None)
+        
+        if gateway_id:
+            queryset = queryset.filter(gateway_id=gateway_id)
+        
+        if status:
+            queryset = queryset.filter(status=status)
+        
+        if transaction_id:
+            queryset = queryset.filter(transaction_id=transaction_id)
+        
+        return queryset
+
+
 class RefundViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing refunds"""
     queryset = Refund.objects.all()
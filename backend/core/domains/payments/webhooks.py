@@ -0,0 +1,53 @@
+# backend/core/domains/payments/webhooks.py
+import hashlib
+import hmac
+import time
+
+SIGNATURE_HEADER = 'HTTP_X_WEBHOOK_SIGNATURE'
+TIMESTAMP_HEADER = 'HTTP_X_WEBHOOK_TIMESTAMP'
+
+# Gateway event types and the PaymentTransaction status they map to
+EVENT_STATUS_MAP = {
+    'payment.processing': 'PROCESSING',
+    'payment.completed': 'COMPLETED',
+    'payment.failed': 'FAILED',
+    'payment.cancelled': 'CANCELLED',
+}
+
+
+def get_webhook_secret(gateway):
+    """Get the shared secret used to sign a gateway's callbacks"""
+    return (gateway.config or {}).get('webhook_secret', '')
+
+
+def compute_signature(secret, timestamp, body):
+    """HMAC-SHA256 over '<timestamp>.<raw body>'"""
+    if isinstance(body, str):
+        body = body.encode()
+    message = str(timestamp).encode() + b'.' + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, timestamp, body, signature, tolerance=300):
+    """Check a callback signature and reject stale timestamps to limit replays"""
+    if not secret or not signature or not timestamp:
+        return False
+
+    try:
+        age = abs(time.time() - int(timestamp))
+    except (TypeError, ValueError):
+        return False
+    if tolerance and age > tolerance:
+        return False
+
+    expected = compute_signature(secret, timestamp, body)
+    return hmac.compare_digest(expected, signature)
+
+
+def signed_headers(secret, body, timestamp=None):
+    """Build the request headers a gateway would send with a callback"""
+    timestamp = timestamp or int(time.time())
+    return {
+        SIGNATURE_HEADER: compute_signature(secret, timestamp, body),
+        TIMESTAMP_HEADER: str(timestamp),
+    }
@@ -1,5 +1,5 @@
 # backend/core/domains/sales/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
 
 from .models import EventQuote, QuoteActivity, QuoteLineItem, QuoteTemplate
 
@@ -46,11 +46,28 @@ class EventQuoteAdmin(admin.ModelAdmin):
     )
     
     inlines = [QuoteLineItemInline, QuoteActivityInline]
+    actions = ['generate_invoices']
     
     def get_queryset(self, request):
         """Optimize query with select_related"""
         qs = super().get_queryset(request)
         return qs.select_related('event', 'template', 'created_by')
+    
+    @admin.action(description='Generate invoices for selected accepted quotes')
+    def generate_invoices(self, request, queryset):
+        from core.domains.payments.services import InvoiceBatchService
+        
+        quote_ids = list(queryset.filter(status='ACCEPTED').values_list('id', flat=True))
+        if not quote_ids:
+            self.message_user(request, "No accepted quotes selected", messages.WARNING)
+            return
+        
+        run = InvoiceBatchService.start_run(user=request.user, quote_ids=quote_ids)
+        self.message_user(
+            request,
+            f"Invoice batch run {run.id} queued for {run.total_quotes} quote(s)",
+            messages.SUCCESS
+        )
 
 
 @admin.register(QuoteTemplate)
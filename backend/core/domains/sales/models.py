@@ -2,7 +2,11 @@
 from decimal import Decimal
 
 from core.utils.models import BaseModel
+from core.utils.totals import AMOUNT_FIELD, deferred_totals, sum_of, update_totals
 from django.db import models
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least, Now
+from django.db.models.lookups import Exact
 from django.utils import timezone
 
 
@@ -42,29 +46,49 @@ class EventQuote(BaseModel):
     def __str__(self):
         return f"Quote {self.version} for Event {self.event.id}"
     
+    TOTAL_FIELDS = ['subtotal', 'discount_amount', 'tax_amount', 'total_amount']
+    
     def calculate_totals(self):
         """Calculate quote totals from line items and options"""
-        # Calculate from line items
-        line_items = self.line_items.all()
-        self.subtotal = sum(item.total for item in line_items)
+        update_totals(self)
+    
+    @classmethod
+    def recalculate_totals(cls, pks=None):
+        """
+        Recalculate totals from line items in one UPDATE (all quotes when pks is None).
+        
+        A percentage discount applies to the subtotal and a fixed one is capped at it;
+        without a discount the stored discount amount is kept. Tax comes from the
+        template's default tax rate, falling back to 10%.
+        """
+        from core.domains.products.models import Discount
         
-        # Apply discount if present
-        if self.discount:
-            if self.discount.discount_type == 'PERCENTAGE':
-                self.discount_amount = self.subtotal * (self.discount.value / 100)
-            else:  # FIXED
-                self.discount_amount = min(self.discount.value, self.subtotal)
+        subtotal = sum_of(QuoteLineItem.objects.filter(quote=OuterRef('pk')), 'quote', 'total')
         
-        # Calculate taxes
-        tax_rate = Decimal('0.1')  # Default tax rate
-        if hasattr(self, 'template') and self.template and self.template.default_tax_rate:
-            tax_rate = self.template.default_tax_rate.rate / 100
+        discount = Discount.objects.filter(pk=OuterRef('discount_id')).order_by()
+        discount_type = Subquery(discount.values('discount_type'))
+        discount_value = Subquery(discount.values('value'))
+        discount_amount = Case(
+            When(Exact(discount_type, 'PERCENTAGE'), then=subtotal * discount_value / 100),
+            When(Exact(discount_type, 'FIXED'), then=Least(discount_value, subtotal)),
+            default=F('discount_amount'),
+            output_field=AMOUNT_FIELD
+        )
         
-        self.tax_amount = (self.subtotal - self.discount_amount) * tax_rate
+        template_rate = Subquery(
+            QuoteTemplate.objects.filter(pk=OuterRef('template_id')).values('default_tax_rate__rate')
+        )
+        tax_rate = Coalesce(template_rate / 100, Value(Decimal('0.1')), output_field=AMOUNT_FIELD)
+        tax_amount = (subtotal - discount_amount) * tax_rate
         
-        # Calculate total
-        self.total_amount = self.subtotal - self.discount_amount + self.tax_amount
-        self.save(update_fields=['subtotal', 'discount_amount', 'tax_amount', 'total_amount'])
+        queryset = cls.objects.all() if pks is None else cls.objects.filter(pk__in=pks)
+        return queryset.update(
+            subtotal=subtotal,
+            discount_amount=discount_amount,
+            tax_amount=tax_amount,
+            total_amount=subtotal - discount_amount + tax_amount,
+            updated_at=Now()
+        )
     
     def accept(self, signature_data=None):
         """Mark quote as accepted and create contract/invoice if needed"""
@@ -131,59 +155,60 @@ class EventQuote(BaseModel):
     
     def create_next_version(self):
         """Create a new version based on this quote"""
-        new_quote = EventQuote.objects.create(
-            event=self.event,
-            template=self.template,
-            version=self.version + 1,
-            status='DRAFT',
-            total_amount=self.total_amount,
-            valid_until=timezone.now().date() + timezone.timedelta(days=30),
-            terms_and_conditions=self.terms_and_conditions,
-            notes=self.notes,
-            created_by=self.created_by
-        )
-        
-        # Copy line items
-        for item in self.line_items.all():
-            QuoteLineItem.objects.create(
-                quote=new_quote,
-                description=item.description,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                tax_rate=item.tax_rate,
-                total=item.total,
-                product=item.product,
-                notes=item.notes
-            )
-        
-        # Copy options if they exist
-        for option in self.options.all():
-            new_option = QuoteOption.objects.create(
-                quote=new_quote,
-                name=option.name,
-                description=option.description,
-                total_price=option.total_price,
-                is_selected=option.is_selected
+        with deferred_totals():
+            new_quote = EventQuote.objects.create(
+                event=self.event,
+                template=self.template,
+                version=self.version + 1,
+                status='DRAFT',
+                total_amount=self.total_amount,
+                valid_until=timezone.now().date() + timezone.timedelta(days=30),
+                terms_and_conditions=self.terms_and_conditions,
+                notes=self.notes,
+                created_by=self.created_by
             )
             
-            # Copy option items
-            for item in option.items.all():
-                QuoteOptionItem.objects.create(
-                    option=new_option,
+            # Copy line items
+            for item in self.line_items.all():
+                QuoteLineItem.objects.create(
+                    quote=new_quote,
                     description=item.description,
                     quantity=item.quantity,
                     unit_price=item.unit_price,
+                    tax_rate=item.tax_rate,
                     total=item.total,
-                    product=item.product
+                    product=item.product,
+                    notes=item.notes
                 )
-        
-        # Record activity
-        QuoteActivity.objects.create(
-            quote=new_quote,
-            action='CREATED',
-            action_by=self.created_by,
-            notes=f"New version {new_quote.version} created based on version {self.version}"
-        )
+            
+            # Copy options if they exist
+            for option in self.options.all():
+                new_option = QuoteOption.objects.create(
+                    quote=new_quote,
+                    name=option.name,
+                    description=option.description,
+                    total_price=option.total_price,
+                    is_selected=option.is_selected
+                )
+                
+                # Copy option items
+                for item in option.items.all():
+                    QuoteOptionItem.objects.create(
+                        option=new_option,
+                        description=item.description,
+                        quantity=item.quantity,
+                        unit_price=item.unit_price,
+                        total=item.total,
+                        product=item.product
+                    )
+            
+            # Record activity
+            QuoteActivity.objects.create(
+                quote=new_quote,
+                action='CREATED',
+                action_by=self.created_by,
+                notes=f"New version {new_quote.version} created based on version {self.version}"
+            )
         
         return new_quote
 
@@ -211,40 +236,41 @@ class QuoteTemplate(BaseModel):
         Creates a new quote for an event based on this template
         Returns the newly created quote
         """
-        # Create the quote
-        quote = EventQuote.objects.create(
-            event=event,
-            template=self,
-            version=1,
-            status='DRAFT',
-            total_amount=0,  # Will be calculated after adding items
-            valid_until=timezone.now().date() + timezone.timedelta(days=self.default_validity_days),
-            terms_and_conditions=self.terms_and_conditions,
-            created_by=created_by
-        )
-        
-        # Add products from template
-        for template_product in self.quotetemplateplateproduct_set.all():
-            QuoteLineItem.objects.create(
+        with deferred_totals():
+            # Create the quote
+            quote = EventQuote.objects.create(
+                event=event,
+                template=self,
+                version=1,
+                status='DRAFT',
+                total_amount=0,  # Will be calculated after adding items
+                valid_until=timezone.now().date() + timezone.timedelta(days=self.default_validity_days),
+                terms_and_conditions=self.terms_and_conditions,
+                created_by=created_by
+            )
+            
+            # Add products from template
+            for template_product in self.quotetemplateplateproduct_set.all():
+                QuoteLineItem.objects.create(
+                    quote=quote,
+                    description=template_product.product.name,
+                    quantity=template_product.quantity,
+                    unit_price=template_product.product.base_price,
+                    tax_rate=self.default_tax_rate.rate if self.default_tax_rate else Decimal('0'),
+                    product=template_product.product
+                )
+            
+            # Calculate totals
+            quote.calculate_totals()
+            
+            # Record activity
+            QuoteActivity.objects.create(
                 quote=quote,
-                description=template_product.product.name,
-                quantity=template_product.quantity,
-                unit_price=template_product.product.base_price,
-                tax_rate=self.default_tax_rate.rate if self.default_tax_rate else Decimal('0'),
-                product=template_product.product
+                action='CREATED',
+                action_by=created_by,
+                notes=f"Quote created from template {self.name}"
             )
         
-        # Calculate totals
-        quote.calculate_totals()
-        
-        # Record activity
-        QuoteActivity.objects.create(
-            quote=quote,
-            action='CREATED',
-            action_by=created_by,
-            notes=f"Quote created from template {self.name}"
-        )
-        
         return quote
 
 
@@ -297,11 +323,20 @@ class QuoteOption(BaseModel):
     def __str__(self):
         return f"{self.name} - Quote {self.quote.id}"
     
+    TOTAL_FIELDS = ['total_price']
+    
     def calculate_total(self):
         """Calculate total price from option items"""
-        items = self.items.all()
-        self.total_price = sum(item.total for item in items)
-        self.save(update_fields=['total_price'])
+        update_totals(self)
+    
+    @classmethod
+    def recalculate_totals(cls, pks=None):
+        """Recalculate option prices from their items in one UPDATE (all options when pks is None)"""
+        queryset = cls.objects.all() if pks is None else cls.objects.filter(pk__in=pks)
+        return queryset.update(
+            total_price=sum_of(QuoteOptionItem.objects.filter(option=OuterRef('pk')), 'option', 'total'),
+            updated_at=Now()
+        )
 
 
 class QuoteOptionItem(BaseModel):
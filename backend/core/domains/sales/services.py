@@ -4,6 +4,7 @@ from datetime import timedelta
 from decimal import Decimal
 
 from core.domains.events.models import Event
+from core.utils.totals import deferred_totals
 from django.db import models, transaction
 from django.utils import timezone
 
@@ -162,7 +163,7 @@ class QuoteService:
         except Event.DoesNotExist:
             raise EventNotFoundException(f"Event with ID {data['event']} not found")
         
-        with transaction.atomic():
+        with deferred_totals():
             # Set default valid until date if not provided
             if 'valid_until' not in data or not data['valid_until']:
                 data['valid_until'] = timezone.now().date() + timedelta(days=30)
@@ -234,7 +235,7 @@ class QuoteService:
                 f"Cannot update a quote with status {quote.status}"
             )
         
-        with transaction.atomic():
+        with deferred_totals():
             # Track what changed
             changes = []
             
@@ -341,7 +342,7 @@ class QuoteService:
                 f"Cannot update a quote with status {quote.status}"
             )
         
-        with transaction.atomic():
+        with deferred_totals():
             # Create line item
             if 'total' not in line_item_data:
                 line_item_data['total'] = (
@@ -381,7 +382,7 @@ class QuoteService:
                 f"Cannot update a quote with status {quote.status}"
             )
         
-        with transaction.atomic():
+        with deferred_totals():
             # Track changes
             description = line_item.description
             
@@ -421,7 +422,7 @@ class QuoteService:
                 f"Cannot update a quote with status {quote.status}"
             )
         
-        with transaction.atomic():
+        with deferred_totals():
             description = line_item.description
             line_item.delete()
             
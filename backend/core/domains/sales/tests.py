@@ -1,14 +1,18 @@
 # backend/core/domains/sales/tests.py
 from core.domains.events.models import Event, EventType
-from core.domains.products.models import ProductOption
+from core.domains.products.models import Discount, ProductOption
 from core.domains.users.models import User
+from core.utils.totals import deferred_totals
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from .models import EventQuote, QuoteTemplate, QuoteTemplateProduct
+from .models import EventQuote, QuoteLineItem, QuoteTemplate, QuoteTemplateProduct
+from .services import QuoteService
 
 
 class SalesModelTests(TestCase):
@@ -344,4 +348,89 @@ class SalesAPITests(APITestCase):
         new_quote = EventQuote.objects.latest('created_at')
         self.assertEqual(new_quote.version, 2)
         self.assertEqual(new_quote.status, 'DRAFT')
-        self.assertEqual(new_quote.total_amount, self.quote.total_amount)
\ No newline at end of file
+        self.assertEqual(new_quote.total_amount, self.quote.total_amount)
+
+
+class QuoteTotalsTests(TestCase):
+    """Test database-side quote total calculation"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.admin_user = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpassword",
+            role="ADMIN"
+        )
+        
+        self.client_user = User.objects.create_user(
+            email="client@example.com",
+            password="clientpassword",
+            role="CLIENT"
+        )
+        
+        self.event = Event.objects.create(
+            client=self.client_user,
+            name="Test Wedding",
+            status="LEAD",
+            start_date=timezone.now().date()
+        )
+        
+        self.quote = EventQuote.objects.create(
+            event=self.event,
+            version=1,
+            status="DRAFT",
+            total_amount=0,
+            valid_until=timezone.now().date() + timezone.timedelta(days=30)
+        )
+    
+    def add_line_items(self):
+        QuoteService.add_line_item(
+            self.quote.id, {'description': 'Venue', 'quantity': 1, 'unit_price': '100.00'}, self.admin_user
+        )
+        return QuoteService.add_line_item(
+            self.quote.id, {'description': 'Flowers', 'quantity': 2, 'unit_price': '50.00'}, self.admin_user
+        )
+    
+    def test_line_item_changes_update_totals(self):
+        """Test that totals follow line item changes with the default 10% tax"""
+        line_item = self.add_line_items()
+        self.assertEqual(line_item.quote.subtotal, 200)
+        self.assertEqual(line_item.quote.tax_amount, 20)
+        self.assertEqual(line_item.quote.total_amount, 220)
+        
+        QuoteService.remove_line_item(line_item.id, self.admin_user)
+        self.quote.refresh_from_db()
+        self.assertEqual(self.quote.subtotal, 100)
+        self.assertEqual(self.quote.total_amount, 110)
+    
+    def test_discount_is_applied_before_tax(self):
+        """Test that a percentage discount reduces the taxable amount"""
+        self.quote.discount = Discount.objects.create(
+            code='SAVE10',
+            description='10% off',
+            discount_type='PERCENTAGE',
+            value=10,
+            valid_from=timezone.now().date()
+        )
+        self.quote.save()
+        
+        self.add_line_items()
+        self.quote.refresh_from_db()
+        
+        self.assertEqual(self.quote.discount_amount, 20)
+        self.assertEqual(self.quote.tax_amount, 18)
+        self.assertEqual(self.quote.total_amount, 198)
+    
+    def test_deferred_totals_update_once(self):
+        """Test that changes inside deferred_totals() recalculate the quote once"""
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_totals():
+                for i in range(5):
+                    QuoteLineItem.objects.create(
+                        quote=self.quote, description=f'Item {i}', quantity=1, unit_price=10, total=10
+                    )
+        
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "sales_eventquote"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.quote.subtotal, 50)
+        self.assertEqual(self.quote.total_amount, 55)
@@ -0,0 +1,231 @@
+# backend/core/domains/users/authentication.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# Token claim holding the user version the token was issued for
+VERSION_CLAIM = 'ver'
+
+# Bump when the cached tuple layout changes
+SNAPSHOT_VERSION = 2
+
+# The only fields cached per user: enough for authentication and permission checks
+SNAPSHOT_FIELDS = ('id', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_version(user):
+    """
+    Short digest of the fields that decide what a user may do.
+
+    Changing the password, role, active state or staff flags changes the version,
+    so tokens issued before the change no longer match the cached user.
+    """
+    value = f'{user.password}:{user.role}:{user.is_active}:{user.is_staff}:{user.is_superuser}'
+    return salted_hmac('users.authentication.user_version', value).hexdigest()[:16]
+
+
+class LocalUserCache:
+    """
+    Process-local LRU of user snapshots with a short TTL.
+
+    Other processes' invalidations reach this cache only through expiry, so the
+    TTL bounds how long a changed user may still be served from it.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_users = LocalUserCache(getattr(settings, 'AUTH_USER_LOCAL_CACHE_SIZE', 1024))
+
+
+def _key(user_id):
+    return f"users:auth:{user_id}"
+
+
+def _instance_attributes():
+    return {'_state', *(field.attname for field in get_user_model()._meta.concrete_fields)}
+
+
+class CachedUser(SimpleLazyObject):
+    """
+    The authenticated user, answering permission checks from a cached snapshot.
+
+    id, role, the active state and the staff flags come from the snapshot; any
+    other attribute, a save or a comparison loads the full row from the database
+    once, so views never see or write back stale profile data.
+    """
+
+    def __init__(self, snapshot):
+        self.__dict__['_snapshot'] = snapshot
+        super().__init__(lambda: get_user_model().objects.get(pk=snapshot['id']))
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            if name in self._snapshot:
+                return self._snapshot[name]
+            # Probes such as hasattr(user, 'resolve_expression') need no row
+            if name not in _instance_attributes() and not hasattr(get_user_model(), name):
+                raise AttributeError(name)
+        return super().__getattr__(name)
+
+    @property
+    def pk(self):
+        return self._snapshot['id'] if self._wrapped is empty else self._wrapped.pk
+
+    # Type checks, e.g. in filter(recipient=request.user), need no row
+    @property
+    def __class__(self):
+        return get_user_model()
+
+    @property
+    def _meta(self):
+        return get_user_model()._meta
+
+    # Only authenticated users are ever cached
+    is_authenticated = True
+    is_anonymous = False
+
+
+def _snapshot(user):
+    return {**{field: getattr(user, field) for field in SNAPSHOT_FIELDS}, 'version': user_version(user)}
+
+
+def _store(snapshot):
+    local_users.put(_key(snapshot['id']), snapshot, getattr(settings, 'AUTH_USER_LOCAL_CACHE_TTL', 10))
+    try:
+        cache.set(
+            _key(snapshot['id']), (SNAPSHOT_VERSION, snapshot),
+            timeout=getattr(settings, 'AUTH_USER_CACHE_TTL', 300)
+        )
+    except Exception as e:
+        logger.error(f"Could not cache user: {str(e)}")
+
+
+def get_user(user_id, version=None):
+    """
+    Return the user with an ID, or None.
+
+    A snapshot of the user is looked up in the process LRU, then Redis, and only
+    then the database, and is used when its version matches the token's. Tokens
+    without a version, or issued before the user changed, get the database row, so
+    they never see stale permissions.
+    """
+    key = _key(user_id)
+    if version:
+        snapshot = local_users.get(key)
+        if snapshot is None:
+            try:
+                cached = cache.get(key)
+            except Exception as e:
+                logger.error(f"Could not read cached user: {str(e)}")
+                cached = None
+            if isinstance(cached, tuple) and cached[0] == SNAPSHOT_VERSION:
+                snapshot = cached[1]
+                local_users.put(key, snapshot, getattr(settings, 'AUTH_USER_LOCAL_CACHE_TTL', 10))
+        if snapshot is not None and snapshot['version'] == version:
+            return CachedUser(snapshot)
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        _store(_snapshot(user))
+    return user
+
+
+def invalidate(user_ids):
+    """Drop users' cached snapshots now and again once the change is visible to other readers"""
+    keys = [_key(user_id) for user_id in user_ids]
+
+    def delete():
+        for key in keys:
+            local_users.discard(key)
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Could not invalidate cached users: {str(e)}")
+
+    delete()
+    transaction.on_commit(delete)
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the user's role, active state and version.
+
+    Access tokens copy these claims. The version keys the cached user, and the role
+    and active state let the frontend and stateless consumers authorize from the
+    token itself.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['is_active'] = user.is_active
+        token[VERSION_CLAIM] = user_version(user)
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves users from cache instead of the database.
+
+    The admin app fires several API calls per page, each of which used to load
+    the same user row.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = get_user(user_id, validated_token.get(VERSION_CLAIM))
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
@@ -1,4 +1,5 @@
 # backend/core/domains/users/management/commands/update_superuser_roles.py
+from core.domains.users import authentication
 from core.domains.users.models import User
 from django.core.management.base import BaseCommand
 from django.db.models import Q
@@ -13,11 +14,13 @@ class Command(BaseCommand):
             Q(is_superuser=True) & ~Q(role='ADMIN')
         )
         
-        count = superusers_to_update.count()
+        user_ids = list(superusers_to_update.values_list('id', flat=True))
+        count = len(user_ids)
         
         if count > 0:
-            # Update them to have the ADMIN role
-            superusers_to_update.update(role='ADMIN')
+            # Update them to have the ADMIN role; update() sends no signals, so drop their cached snapshots here
+            User.objects.filter(id__in=user_ids).update(role='ADMIN')
+            authentication.invalidate(user_ids)
             self.stdout.write(self.style.SUCCESS(f'Updated {count} superusers to have ADMIN role'))
         else:
             self.stdout.write(self.style.SUCCESS('No superusers needed updating'))
\ No newline at end of file
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:01
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+# users_user.search_document is rebuilt from the user and its profile whenever the
+# searched columns change; writing '' to it (as the profile trigger does) forces a rebuild.
+CREATE_TRIGGERS = r"""
+CREATE OR REPLACE FUNCTION users_user_search_document() RETURNS trigger AS $$
+BEGIN
+    NEW.search_document := lower(concat_ws(' ', '',
+        NEW.first_name, NEW.last_name, NEW.email,
+        (
+            SELECT concat_ws(' ', profile.company, profile.phone,
+                             nullif(regexp_replace(profile.phone, '\D', '', 'g'), ''))
+            FROM users_userprofile profile WHERE profile.user_id = NEW.id
+        ),
+        ''));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_user_search_document
+    BEFORE INSERT OR UPDATE OF first_name, last_name, email, search_document ON users_user
+    FOR EACH ROW EXECUTE FUNCTION users_user_search_document();
+
+CREATE OR REPLACE FUNCTION users_userprofile_search_document() RETURNS trigger AS $$
+BEGIN
+    UPDATE users_user SET search_document = '' WHERE id = NEW.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_userprofile_search_document
+    AFTER INSERT OR UPDATE OF company, phone ON users_userprofile
+    FOR EACH ROW EXECUTE FUNCTION users_userprofile_search_document();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS users_userprofile_search_document ON users_userprofile;
+DROP FUNCTION IF EXISTS users_userprofile_search_document();
+DROP TRIGGER IF EXISTS users_user_search_document ON users_user;
+DROP FUNCTION IF EXISTS users_user_search_document();
+"""
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the users table against writes
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_user_role_admininvitation_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        # Fill in existing users through the trigger
+        migrations.RunSQL("UPDATE users_user SET search_document = ''", migrations.RunSQL.noop),
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_document', name='gin_trgm_ops'), name='user_search_trgm_idx'),
+        ),
+    ]
@@ -4,7 +4,9 @@ from datetime import timedelta
 
 from core.utils.models import BaseModel
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -53,12 +55,22 @@ class User(AbstractUser):
         ('ADMIN', 'Admin'),
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='CLIENT')
+    # Space-padded, lower-cased names, email, company and phone; kept current by
+    # database triggers on this table and users_userprofile (migration 0003)
+    search_document = models.TextField(blank=True, default='', editable=False)
     
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(OpClass('search_document', name='gin_trgm_ops'), name='user_search_trgm_idx'),
+            # Case-insensitive email lookups, e.g. deduplicating imported clients
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+    
     def get_full_name(self):
         """Return the first_name plus the last_name, with a space in between."""
         full_name = f"{self.first_name} {self.last_name}"
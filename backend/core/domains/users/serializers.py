@@ -2,7 +2,9 @@
 from django.contrib.auth import password_validation
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .authentication import UserRefreshToken
 from .models import AdminInvitation, User, UserProfile
 
 
@@ -138,4 +140,9 @@ class ChangePasswordSerializer(serializers.Serializer):
         except ValidationError as e:
             raise serializers.ValidationError({"new_password": list(e.messages)})
             
-        return data
\ No newline at end of file
+        return data
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Serializer for logging in, issuing tokens with role and version claims"""
+    token_class = UserRefreshToken
@@ -7,8 +7,8 @@ from django.core.mail import send_mail
 from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils import timezone
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import UserRefreshToken
 from .exceptions import (
     EmailAlreadyExists,
     InvitationAlreadyAccepted,
@@ -102,7 +102,7 @@ class UserService:
     @staticmethod
     def get_tokens_for_user(user, remember_me=False):
         """Get JWT tokens for a user"""
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         # If remember_me is True, extend the token lifetime
         if remember_me:
@@ -1,12 +1,29 @@
 # backend/core/domains/users/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from . import authentication
 from .models import User, UserProfile
 
+# Fields cached for authentication; saving any of them drops the cached snapshot
+AUTH_FIELDS = ('password', 'role', 'is_active', 'is_staff', 'is_superuser')
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """Create a UserProfile when a new User is created"""
     if created:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the cached snapshot of a saved user, unless the save left the cached fields alone"""
+    if created or (update_fields is not None and not set(update_fields) & set(AUTH_FIELDS)):
+        return
+    authentication.invalidate([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    authentication.invalidate([instance.pk])
@@ -0,0 +1,78 @@
+# backend/core/domains/users/tests.py
+from core.utils.testing import LOCMEM_CACHE
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import authentication
+from .authentication import UserRefreshToken
+
+User = get_user_model()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedAuthenticationTests(APITestCase):
+    """Test resolving authenticated users from cache"""
+
+    def setUp(self):
+        cache.clear()
+        authentication.local_users.clear()
+        self.user = User.objects.create_user(email='admin@example.com', password='password', role='ADMIN')
+
+    def get(self, token):
+        return self.client.get(reverse('users:current_user'), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_tokens_carry_role_and_version_claims(self):
+        """Test that login issues tokens whose claims describe the user"""
+        response = self.client.post(
+            reverse('users:token_obtain_pair'), {'email': 'admin@example.com', 'password': 'password'}
+        )
+
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['role'], token['is_active']), ('ADMIN', True))
+        self.assertEqual(token['ver'], authentication.user_version(self.user))
+
+    def test_users_are_cached_until_they_change(self):
+        """Test that repeated requests skip the database and changes reach old tokens at once"""
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.assertEqual(self.get(token).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            user = authentication.get_user(self.user.id, token['ver'])
+            self.assertEqual((user.pk, user.role, user.is_active), (self.user.id, 'ADMIN', True))
+            self.assertIsInstance(user, User)
+        # Anything beyond the cached fields is read from the database
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'admin@example.com')
+
+        # Cached copies are dropped, so the old token sees the change
+        self.user.role = 'CLIENT'
+        self.user.save()
+        self.assertEqual(authentication.get_user(self.user.id, token['ver']).role, 'CLIENT')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_changes_are_never_served_stale(self):
+        """Test that name and email changes show at once and are not reverted by later saves"""
+        token = UserRefreshToken.for_user(self.user).access_token
+        url = reverse('users:current_user')
+        self.get(token)
+
+        response = self.client.put(url, {'first_name': 'Ada'}, HTTP_AUTHORIZATION=f'Bearer {token}', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        User.objects.filter(pk=self.user.pk).update(email='ada@example.com')
+
+        response = self.get(token)
+        self.assertEqual((response.data['first_name'], response.data['email']), ('Ada', 'ada@example.com'))
+
+        self.client.put(url, {'last_name': 'Lovelace'}, HTTP_AUTHORIZATION=f'Bearer {token}', format='json')
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.first_name, self.user.last_name, self.user.email), ('Ada', 'Lovelace', 'ada@example.com')
+        )
@@ -28,10 +28,16 @@ env = environ.Env(
     DB_HOST=(str, 'localhost'),
     DB_PORT=(str, '5432'),
     DATABASE_URL=(str, ''),  # For Fly.io database
+    DB_CONN_MAX_AGE=(int, 600),  # Seconds to keep DB connections open; 0 under ASGI, which cannot reuse them
+    EMAIL_HOST=(str, 'smtp.gmail.com'),
+    EMAIL_PORT=(int, 465),
+    EMAIL_USE_SSL=(bool, True),
+    EMAIL_USE_TLS=(bool, False),
     EMAIL_HOST_USER=(str, ''),
     EMAIL_HOST_PASSWORD=(str, ''),
     REDIS_URL=(str, 'redis://localhost:6379/0'),
     CELERY_BROKER_URL=(str, 'redis://localhost:6379/0'),
+    NOTIFICATION_WEBHOOK_SECRET=(str, ''),
 )
 
 # Take environment variables from .env file if it exists
@@ -125,6 +131,10 @@ if ENVIRONMENT == 'production':
         'user-agent',
         'x-csrftoken',
         'x-requested-with',
+        'idempotency-key',
+    ]
+    CORS_EXPOSE_HEADERS = [
+        'idempotent-replayed',
     ]
 else:
     # Development settings
@@ -157,7 +167,7 @@ if env('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.config(
             default=env('DATABASE_URL'),
-            conn_max_age=600,
+            conn_max_age=env('DB_CONN_MAX_AGE'),
             conn_health_checks=True,
         )
     }
@@ -200,7 +210,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.domains.users.authentication.CachedJWTAuthentication',
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -229,6 +239,8 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
 
+    'TOKEN_OBTAIN_SERIALIZER': 'core.domains.users.serializers.UserTokenObtainPairSerializer',
+
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 
@@ -241,9 +253,11 @@ SIMPLE_JWT = {
 
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 465
-EMAIL_USE_SSL = True
+EMAIL_HOST = env('EMAIL_HOST')
+EMAIL_PORT = env('EMAIL_PORT')
+EMAIL_USE_SSL = env('EMAIL_USE_SSL')
+EMAIL_USE_TLS = env('EMAIL_USE_TLS')
+EMAIL_TIMEOUT = 30  # Seconds before a stalled SMTP connection is abandoned
 EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
@@ -276,6 +290,24 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache settings (Redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('REDIS_URL'),
+    }
+}
+
+# Users resolved by API authentication, keyed by ID and version (seconds)
+AUTH_USER_CACHE_TTL = 60 * 5  # How long Redis keeps a resolved user
+AUTH_USER_LOCAL_CACHE_TTL = 10  # How long a process reuses a user; bounds staleness after a change in another process
+AUTH_USER_LOCAL_CACHE_SIZE = 1024  # Users kept per process
+
+# Idempotency-Key handling for retry-safe endpoints (seconds)
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # How long a stored response can be replayed
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # Upper bound on how long a request may hold a key
+IDEMPOTENCY_WAIT_TIMEOUT = 10  # How long a concurrent duplicate waits for the first result
+
 # Celery settings
 CELERY_BROKER_URL = env('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = env('REDIS_URL')
@@ -284,6 +316,151 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Notification channels each get their own queue so a slow provider never holds up
+# another; run a worker per queue and size it independently, e.g.
+#   celery -A core worker -Q notifications.email -c 4
+#   celery -A core worker -Q notifications.webhook,notifications.sms -c 8
+CELERY_TASK_ROUTES = [
+    'core.domains.notifications.channels.route_task',
+    {
+        'core.domains.communications.tasks.deliver_scheduled_emails': {'queue': 'notifications.email'},
+    },
+]
+
+# Periodic tasks (run with `celery -A core beat`)
+CELERY_BEAT_SCHEDULE = {
+    'sweep-payment-webhooks': {
+        'task': 'core.domains.payments.tasks.process_webhook_events',
+        'schedule': 60.0,
+    },
+    'sweep-email-queue': {
+        'task': 'core.domains.communications.tasks.deliver_scheduled_emails',
+        'schedule': 60.0,
+    },
+    'resume-stalled-campaigns': {
+        'task': 'core.domains.communications.tasks.resume_stalled_campaigns',
+        'schedule': 300.0,
+    },
+    'archive-email-records': {
+        'task': 'core.domains.communications.tasks.archive_email_records',
+        'schedule': 3600.0,
+    },
+    'send-notification-digests': {
+        'task': 'core.domains.notifications.tasks.send_notification_digests',
+        'schedule': 300.0,
+    },
+    'reconcile-notification-counts': {
+        'task': 'core.domains.notifications.tasks.reconcile_notification_counts',
+        'schedule': 600.0,
+    },
+    'sweep-notification-channels': {
+        'task': 'core.domains.notifications.tasks.sweep_notification_channels',
+        'schedule': 60.0,
+    },
+    'archive-notifications': {
+        'task': 'core.domains.notifications.tasks.archive_notifications',
+        'schedule': 3600.0,
+    },
+    'find-duplicate-clients': {
+        'task': 'core.domains.clients.tasks.find_duplicate_clients',
+        'schedule': 86400.0,
+    },
+    'reconcile-client-metrics': {
+        'task': 'core.domains.clients.tasks.reconcile_client_metrics',
+        'schedule': 86400.0,
+    },
+}
+
+# Payment gateway webhooks
+PAYMENT_WEBHOOK_BATCH_SIZE = 500  # Callbacks processed per batch
+PAYMENT_WEBHOOK_BATCH_DELAY = 2  # Seconds to collect a burst before processing it
+PAYMENT_WEBHOOK_SIGNATURE_TOLERANCE = 300  # Maximum age of a signed callback in seconds
+
+# Bulk invoicing
+INVOICE_BATCH_CHUNK_SIZE = 200  # Quotes invoiced per transaction
+
+# Clients
+CLIENT_SEARCH_LIMIT = 20  # Maximum results of the ranked client search
+CLIENT_IMPORT_CHUNK_SIZE = 500  # Imported rows created per transaction
+CLIENT_DEDUPE_MIN_SCORE = 0.5  # Similarity from 0 to 1 a pair needs to be offered for merging
+CLIENT_METRICS_RECONCILE_BATCH_SIZE = 1000  # Clients recomputed per query by the nightly reconcile
+CLIENT_INVITATION_BATCH_LIMIT = 1000  # Most clients invited in one bulk request
+
+# Outbound email queue
+EMAIL_QUEUE_BATCH_SIZE = 100  # Emails sent per SMTP connection
+EMAIL_QUEUE_BATCH_DELAY = 1  # Seconds to collect a burst before delivering it
+EMAIL_QUEUE_LEASE = 300  # Seconds a claimed email is hidden from other workers
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_BASE_DELAY = 60  # First retry delay in seconds, doubled on every attempt
+EMAIL_RETRY_MAX_DELAY = 60 * 60 * 6
+EMAIL_RATE_LIMIT = 60  # Emails per EMAIL_RATE_LIMIT_PERIOD across all workers, 0 disables
+EMAIL_RATE_LIMIT_PERIOD = 60
+EMAIL_CAMPAIGN_RATE_LIMIT = 45  # Of those, emails campaigns may use, leaving the rest for transactional mail; 0 disables
+EMAIL_CAMPAIGN_CHUNK_SIZE = 500  # Campaign recipients rendered and queued per transaction
+EMAIL_CAMPAIGN_WORKERS = 4  # Parallel delivery runs started for a campaign
+EMAIL_ATTACHMENT_CACHE_DIR = None  # Where encoded attachments are cached; None uses the system temp dir
+EMAIL_ATTACHMENT_CACHE_TTL = 60 * 60 * 24  # Seconds an unused encoded attachment is kept
+EMAIL_ATTACHMENT_CACHE_PRUNE_INTERVAL = 60 * 60  # Seconds between prunes of a worker's cache, run when it writes
+EMAIL_BODY_CACHE_SIZE = 64  # Decompressed email bodies kept in memory per worker
+EMAIL_RECORD_RETENTION_DAYS = None  # Days sent, failed and cancelled email records are kept, None keeps them
+EMAIL_BODY_PURGE_DAYS = 7  # Days an email body no record uses is kept before it is deleted
+EMAIL_ARCHIVE_BATCH_SIZE = 1000  # Email records compacted or purged per transaction
+
+# Notifications
+NOTIFICATION_COALESCE_WINDOW = 300  # Seconds during which repeats for the same object are merged
+NOTIFICATION_COUNTS_TTL = 60 * 60 * 24  # Seconds cached total/unread counters live before a rebuild
+NOTIFICATION_PREFERENCES_TTL = 60 * 60 * 24  # Seconds a cached preference snapshot lives
+NOTIFICATION_COUNTS_RECONCILE_MINUTES = 15  # Look-back of the periodic counter reconcile
+NOTIFICATION_RETENTION_DAYS = {  # Days read notifications stay in the hot table per category, None keeps them
+    'SYSTEM': 30,
+    'EVENT': 90,
+    'TASK': 90,
+    'PAYMENT': 180,
+    'CLIENT': 90,
+    'CONTRACT': 180,
+}
+NOTIFICATION_ARCHIVE_ENABLED = True  # Move expired notifications to NotificationArchive instead of deleting them
+NOTIFICATION_ARCHIVE_RETENTION_DAYS = 365 * 2  # Days archived notifications are kept, None keeps them
+NOTIFICATION_ARCHIVE_BATCH_SIZE = 1000  # Notifications moved per transaction
+NOTIFICATION_BULK_CHUNK_SIZE = 1000  # Notifications changed per statement by mark-all-read and bulk actions
+
+# External notification channels (in-app is written inline, email uses the queue above)
+NOTIFICATION_CHANNELS = {
+    'WEBHOOK': {
+        'queue': 'notifications.webhook',
+        'batch_size': 50,  # Deliveries claimed per task run
+        'rate_limit': 600,  # Per rate_limit_period across all workers, 0 disables
+        'rate_limit_period': 60,
+        'max_attempts': 8,
+        'retry_base_delay': 30,  # Seconds, doubled on every attempt
+        'retry_max_delay': 60 * 60,
+        'timeout': 10,  # Seconds per HTTP request
+    },
+    'SMS': {
+        'queue': 'notifications.sms',
+        'batch_size': 50,
+        'rate_limit': 60,
+        'rate_limit_period': 60,
+        'max_attempts': 3,
+        'retry_base_delay': 60,
+        'retry_max_delay': 60 * 30,
+    },
+}
+NOTIFICATION_DELIVERY_BATCH_DELAY = 1  # Seconds to collect a burst before delivering it
+NOTIFICATION_DELIVERY_LEASE = 300  # Seconds a claimed delivery is hidden from other workers
+NOTIFICATION_WEBHOOK_SECRET = env('NOTIFICATION_WEBHOOK_SECRET')  # Signs webhook payloads (X-Webhook-Signature)
+
+# Realtime notification stream (Server-Sent Events, requires the ASGI server)
+REALTIME_ENABLED = True
+REALTIME_REDIS_URL = env('REDIS_URL')
+REALTIME_HEARTBEAT_INTERVAL = 15  # Seconds between keep-alive comments on idle streams
+REALTIME_QUEUE_SIZE = 100  # Undelivered events held per stream before it is told to resync
+REALTIME_RETRY_MS = 5000  # Client reconnect delay sent to EventSource
+
+# Template caching
+COMPILED_TEMPLATE_CACHE_SIZE = 512  # Parsed templates kept per process
+NOTIFICATION_TEMPLATE_CACHE_TTL = 3600  # Seconds a notification type/template lookup is cached
+
 # Production security settings
 if ENVIRONMENT == 'production':
     SECURE_BROWSER_XSS_FILTER = True
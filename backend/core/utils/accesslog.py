@@ -0,0 +1,28 @@
+# backend/core/utils/accesslog.py
+import logging
+import re
+
+# Query parameters whose values must never reach the logs, e.g. the ?token= of
+# the notification stream, which EventSource cannot send as a header
+SECRET_PARAMETER = re.compile(r'([?&](?:token|access_token)=)[^&\s"]*')
+
+
+def redact(value):
+    return SECRET_PARAMETER.sub(r'\1[redacted]', value) if isinstance(value, str) else value
+
+
+class RedactSecretsFilter(logging.Filter):
+    """Mask secret query parameters in access log records"""
+
+    def filter(self, record):
+        record.msg = redact(record.msg)
+        if isinstance(record.args, tuple):
+            record.args = tuple(redact(arg) for arg in record.args)
+        elif isinstance(record.args, dict):
+            record.args = {key: redact(value) for key, value in record.args.items()}
+        return True
+
+
+def install(logger_names=('uvicorn.access', 'gunicorn.access')):
+    for name in logger_names:
+        logging.getLogger(name).addFilter(RedactSecretsFilter())
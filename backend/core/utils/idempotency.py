@@ -0,0 +1,111 @@
+# backend/core/utils/idempotency.py
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _request_fingerprint(request):
+    """Hash the parts of a request that must match for a stored response to be replayed"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str) if data else ''
+    return hashlib.sha256(f"{request.method}:{request.path}:{body}".encode()).hexdigest()
+
+
+def _replay(stored):
+    """Rebuild a response from a stored result"""
+    response = Response(stored['data'], status=stored['status'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _mismatch_response():
+    return Response(
+        {"detail": "Idempotency-Key has already been used with a different request."},
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+
+def idempotent(scope):
+    """
+    Make a view method safe to retry by honouring the Idempotency-Key header.
+
+    The first request for a key runs the view and stores its successful response
+    in the cache for IDEMPOTENCY_KEY_TTL seconds. Replays of the same key return the
+    stored response without running the view again. A duplicate that arrives while
+    the first request is still running waits up to IDEMPOTENCY_WAIT_TIMEOUT seconds
+    for its result instead of racing it. Only 2xx responses are stored, so a failed
+    request can be retried with the same key.
+
+    Requests without the header are passed straight through.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.META.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            user_id = getattr(request.user, 'pk', None)
+            key_hash = hashlib.sha256(key.encode()).hexdigest()
+            result_key = f"idempotency:{scope}:{user_id}:{key_hash}"
+            lock_key = f"{result_key}:lock"
+            fingerprint = _request_fingerprint(request)
+
+            ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+            lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)
+            wait_timeout = getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', 10)
+            poll_interval = getattr(settings, 'IDEMPOTENCY_POLL_INTERVAL', 0.1)
+
+            deadline = time.monotonic() + wait_timeout
+            while True:
+                stored = cache.get(result_key)
+                if stored is not None:
+                    if stored['fingerprint'] != fingerprint:
+                        return _mismatch_response()
+                    return _replay(stored)
+
+                # cache.add is atomic (SET NX on Redis), so only one request owns the key
+                if cache.add(lock_key, fingerprint, timeout=lock_timeout):
+                    try:
+                        response = view_method(self, request, *args, **kwargs)
+                        if status.is_success(response.status_code):
+                            cache.set(result_key, {
+                                'fingerprint': fingerprint,
+                                'status': response.status_code,
+                                'data': response.data,
+                            }, timeout=ttl)
+                        return response
+                    finally:
+                        cache.delete(lock_key)
+
+                in_flight = cache.get(lock_key)
+                if in_flight is not None and in_flight != fingerprint:
+                    return _mismatch_response()
+
+                if time.monotonic() >= deadline:
+                    return Response(
+                        {"detail": "A request with this Idempotency-Key is still being processed."},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                time.sleep(poll_interval)
+
+        return wrapper
+    return decorator
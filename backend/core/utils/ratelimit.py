@@ -0,0 +1,40 @@
+# backend/core/utils/ratelimit.py
+import time
+
+from django.core.cache import cache
+
+
+class RateLimiter:
+    """
+    Fixed-window rate limiter shared by every process through the cache.
+
+    Allows at most `limit` acquisitions per `period` seconds for a key, e.g. to
+    keep all workers together under an email provider's sending quota.
+    """
+
+    def __init__(self, key, limit, period):
+        self.key = key
+        self.limit = limit
+        self.period = period
+
+    def _window(self):
+        return int(time.time() // self.period)
+
+    def acquire(self):
+        """Take one slot in the current window, returning False when it is full"""
+        if not self.limit:
+            return True
+
+        cache_key = f"ratelimit:{self.key}:{self._window()}"
+        cache.add(cache_key, 0, timeout=self.period * 2)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # The window expired between add() and incr()
+            cache.add(cache_key, 1, timeout=self.period * 2)
+            count = 1
+        return count <= self.limit
+
+    def retry_after(self):
+        """Seconds until the next window opens"""
+        return max((self._window() + 1) * self.period - time.time(), 0)
@@ -0,0 +1,33 @@
+# backend/core/utils/search.py
+import re
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+
+# Longer input adds no selectivity and only costs trigram extraction
+MAX_QUERY_LENGTH = 100
+
+
+def normalize(query):
+    """Lower-case a search query and collapse its whitespace"""
+    return re.sub(r'\s+', ' ', (query or '').lower()).strip()[:MAX_QUERY_LENGTH]
+
+
+def document_filter(field, query):
+    """
+    Match every term of a query against a lower-cased search document column.
+
+    Documents are stored space-padded, so a term shorter than a trigram is matched
+    at the start of a word (' jo') and still narrows a pg_trgm GIN index scan;
+    longer terms match anywhere. Terms are ANDed, so "ada lov" finds Ada Lovelace.
+    """
+    condition = Q()
+    for term in normalize(query).split(' '):
+        if term:
+            condition &= Q(**{f'{field}__contains': term if len(term) >= 3 else f' {term}'})
+    return condition
+
+
+def document_rank(field, query):
+    """Relevance of a document to a query; matches at the start of a word score highest"""
+    return TrigramWordSimilarity(normalize(query), field)
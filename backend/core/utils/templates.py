@@ -0,0 +1,58 @@
+# backend/core/utils/templates.py
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template import Context, Template
+
+
+class CompiledTemplateCache:
+    """
+    Process-local LRU of parsed django.template.Template objects.
+
+    Entries are keyed by (model, pk, field, updated_at), so saving a template row
+    naturally stops its old entries from being used. The source is kept alongside
+    the compiled template and compared on lookup as a guard against rows changed
+    without touching updated_at.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, instance, field):
+        """Return the compiled template for a text field of a saved model instance"""
+        source = getattr(instance, field) or ''
+        if instance.pk is None:
+            return Template(source)
+
+        key = (instance._meta.label, instance.pk, field, getattr(instance, 'updated_at', None))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == source:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # Parse outside the lock; a concurrent miss only costs a duplicate parse
+        template = Template(source)
+        with self._lock:
+            self._entries[key] = (source, template)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_templates = CompiledTemplateCache(getattr(settings, 'COMPILED_TEMPLATE_CACHE_SIZE', 512))
+
+
+def render_field(instance, field, context):
+    """Render a model's template field, accepting a dict or a Context"""
+    if not isinstance(context, Context):
+        context = Context(context or {})
+    return compiled_templates.get(instance, field).render(context)
@@ -0,0 +1,59 @@
+# backend/core/utils/testing.py
+import json
+
+from django.db import connection
+
+# Process-local cache for tests that exercise cache-backed code without Redis
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class QueryPlanAssertionsMixin:
+    """
+    TestCase mixin for asserting on PostgreSQL query plans.
+
+    Plans depend on table statistics, so seed a realistically sized dataset and call
+    analyze() on the tables involved before asserting.
+    """
+
+    @staticmethod
+    def analyze(*models):
+        """Refresh planner statistics for the given models' tables"""
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    @staticmethod
+    def get_plan(queryset):
+        """Return the root node of the JSON EXPLAIN plan for a queryset"""
+        return json.loads(queryset.explain(format='json'))[0]['Plan']
+
+    @classmethod
+    def iter_plan_nodes(cls, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from cls.iter_plan_nodes(child)
+
+    def assertNoSeqScan(self, queryset, relation=None):
+        """Fail if the plan sequentially scans the queryset's table (or the given relation)"""
+        relation = relation or queryset.model._meta.db_table
+        plan = self.get_plan(queryset)
+        for node in self.iter_plan_nodes(plan):
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == relation:
+                self.fail(
+                    f"Sequential scan on {relation} for query:\n{queryset.query}\n\n"
+                    f"Plan:\n{json.dumps(plan, indent=2)}"
+                )
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Fail unless the plan reads through the given index"""
+        plan = self.get_plan(queryset)
+        used = {node['Index Name'] for node in self.iter_plan_nodes(plan) if 'Index Name' in node}
+        if index_name not in used:
+            self.fail(
+                f"Index {index_name} not used (used: {sorted(used) or 'none'}) for query:\n"
+                f"{queryset.query}\n\nPlan:\n{json.dumps(plan, indent=2)}"
+            )
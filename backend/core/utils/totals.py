@@ -0,0 +1,80 @@
+# backend/core/utils/totals.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Documents whose totals are waiting for the end of the current deferred_totals() block,
+# as {model: {pk: [instances to refresh]}}
+_pending = ContextVar('pending_totals', default=None)
+
+AMOUNT_FIELD = DecimalField(max_digits=20, decimal_places=6)
+
+
+def sum_of(related_queryset, group_by, expression):
+    """
+    Correlated SUM over a document's related rows, 0 when there are none.
+
+    The related queryset must be filtered on OuterRef('pk') of the document being updated.
+    """
+    subquery = (
+        related_queryset.order_by()
+        .values(group_by)
+        .annotate(value=Sum(expression, output_field=AMOUNT_FIELD))
+        .values('value')
+    )
+    return Coalesce(Subquery(subquery), Value(Decimal('0')), output_field=AMOUNT_FIELD)
+
+
+def update_totals(instance):
+    """
+    Recalculate a document's stored totals in the database.
+
+    The model provides TOTAL_FIELDS and a recalculate_totals(pks) classmethod that runs a
+    single set-based UPDATE. Inside deferred_totals() the update is postponed and coalesced
+    with every other change to the same document; the instance is refreshed afterwards.
+    """
+    model = type(instance)
+    pending = _pending.get()
+    if pending is not None:
+        pending.setdefault(model, {}).setdefault(instance.pk, []).append(instance)
+        return
+
+    model.recalculate_totals([instance.pk])
+    _refresh(model, {instance.pk: [instance]})
+
+
+@contextmanager
+def deferred_totals():
+    """
+    Run a block in a transaction and recalculate every touched document once at the end.
+
+    Nested blocks join the outermost one.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+
+    token = _pending.set({})
+    try:
+        with transaction.atomic():
+            yield
+            pending = _pending.get()
+            while pending:
+                model, instances = pending.popitem()
+                model.recalculate_totals(list(instances))
+                _refresh(model, instances)
+    finally:
+        _pending.reset(token)
+
+
+def _refresh(model, instances):
+    """Load recalculated totals onto in-memory instances with one query"""
+    rows = model.objects.filter(pk__in=list(instances)).values('pk', *model.TOTAL_FIELDS)
+    for row in rows:
+        for instance in instances[row['pk']]:
+            for field in model.TOTAL_FIELDS:
+                setattr(instance, field, row[field])